@@ -0,0 +1,122 @@
+"""Sessions/sec of the sales graph driven synchronously vs on one event loop.
+
+Every session is one customer turn: the stub LLM asks for search_products,
+the tool runs against a seeded SQLite catalog, and the stub answers. The
+stub sleeps ``--llm-ms`` per generation (time.sleep in the sync path,
+asyncio.sleep in the async one), standing in for a model server that
+accepts ``--llm-concurrency`` parallel requests.
+
+The sync run uses a pool of ``--workers`` threads calling graph.invoke. The
+async run starts ``--sessions`` concurrent graph.ainvoke calls on one loop:
+
+    python benchmarks/bench_async_sessions.py --sessions 500 --workers 16 --llm-ms 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class StubLLM(BaseChatModel):
+    """Calls search_products once, then answers; fixed latency per generation."""
+
+    latency: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    @staticmethod
+    def _reply(messages):
+        if messages[-1].type == "tool":
+            return AIMessage(content="Here is what I found.")
+        return AIMessage(content="", tool_calls=[
+            {"name": "search_products", "args": {"query": "product 1234"}, "id": f"call_{id(messages)}"}
+        ])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+
+def session_input(i):
+    config = {"configurable": {"thread_id": f"session-{i}", "customer_id": f"customer-{i}"}}
+    return {"messages": [HumanMessage(content=f"Do you have product {i % 50}?")]}, config
+
+
+def run_sync(graph, sessions, workers):
+    def one(i):
+        inputs, config = session_input(i)
+        return graph.invoke(inputs, config)["messages"][-1].content
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        replies = list(pool.map(one, range(sessions)))
+    return time.perf_counter() - start, replies
+
+
+async def run_async(graph, sessions, offset):
+    async def one(i):
+        inputs, config = session_input(i)
+        return (await graph.ainvoke(inputs, config))["messages"][-1].content
+
+    start = time.perf_counter()
+    replies = await asyncio.gather(*(one(offset + i) for i in range(sessions)))
+    return time.perf_counter() - start, replies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--llm-ms", type=float, default=200)
+    parser.add_argument("--llm-concurrency", type=int, default=256)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["CHECKPOINT_DB"] = os.path.join(tmp, "checkpoints.db")
+    os.environ["LLM_CACHE_DB"] = os.path.join(tmp, "llm_cache.db")
+    os.environ["LLM_CONCURRENCY"] = str(args.llm_concurrency)
+
+    import tools
+    from bench_db_connections import seed
+    from tools import DatabaseManager
+
+    seed(os.path.join(tmp, "store.db"), 2000)
+    tools.db_manager = DatabaseManager(os.path.join(tmp, "store.db"))
+    tools.logger.disabled = True
+
+    import graph as g
+    import logging
+    logging.getLogger("graph").disabled = True
+    logging.getLogger("httpx").disabled = True
+    stub = StubLLM(latency=args.llm_ms / 1000)
+    # The stub replies are cheap to regenerate; keep the response cache out of the measurement
+    g.assistant.runnable = g.assistant_prompt | stub
+
+    sync_seconds, sync_replies = run_sync(g.graph, args.sessions, args.workers)
+    async_seconds, async_replies = asyncio.run(run_async(g.graph, args.sessions, args.sessions))
+    assert set(sync_replies) == set(async_replies) == {"Here is what I found."}
+
+    print(f"{args.sessions} sessions, {args.llm_ms:.0f}ms per generation, "
+          f"backend accepts {args.llm_concurrency} in parallel")
+    print(f"{'mode':28} {'seconds':>8} {'sessions/s':>11}")
+    print(f"{f'sync, {args.workers} worker threads':28} {sync_seconds:8.2f} {args.sessions / sync_seconds:11.1f}")
+    print(f"{'async, one event loop':28} {async_seconds:8.2f} {args.sessions / async_seconds:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Checkpoint write/read latency and resident memory: MemorySaver vs BoundedSqliteSaver.
+
+Each simulated thread runs a few turns of a small messages graph (no LLM),
+so history grows the way it does in the sales agent. Each saver runs in its
+own subprocess so the peak RSS numbers are comparable.
+
+    python benchmarks/bench_checkpointer.py --threads 10000 --turns 3
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+
+def timed(obj, name, samples):
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+
+    setattr(obj, name, wrapper)
+
+
+def run_one(saver_name, threads, turns):
+    from typing import Annotated
+
+    from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+    from langgraph.checkpoint.memory import MemorySaver
+    from langgraph.graph import END, START, StateGraph
+    from langgraph.graph.message import add_messages
+    from typing_extensions import TypedDict
+
+    from checkpointer import BoundedSqliteSaver
+
+    class State(TypedDict):
+        messages: Annotated[list[AnyMessage], add_messages]
+
+    def assistant(state):
+        return {"messages": [AIMessage(content="Here are the results: " + "x" * 800)]}
+
+    builder = StateGraph(State)
+    builder.add_node("assistant", assistant)
+    builder.add_edge(START, "assistant")
+    builder.add_edge("assistant", END)
+
+    tmp = tempfile.mkdtemp()
+    if saver_name == "memory":
+        saver = MemorySaver()
+    else:
+        saver = BoundedSqliteSaver(os.path.join(tmp, "checkpoints.db"), max_checkpoints_per_thread=4)
+    writes, reads = [], []
+    timed(saver, "put", writes)
+    timed(saver, "get_tuple", reads)
+    graph = builder.compile(checkpointer=saver)
+
+    start = time.perf_counter()
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"thread-{t}"}}
+        for turn in range(turns):
+            graph.invoke({"messages": [HumanMessage(content=f"turn {turn}: show me laptops")]}, config)
+    elapsed = time.perf_counter() - start
+
+    def pct(samples, q):
+        return statistics.quantiles(samples, n=100)[q - 1] * 1e6
+
+    return {
+        "saver": saver_name,
+        "turns_per_s": threads * turns / elapsed,
+        "write_p50_us": pct(writes, 50),
+        "write_p99_us": pct(writes, 99),
+        "read_p50_us": pct(reads, 50),
+        "read_p99_us": pct(reads, 99),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=10000)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--saver", choices=["memory", "sqlite"])
+    args = parser.parse_args()
+
+    if args.saver:
+        print(json.dumps(run_one(args.saver, args.threads, args.turns)))
+        return
+
+    print(f"{'saver':8} {'turns/s':>8} {'write p50/p99 us':>18} {'read p50/p99 us':>18} {'peak RSS MB':>12}")
+    for saver in ("memory", "sqlite"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--saver", saver,
+             "--threads", str(args.threads), "--turns", str(args.turns)],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        print(f"{r['saver']:8} {r['turns_per_s']:8.0f} "
+              f"{r['write_p50_us']:8.0f}/{r['write_p99_us']:<9.0f} "
+              f"{r['read_p50_us']:8.0f}/{r['read_p99_us']:<9.0f} {r['peak_rss_mb']:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Prompt size per turn with and without the history manager.
+
+Replays a synthetic conversation in which every turn calls a search tool
+that returns ~20 products, then prints the estimated prompt tokens and the
+time spent preparing the history at a few turn numbers. Then checks that
+the prepared prompt stays within the budget when the customer's last
+message alone is larger than the budget, when every kept message is just
+over the truncation floor, and with a token counter denser than the
+4-characters-per-token guess; exits 1 if any view is over:
+
+    python benchmarks/bench_context_budget.py --turns 100
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from history import HistoryManager, message_tokens
+
+PRODUCTS = [
+    {"id": i, "name": f"Product {i}", "category": "Electronics",
+     "description": f"Description for product {i}", "price": 10.0 + i, "quantity": 5}
+    for i in range(20)
+]
+
+
+def turn_messages(turn):
+    return [
+        HumanMessage(content=f"Turn {turn}: show me electronics under ${100 + turn}"),
+        AIMessage(content="", tool_calls=[{"name": "search_products", "args": {"category": "electronics"},
+                                           "id": f"call_{turn}"}]),
+        ToolMessage(content=json.dumps({"products": PRODUCTS, "count": len(PRODUCTS)}),
+                    tool_call_id=f"call_{turn}", name="search_products"),
+        AIMessage(content="Here are some electronics you might like: " + ", ".join(
+            p["name"] for p in PRODUCTS[:5])),
+    ]
+
+
+def over_budget_cases():
+    """(label, manager, messages) whose prompt exceeds the budget before trimming."""
+    small_tools = [
+        m if not isinstance(m, ToolMessage) else m.model_copy(update={"content": "x" * 260})
+        for turn in range(1, 41) for m in turn_messages(turn)
+    ]
+    return [
+        ("oversized final message", HistoryManager(),
+         [m for turn in range(1, 4) for m in turn_messages(turn)]
+         + [HumanMessage(content="please compare these: " + "very long spec sheet " * 2000)]),
+        ("oversized only message", HistoryManager(), [HumanMessage(content="z" * 40000)]),
+        ("messages just over the floor", HistoryManager(refill_ratio=1.0), small_tools),
+        ("dense token counter", HistoryManager(token_counter=lambda text: len(text) // 2 + 1),
+         [m for turn in range(1, 30) for m in turn_messages(turn)]
+         + [HumanMessage(content="and these " * 1500)]),
+    ]
+
+
+def check_budget():
+    failures = 0
+    for label, manager, messages in over_budget_cases():
+        view = manager.prepare(messages)
+        sent = sum(message_tokens(m, manager.token_counter) for m in view.messages)
+        ok = sent <= manager.budget and view.messages and view.messages[-1].content
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {label}: {sent} of {manager.budget} tokens, "
+              f"{view.truncated_messages} truncated, {view.dropped_messages} dropped")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    manager = HistoryManager()
+    messages, summary, upto = [], "", 0
+    report_at = {1, 5, 10, 20, 50, args.turns}
+    print(f"{'turn':>5} {'full history tok':>17} {'sent tok':>9} {'sent msgs':>10} {'prepare ms':>11}")
+    for turn in range(1, args.turns + 1):
+        messages.extend(turn_messages(turn))
+        start = time.perf_counter()
+        view = manager.prepare(messages, summary, upto)
+        elapsed = (time.perf_counter() - start) * 1000
+        summary, upto = view.summary, view.summarized_upto
+        if turn in report_at:
+            full = sum(message_tokens(m) for m in messages)
+            print(f"{turn:5} {full:17} {view.prompt_tokens:9} {len(view.messages):10} {elapsed:11.3f}")
+
+    print()
+    sys.exit(1 if check_budget() else 0)
+
+
+if __name__ == "__main__":
+    main()
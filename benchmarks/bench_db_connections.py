@@ -0,0 +1,95 @@
+"""Calls/sec for every sales tool with per-call connections vs the pooled manager.
+
+Run from the repository root:
+
+    python benchmarks/bench_db_connections.py --products 5000 --calls 2000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from migrations import migrate
+from tools import DatabaseManager
+
+CATEGORIES = ["Electronics", "Furniture", "Books", "Toys", "Garden", "Sports"]
+CONFIG = {"configurable": {"customer_id": "bench_customer"}}
+
+
+class PerCallDatabaseManager(DatabaseManager):
+    """The old behaviour: a fresh, never-closed connection for every call."""
+
+    def get_connection(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def seed(db_path, n_products):
+    conn = sqlite3.connect(db_path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO products (name, category, description, price, quantity) VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"Product {i}", CATEGORIES[i % len(CATEGORIES)], f"Description for product {i}",
+             round(5 + (i * 7.31) % 995, 2), 1_000_000)
+            for i in range(n_products)
+        ],
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def tool_calls():
+    return {
+        "get_available_categories": lambda: tools.get_available_categories.func(),
+        "search_products": lambda: tools.search_products.func(query="product 12", category="books"),
+        "create_order": lambda: tools.create_order.func([{"product_id": 1, "quantity": 1}], config=CONFIG),
+        "check_order_status": lambda: tools.check_order_status.func(None, config=CONFIG),
+        "search_products_recommendations": lambda: tools.search_products_recommendations.func(CONFIG),
+    }
+
+
+def run(manager, calls):
+    tools.db_manager = manager
+    results = {}
+    for name, call in tool_calls().items():
+        call()
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        results[name] = calls / (time.perf_counter() - start)
+    manager.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=1000)
+    args = parser.parse_args()
+
+    tools.logger.disabled = True
+    # Measure the queries themselves, not repeated-call caching
+    tools.tool_cache.enabled = False
+    with tempfile.TemporaryDirectory() as tmp:
+        before_path = os.path.join(tmp, "before.db")
+        after_path = os.path.join(tmp, "after.db")
+        seed(before_path, args.products)
+        seed(after_path, args.products)
+        before = run(PerCallDatabaseManager(before_path), args.calls)
+        after = run(DatabaseManager(after_path), args.calls)
+
+    print(f"{'tool':34} {'before/s':>10} {'after/s':>10} {'speedup':>8}")
+    for name in before:
+        print(f"{name:34} {before[name]:10.0f} {after[name]:10.0f} {after[name] / before[name]:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Per-turn latency of the Streamlit submission pattern as a conversation grows.
+
+The old frontend passed the whole session history (human turns plus copies
+of every assistant reply) to graph.stream on each turn, and add_messages
+appended the copies to the checkpoint again under fresh ids. The current
+frontend sends only the new HumanMessage and reads the history back from
+the checkpoint. Both are driven through StreamingHandler with a stub LLM
+that answers immediately:
+
+    python benchmarks/bench_frontend_turns.py --turns 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class EchoLLM(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        reply = AIMessage(content=f"Noted: {messages[-1].content}")
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+def run_conversation(graph, thread_id, turns, full_history):
+    from streaming import StreamingHandler
+
+    config = {"configurable": {"thread_id": thread_id, "customer_id": "bench_customer"}}
+    session_messages = []
+    samples = []
+    for turn in range(1, turns + 1):
+        prompt = HumanMessage(content=f"question {turn}")
+        session_messages.append(prompt)
+        messages = list(session_messages) if full_history else [prompt]
+        start = time.perf_counter()
+        result = StreamingHandler().run(graph, {"messages": messages, "user_info": "bench_customer"}, config)
+        elapsed = (time.perf_counter() - start) * 1000
+        reply = result.messages[-1]
+        session_messages.append(AIMessage(content=reply.content))
+        samples.append((turn, elapsed, len(graph.get_state(config).values["messages"])))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=100)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["CHECKPOINT_DB"] = os.path.join(tmp, "checkpoints.db")
+    os.environ["LLM_CACHE_DB"] = os.path.join(tmp, "llm_cache.db")
+
+    import logging
+    import tools
+    from bench_db_connections import seed
+    from tools import DatabaseManager
+
+    seed(os.path.join(tmp, "store.db"), 200)
+    tools.db_manager = DatabaseManager(os.path.join(tmp, "store.db"))
+    import graph as g
+    logging.getLogger("graph").disabled = True
+    g.assistant.runnable = g.assistant_prompt | EchoLLM()
+
+    checkpoints = sorted({5, args.turns // 2, args.turns} - {0})
+    print(f"{'mode':22} {'turn':>5} {'latency ms':>11} {'messages in state':>18}")
+    for label, full_history in (("full history (old)", True), ("new message only", False)):
+        samples = run_conversation(g.graph, label, args.turns, full_history)
+        for turn, elapsed, n_messages in samples:
+            if turn in checkpoints:
+                print(f"{label:22} {turn:5d} {elapsed:11.2f} {n_messages:18d}")
+
+
+if __name__ == "__main__":
+    main()
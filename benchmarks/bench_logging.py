@@ -0,0 +1,96 @@
+"""Per-call logging overhead of the sales tools: eager f-string logging vs queued summaries.
+
+Every tool used to format its whole result into an INFO record and write it
+synchronously on the calling thread. Each tool is timed three ways, with the
+result cache off and all output going to /dev/null:
+
+    silent   - tool logger disabled, the baseline
+    eager    - silent, plus the old per-call records (arguments, query and
+               full result) formatted with f-strings into a synchronous handler
+    queued   - the tools' own records through configure_logging()
+
+    python benchmarks/bench_logging.py --products 5000 --calls 300
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import CONFIG, seed
+from log_setup import configure_logging
+from tools import DatabaseManager
+
+legacy = logging.getLogger("bench.eager")
+
+
+def tool_calls():
+    return {
+        "get_available_categories": lambda: tools.get_available_categories.func(),
+        "search_products": lambda: tools.search_products.func(category="books"),
+        "search_products_semantic": lambda: tools.search_products_semantic.func("something to read", limit=20),
+        "check_order_status": lambda: tools.check_order_status.func(None, config=CONFIG),
+        "search_products_recommendations": lambda: tools.search_products_recommendations.func(CONFIG),
+    }
+
+
+def eager(call):
+    def run():
+        legacy.info(f"Calling tool with config: {CONFIG}")
+        result = call()
+        legacy.info(f"Executing query with params: {CONFIG['configurable']}")
+        legacy.info(f"Result: {result}")
+        return result
+    return run
+
+
+def median_us(call, calls):
+    call()
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--orders", type=int, default=200, help="orders placed for the benchmark customer")
+    args = parser.parse_args()
+
+    devnull = open(os.devnull, "w")
+    legacy.addHandler(logging.StreamHandler(devnull))
+    legacy.setLevel(logging.INFO)
+    legacy.propagate = False
+    logging.getLogger().addHandler(logging.StreamHandler(devnull))
+    configure_logging(level="INFO")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "store.db")
+        seed(db_path, args.products)
+        tools.db_manager = DatabaseManager(db_path)
+        tools.tool_cache.enabled = False
+        for i in range(args.orders):
+            tools.create_order.func([{"product_id": i % args.products + 1, "quantity": 1}], config=CONFIG)
+
+        print(f"{'tool':34} {'silent us':>10} {'eager +us':>10} {'queued +us':>11}")
+        for name, call in tool_calls().items():
+            tools.logger.disabled = True
+            silent = median_us(call, args.calls)
+            eager_us = median_us(eager(call), args.calls)
+            tools.logger.disabled = False
+            queued = median_us(call, args.calls)
+            print(f"{name:34} {silent:10.0f} {eager_us - silent:+10.0f} {queued - silent:+11.0f}")
+        tools.db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Concurrent create_order stress test: no overselling, and orders/sec per writer count.
+
+N writer threads keep ordering random products (each with its own pooled
+connection) until the stock is gone. The script exits non-zero if more
+units were sold than were in stock or any quantity went negative.
+
+    python benchmarks/bench_order_concurrency.py --writers 1 4 8 --products 20 --stock 200
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import seed
+from tools import DatabaseManager
+
+
+def writer(worker_id, n_products, results):
+    rng = random.Random(worker_id)
+    config = {"configurable": {"customer_id": f"writer_{worker_id}"}}
+    placed = failed = 0
+    misses = 0
+    while misses < 50:
+        picks = rng.sample(range(1, n_products + 1), k=min(3, n_products))
+        order = [{"product_id": pid, "quantity": rng.randint(1, 3)} for pid in picks]
+        result = tools.create_order.func(order, config=config)
+        if result.get("status") == "success":
+            placed += 1
+            misses = 0
+        else:
+            failed += 1
+            misses += 1
+    results[worker_id] = (placed, failed)
+
+
+def run(writers, n_products, stock):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "orders.db")
+        seed(db_path, n_products)
+        conn = sqlite3.connect(db_path)
+        conn.execute("UPDATE products SET quantity = ?", (stock,))
+        conn.commit()
+        conn.close()
+
+        tools.db_manager = DatabaseManager(db_path)
+        results = {}
+        threads = [threading.Thread(target=writer, args=(i, n_products, results)) for i in range(writers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        tools.db_manager.close()
+
+        conn = sqlite3.connect(db_path)
+        sold = conn.execute("SELECT COALESCE(SUM(quantity), 0) FROM order_items").fetchone()[0]
+        remaining = conn.execute("SELECT SUM(quantity) FROM products").fetchone()[0]
+        negative = conn.execute("SELECT COUNT(*) FROM products WHERE quantity < 0").fetchone()[0]
+        conn.close()
+
+    placed = sum(p for p, _ in results.values())
+    ok = sold + remaining == n_products * stock and negative == 0
+    print(f"{writers:>7} {placed:>7} {placed / elapsed:10.1f} {sold:>6} {remaining:>9} "
+          f"{'ok' if ok else 'OVERSOLD'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--stock", type=int, default=200)
+    args = parser.parse_args()
+
+    tools.logger.disabled = True
+    print(f"{'writers':>7} {'orders':>7} {'orders/s':>10} {'sold':>6} {'remaining':>9} check")
+    ok = all([run(w, args.products, args.stock) for w in args.writers])
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
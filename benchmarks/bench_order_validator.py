@@ -0,0 +1,152 @@
+"""Accuracy and latency of the rule-based pizza order validator.
+
+Every sample order is labelled with the expected food/address/time check.
+The rules (order_validation.py) answer each check with Yes, No or "can't
+tell"; a check they answer wrongly is an error, and one they cannot tell
+goes to the LLM fallback. Prints per-check accuracy, the share of orders
+decided without the LLM, the rule latency, and the mean validate_order
+time with a simulated LLM check of --llm-ms for the fallbacks. Also feeds
+malformed LLM replies to the reply parser. Exits 1 on any wrong answer:
+
+    python benchmarks/bench_order_validator.py --llm-ms 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "food-ordering")))
+
+from order_validation import OrderValidator, parse_order_check
+
+MENU = [
+    "Margherita Pizza", "Pepperoni Pizza", "Vegetarian Pizza", "Cola (500ml)", "Lemonade (500ml)",
+    "Garlic Bread", "Extra Cheese", "Extra Pepperoni", "Mushrooms", "Jalapeños",
+]
+
+Y, N = "Yes", "No"
+# (order, expected food, address, time)
+CASES = [
+    ("2 large pepperoni pizzas to 123 Main St at 7:30 PM", Y, Y, Y),
+    ("One margherita pizza delivered to 45 Oak Avenue at 6:15 pm", Y, Y, Y),
+    ("A vegetarian pizza to 9 Elm Road by 8pm", Y, Y, Y),
+    ("veggie pizza and garlic bread to 310 Pine Lane at 12:45 PM", Y, Y, Y),
+    ("Pepperoni pizza with extra cheese, 77 Birch Blvd, 7 pm", Y, Y, Y),
+    ("2 colas and a margherita to 18 Maple Drive at 19:30", Y, Y, Y),
+    ("Send a lemonade and garlic bread to 5 Cedar Ct at 1:00 pm", Y, Y, Y),
+    ("Margherita with mushrooms and jalapeños to 1600 Pennsylvania Avenue at 9:05 PM", Y, Y, Y),
+    ("I'd like a pepperoni pizza delivered at 8:00 PM to 42 W 5th Street", Y, Y, Y),
+    ("3 margheritas for 221 Baker Street, 6pm please", Y, Y, Y),
+    ("pepperoni pizza to 12 Harbor Way at 6:45pm", Y, Y, Y),
+    ("Can I get a coke and a veggie pizza at 7:15 p.m. to 88 Willow Place", Y, Y, Y),
+    ("Large pepperoni pizza to 7 King's Road at 11am", Y, Y, Y),
+    ("Two pepperoni pizzas to 500 Market St. at 20:00", Y, Y, Y),
+    ("margherita pizza, 14 Rose Terrace, 6:30 PM", Y, Y, Y),
+    ("pepperoni pizza at 7:30 PM", Y, N, Y),
+    ("A margherita to my place at 8pm", Y, N, Y),
+    ("Vegetarian pizza delivered to Main Street at 6:00 PM", Y, N, Y),
+    ("garlic bread and cola to my office at 12:30 pm", Y, N, Y),
+    ("pepperoni pizza to 123 Main St", Y, Y, N),
+    ("one margherita to 9 Elm Road asap", Y, Y, N),
+    ("Veggie pizza to 310 Pine Lane tonight", Y, Y, N),
+    ("pepperoni pizza to 45 Oak Avenue as soon as possible", Y, Y, N),
+    ("A pepperoni pizza please", Y, N, N),
+    ("I want garlic bread", Y, N, N),
+    ("Send me a margherita", Y, N, N),
+    ("Delivery to 123 Main St at 7:30 PM", N, Y, Y),
+    ("to 45 Oak Avenue at 6pm", N, Y, Y),
+    ("What are your opening hours?", N, N, N),
+    ("Where is my order?", N, N, N),
+    ("hi there", N, N, N),
+    ("Do you deliver to 12 Harbor Way?", N, Y, N),
+    ("Can I order for 7:30 pm?", N, N, Y),
+    ("a cola at 5 pm to my house", Y, N, Y),
+    ("mushrooms and extra pepperoni on a margherita, 2 Hill Road, 8:15 pm", Y, Y, Y),
+    ("1 pepperoni to 123 main street at 730pm", Y, Y, Y),
+    ("pepperoni pizza for 4 people at 123 Main St at 7pm", Y, Y, Y),
+    ("2 margheritas, way too hungry, at 7pm", Y, N, Y),
+    ("pepperoni to apt 4, 55 Park Ave at 6 PM", Y, Y, Y),
+    ("pepperoni 2 for 1 deal at 5:00pm", Y, N, Y),
+    # Cases the rules should leave to the LLM
+    ("A hawaiian pizza to 123 Main St at 7:30 PM", Y, Y, Y),
+    ("2 large pizzas to 9 Elm Road at 8pm", Y, Y, Y),
+    ("Pepperoni pizza to 221b Baker at 7pm", Y, Y, Y),
+    ("margherita to 12 Elm Street at 7", Y, Y, Y),
+    ("pepperoni pizza to 45 Oak Avenue at seven thirty", Y, Y, Y),
+    ("veggie pizza to 9 Elm Road at noon", Y, Y, Y),
+    ("margherita to 5 Cedar Ct in 30 minutes", Y, Y, N),
+    ("a calzone to 77 Birch Blvd at 6 pm", Y, Y, Y),
+    ("some food to my place later", Y, N, N),
+    ("pepperoni at 8 to 10 Downing Street", Y, Y, Y),
+]
+
+# Replies the old ``dict(item.split(":") ...)`` parser crashed on
+REPLIES = [
+    ("food:Yes,address:No,time:Yes", {"food": Y, "address": N, "time": Y}),
+    ("Food: yes, Address: no, Time: YES", {"food": Y, "address": N, "time": Y}),
+    ("Sure! food:Yes address:Yes time:No", {"food": Y, "address": Y, "time": N}),
+    ("food:Yes,address:Yes", {"food": Y, "address": Y}),
+    ("food: Yes\naddress: No\ntime: No\n", {"food": Y, "address": N, "time": N}),
+    ("I cannot determine that.", {}),
+    ("", {}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-ms", type=float, default=300, help="simulated LLM order check time")
+    parser.add_argument("--repeat", type=int, default=200, help="timed rule checks per order")
+    args = parser.parse_args()
+
+    validator = OrderValidator(lambda: MENU)
+    fields = ("food", "address", "time")
+    correct = dict.fromkeys(fields, 0)
+    deferred = dict.fromkeys(fields, 0)
+    wrong = 0
+    decided = 0
+    for text, *expected in CASES:
+        checks = validator.rule_check(text)
+        for field, want in zip(fields, expected):
+            got = checks[field]
+            if got is None:
+                deferred[field] += 1
+            elif got == want:
+                correct[field] += 1
+            else:
+                wrong += 1
+                print(f"  wrong {field}: {text!r} -> {got}, expected {want}")
+        decided += None not in checks.values()
+
+    print(f"{len(CASES)} sample orders, decided by the rules alone: {decided} ({decided / len(CASES):.0%})")
+    print(f"{'check':8} {'correct':>8} {'wrong':>6} {'to LLM':>7}")
+    for field in fields:
+        answered = len(CASES) - deferred[field]
+        print(f"{field:8} {correct[field]:8d} {answered - correct[field]:6d} {deferred[field]:7d}")
+
+    samples = []
+    for text, *_ in CASES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            validator.rule_check(text)
+        samples.append((time.perf_counter() - start) / args.repeat * 1e6)
+    samples.sort()
+    rules_ms = statistics.fmean(samples) / 1000
+    print(f"\nrule check: median {statistics.median(samples):.0f} us, "
+          f"p99 {samples[int(len(samples) * 0.99)]:.0f} us, max {samples[-1]:.0f} us")
+    fallback_share = 1 - decided / len(CASES)
+    print(f"validate_order mean: LLM only {args.llm_ms:.0f} ms, "
+          f"rules + fallback {rules_ms + fallback_share * args.llm_ms:.1f} ms "
+          f"({fallback_share:.0%} of orders call the LLM)")
+
+    print()
+    for reply, want in REPLIES:
+        got = parse_order_check(reply)
+        ok = got == want
+        wrong += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} parse {reply!r} -> {got}")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Per-order latency of the pizza ordering graph: sequential vs parallel branches.
+
+pizza_ordering.py runs identify_intent and validate_order (both read only
+the question) as parallel branches and the tool calls of an order
+concurrently (two pizzas placed as two create_order calls, then an
+order history lookup). This runs complete orders through that graph and
+through the previous sequential topology (identify_intent, then
+validate_order, then one tool after the other), with a fake chat model
+that answers each prompt after a fixed delay like a local model would.
+Both run with validate_order forced onto its LLM check; a last run uses
+the rule-based validator (order_validation.py), which decides these
+orders without the LLM. All runs must produce the same tool results and
+reply; exits 1 if not:
+
+    python benchmarks/bench_pizza_graph.py --orders 10 --intent-ms 600 --check-ms 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "food-ordering")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+TMP = tempfile.mkdtemp()
+os.environ["LLM_CACHE_DB"] = os.path.join(TMP, "llm_cache.db")
+
+from llm_cache import ResponseCache
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.graph import END, StateGraph
+
+
+class FakeOrderModel(BaseChatModel):
+    """Tool call for the intent prompt, a check line for the order check, text otherwise."""
+
+    intent_seconds: float = 0.6
+    check_seconds: float = 0.3
+    response_seconds: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-order"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[t.name for t in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs):
+        text = str(messages[-1].content)
+        if tools:
+            time.sleep(self.intent_seconds)
+            address = text.split(" to ")[1].split(" at ")[0]
+            reply = AIMessage(content="", tool_calls=[
+                {"name": "create_order", "id": f"call_{pizza.split()[0].lower()}", "args": {
+                    "customer_name": "", "food_items": [pizza], "delivery_address": address, "order_date": "7:30 PM",
+                }}
+                for pizza in ("Pepperoni Pizza", "Margherita Pizza")
+            ] + [{"name": "get_all_orders", "id": "call_history", "args": {"customer_name": "Jane Smith"}}])
+        elif text.startswith("Analyze this order request"):
+            time.sleep(self.check_seconds)
+            reply = AIMessage(content="food:Yes,address:Yes,time:Yes")
+        else:
+            time.sleep(self.response_seconds)
+            reply = AIMessage(content="Thanks Jane, your pepperoni pizza is on its way!")
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+def sequential_graph(p):
+    """The topology before the fan-out: one LLM call, then the other, then each tool in turn."""
+    def execute_tools(state):
+        return {"messages": [p.run_tool(call) for call in state["tool_calls"]]}
+
+    workflow = StateGraph(p.AgentState)
+    workflow.add_node("identify_intent", p.identify_intent)
+    workflow.add_node("validate_order", p.validate_order)
+    workflow.add_node("execute_tools", execute_tools)
+    workflow.add_node("generate_response", p.generate_response)
+    workflow.set_entry_point("identify_intent")
+    workflow.add_edge("identify_intent", "validate_order")
+    workflow.add_conditional_edges(
+        "validate_order",
+        lambda state: "complete" if all(v == "Yes" for v in state["order_check"].values()) else "incomplete",
+        {"complete": "execute_tools", "incomplete": "generate_response"},
+    )
+    workflow.add_edge("execute_tools", "generate_response")
+    workflow.add_edge("generate_response", END)
+    return workflow.compile()
+
+
+def fresh_store(p, name):
+    """An empty order database and response cache, so both graphs start from the same state."""
+    workdir = os.path.join(TMP, name)
+    os.makedirs(workdir)
+    # pizza_ordering opens 'local_orders.db' relative to the working directory
+    os.chdir(workdir)
+    p.initialize_database()
+    p.llm.cache = ResponseCache(os.path.join(workdir, "llm_cache.db"))
+    p.intent_llm = p.llm.bind_tools(list(p.tools_by_name.values()))
+
+
+def run_orders(app, orders):
+    times, results = [], []
+    for i in range(orders):
+        # A new address per order, so the intent and check prompts are never cached
+        state = {
+            "question": f"One large pepperoni pizza to {i} Main Street at 7:30 PM",
+            "customer_name": "Jane Smith", "messages": [], "tool_calls": [], "order_check": {}, "generation": "",
+        }
+        start = time.perf_counter()
+        result = app.invoke(state)
+        times.append(time.perf_counter() - start)
+        # Orders placed side by side may be stored in either order, so history lines are compared sorted
+        results.append((
+            [sorted(m.content.splitlines()) for m in result["messages"] if isinstance(m, ToolMessage)],
+            result["generation"],
+        ))
+    return times, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=10)
+    parser.add_argument("--intent-ms", type=float, default=600, help="identify_intent generation time")
+    parser.add_argument("--check-ms", type=float, default=300, help="validate_order generation time")
+    parser.add_argument("--response-ms", type=float, default=500, help="generate_response generation time")
+    args = parser.parse_args()
+
+    os.chdir(TMP)
+    import pizza_ordering as p
+
+    p.llm.bound = FakeOrderModel(
+        intent_seconds=args.intent_ms / 1000, check_seconds=args.check_ms / 1000,
+        response_seconds=args.response_ms / 1000,
+    )
+    rule_check = p.order_validator.rule_check
+    p.order_validator.rule_check = lambda text: dict.fromkeys(rule_check(text))
+    runs = {}
+    fresh_store(p, "sequential")
+    runs["sequential"] = run_orders(sequential_graph(p), args.orders)
+    fresh_store(p, "parallel")
+    runs["parallel"] = run_orders(p.app, args.orders)
+    p.order_validator.rule_check = rule_check
+    fresh_store(p, "rules")
+    runs["parallel + rules"] = run_orders(p.app, args.orders)
+
+    print(f"{args.orders} complete orders; LLM calls: intent {args.intent_ms:.0f} ms, "
+          f"check {args.check_ms:.0f} ms, response {args.response_ms:.0f} ms")
+    print(f"{'graph':16} {'mean ms':>8} {'p50 ms':>8} {'max ms':>8} {'saved':>6}")
+    baseline = statistics.fmean(runs["sequential"][0])
+    for label, (times, _) in runs.items():
+        print(f"{label:16} {statistics.fmean(times) * 1000:8.0f} {statistics.median(times) * 1000:8.0f} "
+              f"{max(times) * 1000:8.0f} {1 - statistics.fmean(times) / baseline:6.0%}")
+
+    results = [result for _, result in runs.values()]
+    same = all(result == results[0] for result in results)
+    print(f"{'ok  ' if same else 'FAIL'} same tool results and replies")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Fast-path router coverage, accuracy and the turn latency it saves.
+
+Coverage and accuracy come from a labelled set of customer messages: the
+share the router answers itself, and whether those got the right tool and
+arguments. Messages that must reach the LLM (orders, advice, comparisons)
+count as errors if the router takes them.
+
+Latency: every message is sent as a new turn through the full graph with
+the scripted model (sales_script.json timings, see scripted_llm.py), once
+with the router on and once with FAST_PATH off:
+
+    python benchmarks/bench_router.py --rows 30000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from langchain_core.messages import HumanMessage
+
+# (message, expected tool or None for the LLM, expected arguments)
+CASES = [
+    ("What electronics products do you have?", "search_products", {"category": "Electronics"}),
+    ("Show me furniture under $300", "search_products", {"category": "Furniture", "max_price": 300.0}),
+    ("What's the status of my order?", "check_order_status", {"order_id": None}),
+    ("what categories do you have", "get_available_categories", {}),
+    ("Which categories are available?", "get_available_categories", {}),
+    ("what do you sell?", "get_available_categories", {}),
+    ("status of order 3", "check_order_status", {"order_id": "3"}),
+    ("Where is order #12?", "check_order_status", {"order_id": "12"}),
+    ("track my order 7 please", "check_order_status", {"order_id": "7"}),
+    ("list my orders", "check_order_status", {"order_id": None}),
+    ("has my order shipped yet?", "check_order_status", {"order_id": None}),
+    ("do you have any books?", "search_products", {"category": "Books"}),
+    ("show me toys below $40", "search_products", {"category": "Toys", "max_price": 40.0}),
+    ("garden products over $100", "search_products", {"category": "Garden", "min_price": 100.0}),
+    ("sports items between $20 and $60", "search_products",
+     {"category": "Sports", "min_price": 20.0, "max_price": 60.0}),
+    ("I'm looking for furniture", "search_products", {"category": "Furniture"}),
+    ("What books do you carry?", "search_products", {"category": "Books"}),
+    ("Hi there!", None, None),
+    ("I want to buy product 12", None, None),
+    ("Please order 2 of product 5 for me", None, None),
+    ("Can you recommend something for my office?", None, None),
+    ("Compare electronics and furniture under $300", None, None),
+    ("What is the cheapest laptop you have?", None, None),
+    ("Which chair is best for back pain?", None, None),
+    ("I need something to sit on during long workdays", None, None),
+    ("Cancel my order 4", None, None),
+    ("Why is my order late?", None, None),
+    ("Tell me more about the ergonomic chair", None, None),
+    ("Do you have laptops?", None, None),
+    ("electronics", None, None),
+    ("How does shipping work?", None, None),
+    ("thanks, that's all", None, None),
+    # Filters and requests the tool call would drop
+    ("show me books from 2020", None, None),
+    ("over 5 stars", None, None),
+    ("electronics over 5 stars", None, None),
+    ("toys not under $20", None, None),
+    ("do you have 3 chairs in furniture", None, None),
+    ("is order 5 shipped yet? also show me toys", None, None),
+    ("show me books under 20", None, None),
+    ("furniture but no chairs", None, None),
+    ("toys under $25", "search_products", {"category": "Toys", "max_price": 25.0}),
+    ("show me books under 20 dollars", "search_products", {"category": "Books", "max_price": 20.0}),
+    ("books between 10 and 20 dollars", "search_products",
+     {"category": "Books", "min_price": 10.0, "max_price": 20.0}),
+    ("status of order no. 8", "check_order_status", {"order_id": "8"}),
+]
+
+
+def accuracy(router):
+    taken = correct = wrong = 0
+    decide_us = []
+    for text, tool, args in CASES:
+        start = time.perf_counter()
+        intent = router.route(text)
+        decide_us.append((time.perf_counter() - start) * 1e6)
+        if intent is None:
+            continue
+        taken += 1
+        if intent.tool == tool and intent.args == args:
+            correct += 1
+        else:
+            wrong += 1
+            print(f"  wrong: {text!r} -> {intent.tool} {intent.args}")
+    eligible = sum(tool is not None for _, tool, _ in CASES)
+    print(f"{len(CASES)} messages, {eligible} with a fast-path answer")
+    print(f"fast path taken {taken} ({taken / len(CASES):.0%} of all, {correct / eligible:.0%} of eligible), "
+          f"{correct} correct, {wrong} wrong; routing decision median {statistics.median(decide_us):.0f} us")
+    return wrong
+
+
+def turn_latency(g, customer):
+    times = {}
+    for text, _, _ in CASES:
+        config = {"configurable": {"thread_id": str(uuid.uuid4()), "customer_id": customer}}
+        start = time.perf_counter()
+        g.graph.invoke({"messages": [HumanMessage(content=text)]}, config)
+        times[text] = time.perf_counter() - start
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=30_000, help="synthetic order lines in the store")
+    parser.add_argument("--script", default=os.path.join(os.path.dirname(__file__), "sales_script.json"))
+    parser.add_argument("--skip-latency", action="store_true")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["CHECKPOINT_DB"] = os.path.join(tmp, "checkpoints.db")
+    os.environ["LLM_CACHE_DB"] = os.path.join(tmp, "llm_cache.db")
+    os.environ["SCRIPTED_LLM"] = args.script
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import tools
+    from synthetic_data import customer_id, generate_sales_db
+
+    generate_sales_db(os.path.join(tmp, "store.db"), args.rows, 0)
+    tools.db_manager = tools.DatabaseManager(os.path.join(tmp, "store.db"))
+
+    import graph as g
+
+    wrong = accuracy(g.router)
+    if args.skip_latency:
+        sys.exit(1 if wrong else 0)
+
+    g.assistant.runnable = g.assistant_prompt | g.cached_llm.bound
+    fast = turn_latency(g, customer_id(1))
+    g.router.enabled = False
+    slow = turn_latency(g, customer_id(1))
+    covered = [text for text in fast if g.router.route(text)]
+    others = [text for text in fast if text not in covered]
+
+    print(f"\n{'':28} {'router on s':>12} {'router off s':>13}")
+    for label, texts in (("fast-path turns", covered), ("other turns", others), ("all turns", list(fast))):
+        if texts:
+            on = statistics.fmean(fast[t] for t in texts)
+            off = statistics.fmean(slow[t] for t in texts)
+            print(f"{label + f' ({len(texts)})':28} {on:12.3f} {off:13.3f}")
+    saved = sum(slow[t] - fast[t] for t in covered)
+    print(f"saved {saved:.1f}s over {len(fast)} turns ({saved / sum(slow.values()):.0%} of total turn time)")
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Queries/sec for product text search: LIKE '%q%' scans vs the FTS5 index.
+
+Also pages through a relevance-ranked search while stock changes (every
+product must come exactly once) and checks that a cursor issued before a
+product is renamed is refused. Exits 1 if either check fails. Run from the
+repository root:
+
+    python benchmarks/bench_search.py --products 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import seed
+from tools import STALE_RELEVANCE_CURSOR, DatabaseManager
+
+QUERIES = ["product 4242", "description 99", "product 7", "nothing matches this"]
+
+LIKE_SQL = (
+    "SELECT * FROM products WHERE quantity > 0 "
+    "AND (LOWER(name) LIKE ? OR LOWER(description) LIKE ?)"
+)
+
+
+def bench(label, call, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in QUERIES:
+            call(q)
+    qps = rounds * len(QUERIES) / (time.perf_counter() - start)
+    print(f"{label:8} {qps:10.1f} queries/s")
+    return qps
+
+
+def check_relevance_pages(conn):
+    """Failed check names for paging a text search while the catalog changes."""
+    results = {}
+    expected = [p["id"] for p in tools.search_products.func(query="product 1", limit=50)["products"]]
+    page = tools.search_products.func(query="product 1", limit=10)
+    seen = [p["id"] for p in page["products"]]
+    while page["has_more"]:
+        # Stock changes keep the ranking; the cursor stays valid
+        with conn:
+            conn.execute("UPDATE products SET quantity = quantity + 1 WHERE id = ?", (seen[-1],))
+        page = tools.search_products.func(query="product 1", limit=10, cursor=page["next_cursor"])
+        seen.extend(p["id"] for p in page.get("products", ()))
+        if len(seen) >= len(expected):
+            break
+    results["relevance pages across stock changes"] = seen[:len(expected)] == expected
+
+    page = tools.search_products.func(query="product 1", limit=10)
+    with conn:
+        conn.execute("UPDATE products SET name = 'Product 1 renamed' WHERE id = ?", (page["products"][-1]["id"],))
+    resumed = tools.search_products.func(query="product 1", limit=10, cursor=page["next_cursor"])
+    results["cursor refused after a rename"] = resumed.get("error") == STALE_RELEVANCE_CURSOR
+    for name, ok in results.items():
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+    return [name for name, ok in results.items() if not ok]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    tools.logger.disabled = True
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_store.db")
+        seed(db_path, args.products)
+        tools.db_manager = DatabaseManager(db_path)
+        conn = tools.db_manager.get_connection()
+
+        def like(q):
+            pattern = f"%{q.lower()}%"
+            return conn.execute(LIKE_SQL, (pattern, pattern)).fetchall()
+
+        before = bench("LIKE", like, args.rounds)
+        after = bench("FTS5", lambda q: tools.search_products.func(query=q), args.rounds)
+        failures = check_relevance_pages(conn)
+        tools.db_manager.close()
+    print(f"speedup  {after / before:9.2f}x")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
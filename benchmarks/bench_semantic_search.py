@@ -0,0 +1,86 @@
+"""Build time and queries/sec for the in-process semantic product index.
+
+Run from the repository root (1M products needs roughly 1.5 GB of RAM):
+
+    python benchmarks/bench_semantic_search.py --sizes 100000 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from semantic_index import SemanticProductIndex, load_expansions
+
+EXPANSIONS = load_expansions(os.path.join(os.path.dirname(__file__), "..", "local_store.expansions.json"))
+
+ADJECTIVES = ["ergonomic", "wireless", "compact", "premium", "portable", "wooden", "gaming",
+              "smart", "adjustable", "waterproof", "noise-cancelling", "mechanical", "classic"]
+NOUNS = ["chair", "desk", "laptop", "keyboard", "headphones", "speaker", "lamp", "monitor",
+         "sofa", "stool", "backpack", "smartphone", "tablet", "camera", "mouse", "bookshelf"]
+USES = ["office", "travel", "home", "studio", "outdoor", "kids", "workday", "music", "reading"]
+
+QUERIES = [
+    "something to sit on for long workdays",
+    "music while travelling",
+    "portable computer for the office",
+    "quiet keyboard",
+    "a place to put my books",
+    "camera for outdoor trips",
+    "comfortable seat for gaming",
+    "light for reading at night",
+]
+
+
+def products(n, seed=7):
+    rng = random.Random(seed)
+    for i in range(n):
+        name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {i}"
+        description = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} for {rng.choice(USES)} use"
+        yield i + 1, name, description
+
+
+def bench(size, dim, rounds, batch):
+    index = SemanticProductIndex(dim=dim, initial_capacity=size, expansions=EXPANSIONS)
+    start = time.perf_counter()
+    index.add_or_update(products(size))
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in QUERIES:
+            index.search(q, k=10)
+    single_qps = rounds * len(QUERIES) / (time.perf_counter() - start)
+
+    queries = (QUERIES * (batch // len(QUERIES) + 1))[:batch]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        index.search_batch(queries, k=10)
+    batch_qps = rounds * batch / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    index.add_or_update([(1, "Ergonomic Office Chair", "mesh chair for long workdays")])
+    update_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{size:>9} {dim:>5} {build:9.1f}s {index.matrix.nbytes / 2**20:9.0f}MB "
+          f"{single_qps:10.1f} {batch_qps:10.1f} {update_ms:9.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=32)
+    args = parser.parse_args()
+
+    print(f"{'products':>9} {'dim':>5} {'build':>10} {'matrix':>11} {'single q/s':>10} "
+          f"{'batch q/s':>10} {'update':>11}")
+    for size in args.sizes:
+        bench(size, args.dim, args.rounds, args.batch)
+
+
+if __name__ == "__main__":
+    main()
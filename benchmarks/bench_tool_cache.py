@@ -0,0 +1,93 @@
+"""Repeated-query throughput of the read-only tools with and without the result cache.
+
+Each tool is called repeatedly with the same arguments, first with caching
+disabled and then enabled. A mixed run then places an order every
+``--write-every`` reads and checks that the stock shown by search_products
+always matches the database:
+
+    python benchmarks/bench_tool_cache.py --products 5000 --calls 2000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import CONFIG, seed
+from tools import DatabaseManager
+
+
+def read_calls():
+    return {
+        "get_available_categories": lambda: tools.get_available_categories.func(),
+        "search_products": lambda: tools.search_products.func(query="product 12", category="books"),
+        "search_products_semantic": lambda: tools.search_products_semantic.func("something to read"),
+        "check_order_status": lambda: tools.check_order_status.func(None, config=CONFIG),
+        "search_products_recommendations": lambda: tools.search_products_recommendations.func(CONFIG),
+    }
+
+
+def throughput(calls):
+    results = {}
+    for name, call in read_calls().items():
+        call()
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        results[name] = calls / (time.perf_counter() - start)
+    return results
+
+
+def mixed_run(calls, write_every):
+    """Reads interleaved with orders; returns (reads/sec, stale reads)."""
+    conn = tools.db_manager.get_connection()
+    product_id = conn.execute("SELECT id FROM products WHERE name = 'Product 2'").fetchone()[0]
+    stale = 0
+    start = time.perf_counter()
+    for i in range(calls):
+        if i % write_every == 0:
+            tools.create_order.func([{"product_id": product_id, "quantity": 1}], config=CONFIG)
+        shown = tools.search_products.func(query="product 2")["products"]
+        shown_stock = next(p["quantity"] for p in shown if p["id"] == product_id)
+        actual = conn.execute("SELECT quantity FROM products WHERE id = ?", (product_id,)).fetchone()[0]
+        stale += shown_stock != actual
+    return calls / (time.perf_counter() - start), stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--write-every", type=int, default=10)
+    args = parser.parse_args()
+
+    tools.logger.disabled = True
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "store.db")
+        seed(db_path, args.products)
+        tools.db_manager = DatabaseManager(db_path)
+        tools.create_order.func([{"product_id": 1, "quantity": 1}], config=CONFIG)
+
+        tools.tool_cache.enabled = False
+        uncached = throughput(args.calls)
+        tools.tool_cache.enabled = True
+        cached = throughput(args.calls)
+
+        print(f"{'tool':34} {'uncached/s':>11} {'cached/s':>10} {'speedup':>8}")
+        for name in uncached:
+            print(f"{name:34} {uncached[name]:11.0f} {cached[name]:10.0f} {cached[name] / uncached[name]:7.1f}x")
+
+        for enabled in (False, True):
+            tools.tool_cache.enabled = enabled
+            rate, stale = mixed_run(args.calls, args.write_every)
+            label = "cached" if enabled else "uncached"
+            print(f"mixed, 1 order per {args.write_every} reads, {label}: {rate:.0f} reads/s, {stale} stale reads")
+        print(tools.tool_cache.stats())
+        tools.db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Latency of multi-call assistant turns: serial vs concurrent safe tool dispatch.
+
+Each turn is one AIMessage with ``--calls`` safe tool calls (category list,
+searches, order status, recommendations), executed by the graph's safe_tools
+node with max_concurrency=1 (serial) and with the configured pool size.
+``--latency-ms`` adds a per-call delay when a connection is taken, standing
+in for a networked database:
+
+    python benchmarks/bench_tool_dispatch.py --calls 4 --turns 200 --latency-ms 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import seed
+from langchain_core.messages import AIMessage
+from tools import DatabaseManager
+from utils import create_tool_node_with_fallback
+
+CONFIG = {"configurable": {"customer_id": "bench_customer"}}
+CALLS = [
+    ("get_available_categories", {}),
+    ("search_products", {"query": "product 12"}),
+    ("search_products", {"category": "books", "max_price": 50}),
+    ("check_order_status", {"order_id": None}),
+    ("search_products_recommendations", {}),
+    ("search_products_semantic", {"query": "something to read"}),
+]
+
+
+class SlowDatabaseManager(DatabaseManager):
+    def __init__(self, db_path, latency):
+        super().__init__(db_path)
+        self.latency = latency
+
+    def get_connection(self):
+        time.sleep(self.latency)
+        return super().get_connection()
+
+
+def turn_message(n_calls, turn):
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call_{turn}_{i}"}
+        for i, (name, args) in enumerate(CALLS[i % len(CALLS)] for i in range(n_calls))
+    ])
+
+
+def measure(node, n_calls, turns):
+    latencies = []
+    for turn in range(turns):
+        state = {"messages": [turn_message(n_calls, turn)]}
+        start = time.perf_counter()
+        result = node.invoke(state, CONFIG)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert [m.tool_call_id for m in result["messages"]] == [tc["id"] for tc in state["messages"][0].tool_calls]
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "mean": statistics.fmean(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    tools.logger.disabled = True
+    tools.tool_cache.enabled = False
+    safe_tools = [
+        tools.get_available_categories, tools.search_products, tools.search_products_semantic,
+        tools.search_products_recommendations, tools.check_order_status,
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "store.db")
+        seed(db_path, args.products)
+        tools.db_manager = SlowDatabaseManager(db_path, args.latency_ms / 1000)
+        tools.create_order.func([{"product_id": 1, "quantity": 1}], config=CONFIG)
+
+        print(f"{args.calls} safe calls per turn, {args.turns} turns, +{args.latency_ms}ms per call")
+        print(f"{'dispatch':14} {'p50 ms':>8} {'p95 ms':>8} {'mean ms':>8}")
+        for label, workers in (("serial", 1), (f"pool of {args.concurrency}", args.concurrency)):
+            node = create_tool_node_with_fallback(safe_tools, max_concurrency=workers)
+            node.invoke({"messages": [turn_message(args.calls, -1)]}, CONFIG)
+            stats = measure(node, args.calls, args.turns)
+            print(f"{label:14} {stats['p50']:8.2f} {stats['p95']:8.2f} {stats['mean']:8.2f}")
+        tools.db_manager.close()
+
+
+if __name__ == "__main__":
+    main()
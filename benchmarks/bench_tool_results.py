@@ -0,0 +1,125 @@
+"""Prompt tokens per tool result and turn latency for each tool result encoding.
+
+Tokens: every read-only tool is called with varied arguments on synthetic
+data, and each result is encoded the way ToolNode does (json.dumps), as
+one-line JSON and with the compact table encoding (tool_format.py). Tokens
+come from the same estimate the context budget uses (history.py).
+
+Latency: load_harness.py runs once per encoding, with the scripted model
+spending prompt evaluation time on every prompt token, and the turn latency
+and throughput are compared:
+
+    python benchmarks/bench_tool_results.py --rows 30000 --customers 8 --turns 4
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from synthetic_data import ADJECTIVES, CATEGORIES, NOUNS, customer_id, generate_sales_db, sales_counts
+
+ENCODINGS = ("toolnode_json", "json", "compact")
+
+
+def tool_results(rows: int, calls: int, seed: int):
+    """(tool name, structured result) pairs from direct tool calls."""
+    import tools
+
+    tools.logger.disabled = True
+    tools.tool_cache.enabled = False
+    tmp = tempfile.mkdtemp()
+    generate_sales_db(os.path.join(tmp, "store.db"), rows, seed)
+    tools.db_manager = tools.DatabaseManager(os.path.join(tmp, "store.db"))
+    counts = sales_counts(rows)
+    rng = random.Random(seed)
+
+    def config():
+        return {"configurable": {"customer_id": customer_id(rng.randrange(counts["customers"]))}}
+
+    makers = {
+        "get_available_categories": lambda: tools.get_available_categories.func(),
+        "search_products": lambda: tools.search_products.func(category=rng.choice(CATEGORIES)),
+        "search_products text": lambda: tools.search_products.func(query=rng.choice(NOUNS[rng.choice(CATEGORIES)])),
+        "search_products_semantic": lambda: tools.search_products_semantic.func(
+            f"something {rng.choice(ADJECTIVES)} for the office"),
+        "check_order_status": lambda: tools.check_order_status.func(None, config=config()),
+        "search_products_recommendations": lambda: tools.search_products_recommendations.func(config()),
+    }
+    for name, make in makers.items():
+        for _ in range(calls):
+            yield name, make()
+
+
+def token_report(rows: int, calls: int, seed: int):
+    from history import estimate_tokens
+    from tool_format import compact_tool_result, json_tool_result
+
+    encoders = {
+        "toolnode_json": lambda result: json.dumps(result, ensure_ascii=False),
+        "json": json_tool_result,
+        "compact": compact_tool_result,
+    }
+    tokens = defaultdict(lambda: defaultdict(list))
+    for name, result in tool_results(rows, calls, seed):
+        for encoding, encode in encoders.items():
+            tokens[name][encoding].append(estimate_tokens(encode(result)))
+
+    print(f"{'tool':34} " + " ".join(f"{e:>14}" for e in ENCODINGS) + f" {'saved':>7}")
+    report = {}
+    for name, by_encoding in tokens.items():
+        means = {e: statistics.fmean(by_encoding[e]) for e in ENCODINGS}
+        report[name] = means
+        saved = 1 - means["compact"] / means["toolnode_json"]
+        print(f"{name:34} " + " ".join(f"{means[e]:14.1f}" for e in ENCODINGS) + f" {saved:7.1%}")
+    return report
+
+
+def latency_report(args):
+    harness = os.path.join(os.path.dirname(__file__), "load_harness.py")
+    report = {}
+    for encoding in ("json", "compact"):
+        output = os.path.join(tempfile.mkdtemp(), "load.json")
+        subprocess.run([
+            sys.executable, harness, "--customers", str(args.customers), "--turns", str(args.turns),
+            "--rows", str(args.rows), "--seed", str(args.seed), "--tool-format", encoding,
+            "--prompt-tokens-per-second", str(args.prompt_tokens_per_second), "--output", output,
+        ], check=True, stdout=subprocess.DEVNULL)
+        with open(output) as f:
+            load = json.load(f)
+        report[encoding] = {"turns_per_second": load["turns_per_second"], **load["turn_latency"]}
+
+    print(f"\n{'encoding':10} {'turns/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for encoding, row in report.items():
+        print(f"{encoding:10} {row['turns_per_second']:8.2f} {row['p50_ms']:8.0f} {row['p95_ms']:8.0f} {row['p99_ms']:8.0f}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=30_000, help="synthetic order lines")
+    parser.add_argument("--calls", type=int, default=50, help="results per tool for the token count")
+    parser.add_argument("--customers", type=int, default=8)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=400)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-latency", action="store_true")
+    parser.add_argument("--output", help="write both reports as JSON")
+    args = parser.parse_args()
+
+    report = {"tokens_per_result": token_report(args.rows, args.calls, args.seed)}
+    if not args.skip_latency:
+        report["turn_latency"] = latency_report(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""Per-call latency of every sales tool and food-ordering query on synthetic data.
+
+Each function is called directly (``tool.func``, bypassing the LangChain tool
+wrapper and the tool result cache) ``--calls`` times with deterministic,
+varied arguments against the databases from synthetic_data.py. Results go to
+a JSON file with p50/p95/p99 per function; ``--compare`` prints the ratio
+against an earlier file and exits 1 if any p95 grew by more than
+``--max-regression``. A function whose module cannot be imported is
+reported as skipped and also exits 1, unless ``--allow-skipped`` is given
+(order_food.py needs the legacy langchain and langchain_community packages):
+
+    python benchmarks/bench_tools.py --scale 1m --output before.json
+    python benchmarks/bench_tools.py --scale 1m --output after.json --compare before.json
+
+The generated data is cached in ``--data-dir`` and reused between runs; each
+run works on a copy of the store, so create_order never changes the data a
+later run measures.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "food-ordering")))
+
+from synthetic_data import (
+    ADJECTIVES, CATEGORIES, NOUNS, SCALES, customer_id, customer_name, dataset, food_counts, sales_counts,
+)
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {
+        "calls": len(samples_ms),
+        "p50_ms": round(cuts[49], 4),
+        "p95_ms": round(cuts[94], 4),
+        "p99_ms": round(cuts[98], 4),
+        "mean_ms": round(statistics.fmean(samples_ms), 4),
+    }
+
+
+def measure(call: Callable[[random.Random], Any], calls: int, seed: int) -> Dict[str, float]:
+    rng = random.Random(seed)
+    call(rng)
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call(rng)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentiles(samples)
+
+
+def sales_calls(sales_path: str, rows: int) -> Dict[str, Callable[[random.Random], Any]]:
+    import tools
+
+    tools.logger.disabled = True
+    tools.tool_cache.enabled = False
+    tools.db_manager = tools.DatabaseManager(sales_path)
+    counts = sales_counts(rows)
+    with closing(sqlite3.connect(sales_path)) as conn:
+        order_owners = dict(conn.execute("SELECT id, customer_id FROM orders"))
+
+    def config(customer: str) -> Dict[str, Any]:
+        return {"configurable": {"customer_id": customer}}
+
+    def random_customer(rng):
+        return customer_id(rng.randrange(counts["customers"]))
+
+    def search(rng):
+        category = rng.choice(CATEGORIES)
+        kind = rng.randrange(4)
+        if kind == 0:
+            return tools.search_products.func(query=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS[category])}")
+        if kind == 1:
+            return tools.search_products.func(category=category)
+        low = rng.uniform(2, 1400)
+        if kind == 2:
+            return tools.search_products.func(min_price=low, max_price=low + 25)
+        return tools.search_products.func(query=rng.choice(NOUNS[category]), category=category, max_price=low)
+
+    def order_status(rng):
+        if rng.random() < 0.5:
+            order_id = rng.randint(1, counts["orders"])
+            return tools.check_order_status.func(order_id, config=config(order_owners.get(order_id, "nobody")))
+        return tools.check_order_status.func(None, config=config(random_customer(rng)))
+
+    def order(rng):
+        products = [{"product_id": rng.randint(1, counts["products"]), "quantity": 1} for _ in range(rng.randint(1, 3))]
+        return tools.create_order.func(products, config=config(random_customer(rng)))
+
+    return {
+        "get_available_categories": lambda rng: tools.get_available_categories.func(),
+        "search_products": search,
+        "search_products_semantic": lambda rng: tools.search_products_semantic.func(
+            f"something {rng.choice(ADJECTIVES)} for the {rng.choice(['office', 'garden', 'kids', 'kitchen', 'gym'])}"
+        ),
+        "check_order_status": order_status,
+        "search_products_recommendations": lambda rng: tools.search_products_recommendations.func(
+            config(random_customer(rng))
+        ),
+        "create_order": order,
+    }
+
+
+def food_calls(food_path: str, rows: int, workdir: str) -> Dict[str, Any]:
+    """Food-ordering queries; modules that cannot be imported here are reported as skipped."""
+    counts = food_counts(rows)
+    calls: Dict[str, Any] = {}
+    try:
+        import order_food
+    except ImportError as e:
+        calls["order_food.get_menu"] = calls["order_food.get_top_selling"] = f"skipped: {e}"
+    else:
+        order_food.DB_NAME = food_path
+        calls["order_food.get_menu"] = lambda rng: order_food.get_menu()
+        calls["order_food.get_top_selling"] = lambda rng: order_food.get_top_selling()
+
+    # pizza_ordering opens 'local_orders.db' relative to the working directory
+    os.symlink(food_path, os.path.join(workdir, "local_orders.db"))
+    os.chdir(workdir)
+    try:
+        import pizza_ordering
+    except ImportError as e:
+        calls["pizza_ordering.get_all_orders"] = f"skipped: {e}"
+    else:
+        calls["pizza_ordering.get_all_orders"] = lambda rng: pizza_ordering.get_all_orders.func(
+            customer_name(rng.randrange(counts["customers"]))
+        )
+    return calls
+
+
+def compare(results: Dict[str, Any], baseline_path: str, max_regression: Optional[float]) -> bool:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\nvs {baseline_path} (after / before)")
+    print(f"{'function':34} {'p50':>7} {'p95':>7} {'p99':>7}")
+    ok = True
+    for name, after in results.items():
+        before = baseline.get(name)
+        if "p50_ms" not in after or not before or "p50_ms" not in before:
+            continue
+        ratios = [after[k] / before[k] if before[k] else float("inf") for k in ("p50_ms", "p95_ms", "p99_ms")]
+        regressed = max_regression is not None and ratios[1] > 1 + max_regression
+        ok = ok and not regressed
+        print(f"{name:34} {ratios[0]:6.2f}x {ratios[1]:6.2f}x {ratios[2]:6.2f}x{'  REGRESSION' if regressed else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--rows", type=int, help="order lines; overrides --scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "sales-bench-data"))
+    parser.add_argument("--output", default="bench_tools.json")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--max-regression", type=float, help="allowed p95 growth, e.g. 0.2 for +20%%")
+    parser.add_argument("--allow-skipped", action="store_true", help="do not fail when a module cannot be imported")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    baseline = os.path.abspath(args.compare) if args.compare else None
+
+    rows = args.rows or SCALES[args.scale]
+    sales_path, food_path = dataset(args.data_dir, rows, args.seed)
+    workdir = tempfile.mkdtemp()
+    sales_path = shutil.copy(sales_path, os.path.join(workdir, "store.db"))
+    os.environ.setdefault("LLM_CACHE_DB", os.path.join(workdir, "llm_cache.db"))
+
+    calls = {**sales_calls(sales_path, rows), **food_calls(food_path, rows, workdir)}
+    results = {}
+    print(f"{rows} order lines, seed {args.seed}, {args.calls} calls each")
+    print(f"{'function':34} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for i, (name, call) in enumerate(calls.items()):
+        if isinstance(call, str):
+            results[name] = {"skipped": call}
+            print(f"{name:34} {call}")
+            continue
+        results[name] = stats = measure(call, args.calls, args.seed + i)
+        print(f"{name:34} {stats['p50_ms']:9.3f} {stats['p95_ms']:9.3f} {stats['p99_ms']:9.3f}")
+
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {
+                "rows": rows,
+                "seed": args.seed,
+                "calls": args.calls,
+                "python": platform.python_version(),
+                "sqlite": sqlite3.sqlite_version,
+                "platform": platform.platform(),
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+            },
+            "results": results,
+        }, f, indent=2)
+    print(f"wrote {output}")
+    ok = not baseline or compare(results, baseline, args.max_regression)
+    skipped = [name for name, result in results.items() if "skipped" in result]
+    if skipped:
+        print(f"{'SKIP' if args.allow_skipped else 'FAIL'} {len(skipped)} functions not measured: {', '.join(skipped)}")
+    if not ok or (skipped and not args.allow_skipped):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Exercise the LLM response cache against a fake local chat model.
+
+Checks hits for repeated and near-identical prompts, bypass for per-customer
+tool results, separation by bound tools, TTL/LRU eviction, that a cached
+reply replayed through the sales graph gets fresh message and tool call ids,
+and that the pizza bot's replies depend on the question and tool results.
+Prints the cache counters and exits 1 on the first failed check:
+
+    python benchmarks/check_llm_cache.py
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "food-ordering")))
+
+TMP = tempfile.mkdtemp()
+os.environ["CHECKPOINT_DB"] = os.path.join(TMP, "checkpoints.db")
+os.environ["LLM_CACHE_DB"] = os.path.join(TMP, "graph_cache.db")
+# The graph's tools open a copy of the sample store, never the tracked file
+os.environ["STORE_DB"] = shutil.copy(os.path.join(os.path.dirname(__file__), "..", "local_store.db"), TMP)
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.tools import tool
+
+from llm_cache import CachedChatModel, ResponseCache
+
+GENERATION_SECONDS = 0.05
+
+
+class FakeLocalChatModel(BaseChatModel):
+    """Answers after a fixed delay, counting calls, like a slow local model."""
+
+    model: str = "fake-llama"
+    temperature: float = 0.3
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-local"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[t.name for t in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(GENERATION_SECONDS)
+        self.calls += 1
+        question = messages[-1].content
+        if "laptop" in question.lower() and not isinstance(messages[-1], ToolMessage):
+            reply = AIMessage(content="", tool_calls=[
+                {"name": "search_products", "args": {"query": "laptop"}, "id": f"call_{self.calls}"}
+            ])
+        else:
+            reply = AIMessage(content=f"Answer #{self.calls} to: {question}")
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+@tool
+def search_products(query: str):
+    """Search the catalog."""
+    return "[]"
+
+
+@tool
+def check_order_status(order_id: str):
+    """Order status."""
+    return "shipped"
+
+
+failures = []
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        failures.append(name)
+
+
+def main():
+    model = FakeLocalChatModel()
+    cache = ResponseCache(os.path.join(TMP, "cache.db"), max_entries=3, ttl_seconds=60, evict_every=1)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "You are a sales assistant. Time: {time}"),
+        ("placeholder", "{messages}"),
+    ]).partial(time=datetime.now)
+    cached = CachedChatModel(model.bind_tools([search_products, check_order_status]), cache,
+                             bypass_tools=["check_order_status"])
+    chain = prompt | cached
+
+    def ask(*messages):
+        return chain.invoke({"messages": list(messages)})
+
+    first = ask(HumanMessage(content="What electronics do you have?"))
+    again = ask(HumanMessage(content="  what electronics   do you have? "))
+    check("near-identical prompt is a hit", model.calls == 1 and again.content == first.content)
+    check("hit is marked in response metadata", again.response_metadata.get("cache") == "hit")
+
+    ask(HumanMessage(content="What books do you have?"))
+    check("different prompt is a miss", model.calls == 2)
+
+    other_tools = CachedChatModel(model.bind_tools([search_products]), cache)
+    (prompt | other_tools).invoke({"messages": [HumanMessage(content="What electronics do you have?")]})
+    check("different tool schemas do not share entries", model.calls == 3)
+
+    call = AIMessage(content="", tool_calls=[{"name": "check_order_status", "args": {"order_id": "1"}, "id": "c1"}])
+    status = ToolMessage(content="shipped", name="check_order_status", tool_call_id="c1")
+    ask(HumanMessage(content="Where is order 1?"), call, status)
+    ask(HumanMessage(content="Where is order 1?"), call, status)
+    check("per-customer tool results bypass the cache", model.calls == 5)
+
+    tool_reply = ask(HumanMessage(content="Show me a laptop"))
+    replay = ask(HumanMessage(content="show me a laptop"))
+    check("cached tool call gets a fresh id",
+          replay.tool_calls and replay.tool_calls[0]["id"] != tool_reply.tool_calls[0]["id"])
+    check("cached message has no id", replay.id is None)
+
+    check("LRU keeps at most max_entries", len(cache) <= 3)
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    before = model.calls
+    ask(HumanMessage(content="show me a laptop"))
+    check("expired entry is regenerated", model.calls == before + 1)
+    cache.ttl_seconds = 60
+
+    stats = cached.stats.snapshot()
+    print({k: round(v, 4) if isinstance(v, float) else v for k, v in stats.items()})
+    check("hits are faster than generations", stats["avg_hit_seconds"] < stats["avg_miss_seconds"])
+
+    # Through the sales graph: the same question on a new thread is replayed
+    import graph as g
+    graph_model = FakeLocalChatModel()
+    g.assistant.runnable = g.assistant_prompt | CachedChatModel(
+        graph_model.bind_tools(g.safe_tools + g.sensitive_tools), g.response_cache
+    )
+    for thread in ("t1", "t2"):
+        config = {"configurable": {"thread_id": thread, "customer_id": "cache_check"}}
+        result = g.graph.invoke({"messages": [HumanMessage(content="Hello there")]}, config)
+    check("graph reuses the cached reply across threads", graph_model.calls == 1)
+    check("graph state keeps both messages", len(result["messages"]) == 2)
+
+    # The pizza bot's reply: order results bypass the cache, and follow-ups
+    # for incomplete orders are keyed on the question
+    import pizza_ordering as p
+    pizza_model = FakeLocalChatModel()
+    p.llm.bound = pizza_model
+    p.llm.cache = ResponseCache(os.path.join(TMP, "pizza_cache.db"))
+
+    def reply(question, *results):
+        messages = [ToolMessage(content=content, name=name, tool_call_id=f"call_{i}")
+                    for i, (name, content) in enumerate(results)]
+        state = {"question": question, "customer_name": "Jane Smith", "messages": messages}
+        return p.generate_response(state)["generation"]
+
+    prompt_messages = p.response_chain.first.invoke({
+        "customer_name": "Jane Smith", "messages": [HumanMessage(content="hi")],
+    }).to_messages()
+    check("pizza reply prompt carries the messages", prompt_messages[-1].content == "hi")
+    order = "One pepperoni pizza to 12 Elm St at 7:30 PM"
+    placed = ToolMessage(content="Order created for Jane Smith: Pepperoni Pizza", name="create_order",
+                           tool_call_id="call_0")
+    history = ToolMessage(content="No orders found", name="get_all_orders", tool_call_id="call_1")
+    check("pizza tool results bypass the cache",
+          p.llm._should_bypass([placed]) and p.llm._should_bypass([history]))
+    keys = {
+        p.llm.cache_key(p.response_chain.first.invoke({"customer_name": "Jane Smith", "messages": messages})
+                        .to_messages())
+        for messages in ([HumanMessage(content=order), placed], [HumanMessage(content=order), history])
+    }
+    check("different tool results give different cache keys", len(keys) == 2)
+    before = pizza_model.calls
+    reply(order, ("create_order", "Order created for Jane Smith: Pepperoni Pizza"))
+    reply(order, ("create_order", "Food item Hawaiian Pizza not found"))
+    check("each order reply is generated", pizza_model.calls == before + 2)
+    before = pizza_model.calls
+    first = reply("A pepperoni pizza please")
+    other = reply("Deliver to 12 Elm St at 7 pm")
+    again = reply("a pepperoni pizza please")
+    check("follow-ups differ per question and repeat from the cache",
+          pizza_model.calls == before + 2 and first != other and again == first)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Check the metrics surface end to end and measure its per-event cost.
+
+Drives the graph (scripted LLM, seeded store) through searches, an order
+that is approved and one that is rejected, then validates the Prometheus
+text and JSON snapshot. Exits 1 on the first failed check:
+
+    python benchmarks/check_metrics.py
+"""
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+TMP = tempfile.mkdtemp()
+os.environ["CHECKPOINT_DB"] = os.path.join(TMP, "checkpoints.db")
+os.environ["LLM_CACHE_DB"] = os.path.join(TMP, "llm_cache.db")
+os.environ["SCRIPTED_LLM"] = os.path.join(os.path.dirname(__file__), "sales_script.json")
+
+from langchain_core.messages import HumanMessage
+
+import metrics
+import tools
+from synthetic_data import generate_sales_db
+
+failures = []
+# How long the first order waits for approval
+PAUSE_SECONDS = 0.3
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        failures.append(name)
+
+
+def parse(text):
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+async def conversation(graph):
+    from utils import pending_tool_calls, rejection_messages
+
+    config = {"configurable": {"thread_id": "metrics", "customer_id": "customer-1"}}
+    # Every read refreshes last_access, as a polling front end would
+    graph.checkpointer.touch_interval_seconds = 0
+    for text in ["Show me furniture under $300", "recommend something", "buy product 3"]:
+        await graph.ainvoke({"messages": [HumanMessage(content=text)]}, config)
+    await asyncio.sleep(PAUSE_SECONDS)
+    await graph.aget_state(config)
+    await graph.ainvoke(None, config)
+    graph.invoke({"messages": [HumanMessage(content="buy product 4")]}, config)
+    state = graph.get_state(config)
+    _, pending = pending_tool_calls(state.values["messages"])
+    graph.update_state(config, {"messages": rejection_messages(pending, "no")}, as_node="sensitive_tools")
+    graph.invoke(None, config)
+
+
+def per_event_cost():
+    histogram = metrics.Histogram(metrics.LATENCY_BUCKETS)
+    n = 200_000
+    start = time.perf_counter()
+    for i in range(n):
+        histogram.observe(0.003)
+    observe_ns = (time.perf_counter() - start) / n * 1e9
+
+    path = os.path.join(TMP, "overhead.db")
+    results = {}
+    for label, factory in (("plain", sqlite3.Connection), ("timed", metrics.TimedConnection)):
+        conn = sqlite3.connect(path, factory=factory)
+        conn.execute("CREATE TABLE IF NOT EXISTS t (id INTEGER PRIMARY KEY, v TEXT)")
+        conn.execute("INSERT OR IGNORE INTO t VALUES (1, 'x')")
+        start = time.perf_counter()
+        for _ in range(50_000):
+            conn.execute("SELECT v FROM t WHERE id = ?", (1,)).fetchone()
+        results[label] = (time.perf_counter() - start) / 50_000 * 1e6
+        conn.close()
+    return observe_ns, results
+
+
+def main():
+    generate_sales_db(os.path.join(TMP, "store.db"), 3000)
+    tools.db_manager = tools.DatabaseManager(os.path.join(TMP, "store.db"))
+    import logging
+    logging.disable(logging.INFO)
+    import graph as g
+    g.llm.latency_ms = 5
+    g.llm.tokens_per_second = 0
+
+    asyncio.run(conversation(g.graph))
+
+    text = metrics.REGISTRY.render_prometheus()
+    samples = parse(text)
+    for node in ("assistant", "safe_tools", "sensitive_tools"):
+        check(f"node histogram for {node}", samples.get(f'sales_graph_node_seconds_count{{node="{node}"}}', 0) > 0)
+    for tool in ("search_products", "search_products_recommendations", "create_order"):
+        check(f"tool histogram for {tool}", samples.get(f'sales_tool_seconds_count{{tool="{tool}"}}', 0) > 0)
+    statements = [s for s in samples if s.startswith("sales_sql_statement_seconds_count")]
+    check("SQL statements are labelled", any("FROM products WHERE id IN (?...)" in s for s in statements))
+    check("prompt and completion tokens counted",
+          samples.get('sales_llm_tokens_total{kind="prompt"}', 0) > 0
+          and samples.get('sales_llm_tokens_total{kind="completion"}', 0) > 0)
+    check("tokens/s observed", samples.get("sales_llm_tokens_per_second_count", 0) > 0)
+    check("approval waits observed for approve and reject", samples.get("sales_approval_wait_seconds_count") == 2)
+    check("approval wait counts from the pause, not the last read",
+          samples.get("sales_approval_wait_seconds_sum", 0) >= PAUSE_SECONDS)
+    check("no thread left paused", samples.get("sales_paused_threads") == 0)
+    check("cache collectors exported", 'sales_cache_hit_ratio{cache="tool"}' in samples
+          and 'sales_llm_cache_requests{outcome="miss"}' in samples)
+
+    consistent = True
+    for family in re.findall(r"^# TYPE (\S+) histogram$", text, re.M):
+        for series in [s for s in samples if s.startswith(family + "_count")]:
+            labels = series[len(family + "_count"):]
+            inner = labels[1:-1] + "," if labels else ""
+            buckets = [v for s, v in samples.items() if s.startswith(f"{family}_bucket{{{inner}le=")]
+            consistent &= buckets == sorted(buckets) and buckets[-1] == samples[series]
+    check("buckets are cumulative and end at _count", consistent)
+
+    snapshot = metrics.REGISTRY.snapshot()
+    node = next(s for s in snapshot["sales_graph_node_seconds"]["series"] if s["labels"] == {"node": "assistant"})
+    check("JSON snapshot has percentiles", node["p50"] is not None and node["p50"] <= node["p95"] <= node["p99"])
+
+    observe_ns, per_statement = per_event_cost()
+    print(f"\nhistogram observe: {observe_ns:.0f} ns")
+    print(f"point SELECT: {per_statement['plain']:.2f} us plain, {per_statement['timed']:.2f} us timed "
+          f"(+{per_statement['timed'] - per_statement['plain']:.2f} us)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
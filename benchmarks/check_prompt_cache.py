@@ -0,0 +1,159 @@
+"""Check that the assistant prompt keeps a stable prefix the model server can reuse.
+
+Runs one multi-turn conversation through the sales graph against the local
+Ollama stand-in (ollama_standin.py, real ChatOllama client), first with the
+stable prompt assembly of graph.py and then with the previous prompt, which
+rendered the time into the system message. Prints prompt tokens, reused
+(KV cached) tokens and evaluated tokens per call, then checks that:
+
+- stored messages and the system message carry no timestamp,
+- every call reuses the conversation up to the previous customer message,
+  so the tokens evaluated per call stay flat as the conversation grows,
+- keep_alive pins the model (one load, and keep_alive=0 loses the cache),
+- the prompt-eval metrics match what the server reported.
+
+Exits 1 on the first failed check:
+
+    python benchmarks/check_prompt_cache.py
+"""
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from ollama_standin import StandinModel, serve_in_thread
+
+TMP = tempfile.mkdtemp()
+MODEL = StandinModel(parallel=2, prompt_tokens_per_second=2000, tokens_per_second=500, load_seconds=0.3)
+os.environ["OLLAMA_BASE_URL"] = f"http://127.0.0.1:{serve_in_thread(MODEL)}"
+os.environ["CHECKPOINT_DB"] = os.path.join(TMP, "checkpoints.db")
+os.environ["LLM_CACHE_DB"] = os.path.join(TMP, "llm_cache.db")
+os.environ["FAST_PATH"] = "0"
+os.environ.pop("SCRIPTED_LLM", None)
+os.environ.pop("OLLAMA_KEEP_ALIVE", None)
+
+from langchain_core.messages import HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+import tools
+from bench_db_connections import seed
+from tools import DatabaseManager
+
+TURNS = [
+    "Hi, I'm furnishing a small home office.",
+    "What chairs would you suggest for long workdays?",
+    "Is there something cheaper than that?",
+    "Do you also sell desks that fit a small room?",
+    "Which of those would you pick for a standing setup?",
+    "How long does delivery usually take?",
+    "Can I return a chair if it doesn't fit?",
+    "Thanks, I'll think about it.",
+]
+
+# The assistant prompt before the prefix was made stable: the time is the
+# last line of the system message and changes on every call
+LEGACY_SYSTEM = """You are a helpful sales assistant. Follow these rules:
+1. Always format tool results for readability
+2. Include prices and stock quantities
+3. Use bullet points for product lists
+4. Add emojis for engagement
+
+Tools: {tool_names}
+Current user: {user_info}
+Time: {time}"""
+
+failures = []
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        failures.append(name)
+
+
+def conversation(g, runnable, turns=TURNS):
+    """Standin statistics of each LLM call for one new thread."""
+    MODEL.reset()
+    g.assistant.runnable = runnable
+    config = {"configurable": {"thread_id": str(uuid.uuid4()), "customer_id": "customer-1"}}
+    for text in turns:
+        g.graph.invoke({"messages": [HumanMessage(content=text)]}, config)
+    return list(MODEL.requests), g.graph.get_state(config).values["messages"]
+
+
+def report(label, requests):
+    print(f"\n{label}")
+    print(f"{'call':>4} {'prompt':>7} {'reused':>7} {'evaluated':>10} {'eval ms':>8} {'loaded':>7}")
+    for i, r in enumerate(requests, 1):
+        eval_ms = r["prompt_eval_count"] / MODEL.prompt_tokens_per_second * 1000
+        print(f"{i:4d} {r['prompt_tokens']:7d} {r['reused_tokens']:7d} {r['prompt_eval_count']:10d} "
+              f"{eval_ms:8.1f} {str(r['loaded']):>7}")
+    evaluated = sum(r["prompt_eval_count"] for r in requests)
+    print(f"evaluated {evaluated} of {sum(r['prompt_tokens'] for r in requests)} prompt tokens")
+    return evaluated
+
+
+def eval_series(metrics):
+    series = metrics.REGISTRY.snapshot()["sales_llm_prompt_eval_tokens"]["series"]
+    return series[0] if series else {"count": 0, "sum": 0}
+
+
+def main():
+    seed(os.path.join(TMP, "store.db"), 200)
+    tools.db_manager = DatabaseManager(os.path.join(TMP, "store.db"))
+
+    import logging
+    logging.disable(logging.INFO)
+    import graph as g
+    import metrics
+
+    bound = g.cached_llm.bound
+    before = eval_series(metrics)
+    stable, messages = conversation(g, g.assistant_prompt | bound)
+    after = eval_series(metrics)
+    stable_evaluated = report("stable prefix (graph.assistant_prompt)", stable)
+
+    legacy_prompt = ChatPromptTemplate.from_messages([
+        ("system", LEGACY_SYSTEM), ("placeholder", "{messages}"),
+    ]).partial(time=datetime.now, tool_names=", ".join(t.name for t in g.safe_tools + g.sensitive_tools))
+    legacy, _ = conversation(g, legacy_prompt | bound)
+    legacy_evaluated = report("time in the system message (previous prompt)", legacy)
+
+    print()
+    rendered = g.assistant_prompt.invoke({"messages": messages, "user_info": "customer-1"}).to_messages()
+    last_human = next(m for m in reversed(rendered) if isinstance(m, HumanMessage))
+    check("system message has no timestamp", "Time:" not in rendered[0].content)
+    check("time rides on the latest human message", "[Current time: " in last_human.content)
+    check("stored messages carry no timestamp",
+          not any("[Current time: " in str(m.content) for m in messages))
+    check("one LLM call per turn", len(stable) == len(TURNS))
+    check("keep_alive -1 sent by default", all(r["keep_alive"] == -1 for r in stable))
+    check("model loaded once", [r["loaded"] for r in stable] == [True] + [False] * (len(stable) - 1))
+    check("each call reuses the conversation before the previous customer message",
+          all(r["reused_tokens"] >= previous["history_tokens"] for previous, r in zip(stable, stable[1:])))
+    check("previous prompt re-evaluates that history",
+          all(r["reused_tokens"] < previous["history_tokens"] for previous, r in zip(legacy[1:], legacy[2:])))
+    check("stable prefix: evaluated tokens per call do not grow",
+          stable[-1]["prompt_eval_count"] <= 1.1 * stable[1]["prompt_eval_count"])
+    check("previous prompt: evaluated tokens per call grow",
+          legacy[-1]["prompt_eval_count"] > 1.1 * legacy[1]["prompt_eval_count"])
+    check("stable prefix evaluates fewer tokens in total", stable_evaluated < legacy_evaluated)
+    check("prompt-eval metric counted every call", after["count"] - before["count"] == len(stable))
+    check("prompt-eval metric matches the server", after["sum"] - before["sum"] == stable_evaluated)
+
+    # Without keep_alive the model (and every cached prefix) is unloaded after each call
+    g.llm.keep_alive = 0
+    unpinned, _ = conversation(g, g.assistant_prompt | g.llm.bind_tools(g.safe_tools + g.sensitive_tools), TURNS[:3])
+    check("keep_alive=0 reloads and re-evaluates every call",
+          all(r["loaded"] and r["reused_tokens"] == 0 for r in unpinned))
+
+    print(f"\nprompt tokens evaluated: stable {stable_evaluated}, previous {legacy_evaluated} "
+          f"({1 - stable_evaluated / legacy_evaluated:.0%} fewer)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Fail if any SQL issued by the sales tools scans a table instead of an index.
+
+Every statement the tools execute is captured with a trace callback and run
+through EXPLAIN QUERY PLAN against a seeded database:
+
+    python benchmarks/check_query_plans.py
+"""
+import os
+import re
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import seed
+from tools import DatabaseManager
+
+CONFIG = {"configurable": {"customer_id": "bench_customer"}}
+NEW_CUSTOMER = {"configurable": {"customer_id": "nobody_yet"}}
+
+# A bare "SCAN <table>" (no index) over one of the base tables is a full scan.
+FULL_SCAN = re.compile(r"^SCAN (products|orders|order_items|p|o|oi)\b(?!.*INDEX)")
+
+TOOL_CALLS = [
+    ("get_available_categories", lambda: tools.get_available_categories.func()),
+    ("search_products text", lambda: tools.search_products.func(query="product 12")),
+    ("search_products category", lambda: tools.search_products.func(category="books")),
+    ("search_products category+price",
+     lambda: tools.search_products.func(category="Books", min_price=10, max_price=50)),
+    ("search_products price", lambda: tools.search_products.func(min_price=10, max_price=20)),
+    ("search_products category page 2", lambda: tools.search_products.func(
+        category="books", cursor=tools.search_products.func(category="books")["next_cursor"])),
+    ("search_products text page 2", lambda: tools.search_products.func(
+        query="product", cursor=tools.search_products.func(query="product")["next_cursor"])),
+    ("search_products price desc", lambda: tools.search_products.func(min_price=10, sort="price_desc")),
+    ("create_order", lambda: tools.create_order.func([{"product_id": 1, "quantity": 1}], config=CONFIG)),
+    ("create_order two products", lambda: tools.create_order.func(
+        [{"product_id": 1, "quantity": 1}, {"product_id": 2, "quantity": 2}], config=CONFIG)),
+    ("check_order_status by id", lambda: tools.check_order_status.func("1", config=CONFIG)),
+    ("check_order_status list", lambda: tools.check_order_status.func(None, config=CONFIG)),
+    ("check_order_status list page 2", lambda: tools.check_order_status.func(
+        None, cursor=tools.check_order_status.func(None, limit=1, config=CONFIG)["next_cursor"], config=CONFIG)),
+    ("recommendations history", lambda: tools.search_products_recommendations.func(CONFIG)),
+    ("recommendations popular", lambda: tools.search_products_recommendations.func(NEW_CUSTOMER)),
+]
+
+
+def main():
+    tools.logger.disabled = True
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "plans.db")
+        seed(db_path, 2000)
+        tools.db_manager = DatabaseManager(db_path)
+        conn = tools.db_manager.get_connection()
+        for label, call in TOOL_CALLS:
+            statements = []
+            conn.set_trace_callback(statements.append)
+            call()
+            conn.set_trace_callback(None)
+            for sql in statements:
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                scans = [step for step in plan if FULL_SCAN.match(step)]
+                status = "FAIL" if scans else "ok"
+                failures += bool(scans)
+                print(f"[{status}] {label}: {' | '.join(plan)}")
+        tools.db_manager.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
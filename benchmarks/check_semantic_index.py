@@ -0,0 +1,108 @@
+"""Check that the semantic index is warmed at startup, persisted and kept in step with the catalog.
+
+Seeds a catalog, warms the index the way server.py/main.py do, then checks
+that the index file and change log sequence are saved, that the change log
+is pruned, that a restart restores the file instead of rebuilding, that
+catalog edits after the restart are applied incrementally, and that an
+index older than the pruned log (another process) rebuilds. The
+catalog's query expansions are read from the file next to the database.
+Prints the
+warm-up times and exits 1 on the first failed check:
+
+    python benchmarks/check_semantic_index.py --products 20000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+import tools
+from bench_db_connections import seed
+from semantic_index import SemanticProductIndex
+from tools import DatabaseManager
+
+SAMPLE_EXPANSIONS = os.path.join(os.path.dirname(__file__), "..", "local_store.expansions.json")
+failures = []
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        failures.append(name)
+
+
+def log_rows(conn):
+    return conn.execute("SELECT COUNT(*) FROM product_change_log").fetchone()[0]
+
+
+def warm():
+    started = time.perf_counter()
+    tools.start_semantic_index_warmup().result()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=20000)
+    args = parser.parse_args()
+
+    tools.logger.disabled = True
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "store.db")
+    seed(db_path, args.products)
+    with open(SAMPLE_EXPANSIONS) as f:
+        expansions = json.load(f)
+    with open(os.path.join(tmp, "store.expansions.json"), "w") as f:
+        json.dump({**expansions, "chair": ["chair"]}, f)
+    tools.db_manager = DatabaseManager(db_path)
+    conn = tools.db_manager.get_connection()
+    path = tools.semantic_index_path()
+    check("change log holds the seeded catalog", log_rows(conn) >= args.products)
+
+    build_ms = warm()
+    seq = tools.semantic_index.last_change_seq
+    check("warm-up indexes the catalog", tools.semantic_index.size == args.products)
+    check("index file saved", os.path.exists(path))
+    check("change log pruned", log_rows(conn) == 0)
+    check("expansions loaded with the catalog, minus self-mappings",
+          tools.semantic_index.expansions == expansions)
+    expected = tools.semantic_index.search("product 12 description", 10)
+
+    # Restart: a fresh process loads the file
+    tools.semantic_index = SemanticProductIndex()
+    restore_ms = warm()
+    check("restart restores the saved sequence", tools.semantic_index.last_change_seq == seq)
+    check("restored index answers the same", tools.semantic_index.search("product 12 description", 10) == expected)
+    print(f"warm-up: build {build_ms:.0f} ms, restore {restore_ms:.0f} ms")
+    check("restoring is faster than building", restore_ms < build_ms)
+
+    with conn:
+        conn.execute(
+            "INSERT INTO products (name, category, description, price, quantity) VALUES (?, ?, ?, ?, ?)",
+            ("Ergonomic Office Chair", "Furniture", "mesh chair for long workdays", 199.0, 5),
+        )
+        conn.execute("UPDATE products SET name = 'Walnut Bookshelf' WHERE id = 3")
+    tools.semantic_index.sync(conn)
+    check("edits after the restart are applied", tools.semantic_index.last_change_seq == seq + 2
+          and tools.semantic_index.size == args.products + 1)
+    hits = tools.search_products_semantic.func("something to sit on")["products"]
+    check("new product is searchable", hits and hits[0]["name"] == "Ergonomic Office Chair")
+
+    # Another process persisted and pruned past this index's changes
+    stale = SemanticProductIndex()
+    stale.restore(path)
+    tools.warm_semantic_index()
+    stale.sync(conn)
+    check("index behind the pruned log rebuilds", stale.size == args.products + 1
+          and stale.search("walnut bookshelf", 1)[0][0] == 3)
+
+    tools.db_manager.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
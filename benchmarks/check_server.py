@@ -0,0 +1,198 @@
+"""Exercise the HTTP/SSE server end to end with a stub LLM.
+
+Starts server.make_app on a free local port in-process, then drives it with
+httpx: a streamed turn with a tool call, an order that pauses for approval,
+listing, approving and rejecting interrupts, and the concurrency limits.
+Exits 1 on the first failed check:
+
+    python benchmarks/check_server.py
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+TMP = tempfile.mkdtemp()
+os.environ["CHECKPOINT_DB"] = os.path.join(TMP, "checkpoints.db")
+os.environ["LLM_CACHE_DB"] = os.path.join(TMP, "llm_cache.db")
+
+import httpx
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+import tools
+from bench_db_connections import seed
+from tools import DatabaseManager
+
+failures = []
+
+
+def check(name, condition):
+    print(f"{'ok  ' if condition else 'FAIL'} {name}")
+    if not condition:
+        failures.append(name)
+
+
+class StubLLM(BaseChatModel):
+    """'buy' asks for create_order, 'find' for search_products, 'slow' sleeps; otherwise echoes."""
+
+    delay: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _reply(self, messages):
+        last = messages[-1]
+        if last.type == "tool":
+            return AIMessage(content=f"Result of {last.name}: {str(last.content)[:60]}")
+        text = str(last.content).lower()
+        if "buy" in text:
+            return AIMessage(content="", tool_calls=[{
+                "name": "create_order", "args": {"products": [{"product_id": 1, "quantity": 1}]},
+                "id": f"order_{id(messages)}",
+            }])
+        if "find" in text:
+            return AIMessage(content="", tool_calls=[{
+                "name": "search_products", "args": {"query": "product 12"}, "id": f"find_{id(messages)}",
+            }])
+        return AIMessage(content=f"You said {last.content}")
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        reply = self._reply(messages)
+        if reply.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                for i, c in enumerate(reply.tool_calls)
+            ]))
+            return
+        for word in reply.content.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def main():
+    seed(os.path.join(TMP, "store.db"), 200)
+    tools.db_manager = DatabaseManager(os.path.join(TMP, "store.db"))
+
+    import graph as g
+    from server import make_app
+
+    stub = StubLLM()
+    g.assistant.runnable = g.assistant_prompt | stub
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    app = make_app(g.graph, max_runs=1, queue_timeout=0.2)
+    server = app.listen(port, address="127.0.0.1")
+    base = f"http://127.0.0.1:{port}"
+
+    async with httpx.AsyncClient(base_url=base, timeout=30) as client:
+        thread = (await client.post("/threads", json={"customer_id": "alice"})).json()["thread_id"]
+
+        r = await client.post(f"/threads/{thread}/runs", json={"message": "find me something", "customer_id": "alice"})
+        events = parse_sse(r.text)
+        names = [name for name, _ in events]
+        check("run streams SSE", r.headers["content-type"].startswith("text/event-stream"))
+        check("tool events precede tokens", names.index("tool_start") < names.index("tool_end") < names.index("token"))
+        check("run ends with done", names[-1] == "done" and not events[-1][1]["interrupted"])
+
+        r = await client.post(f"/threads/{thread}/runs?stream=0", json={"message": "buy it", "customer_id": "alice"})
+        body = r.json()
+        check("order pauses for approval", body["interrupted"] and body["pending_tool_calls"][0]["name"] == "create_order")
+
+        r = await client.post(f"/threads/{thread}/runs", json={"message": "hello", "customer_id": "alice"})
+        check("new message while paused is refused", r.status_code == 409)
+        r = await client.post(f"/threads/{thread}/runs", json={"message": "hello", "customer_id": "mallory"})
+        check("other customers cannot post to the thread", r.status_code == 403)
+
+        interrupts = (await client.get("/interrupts")).json()["interrupts"]
+        check("interrupt is listed", [i["thread_id"] for i in interrupts] == [thread]
+              and interrupts[0]["customer_id"] == "alice")
+        # Reads refresh last_access; the reported wait must still start at the pause
+        g.graph.checkpointer.touch_interval_seconds = 0
+        await asyncio.sleep(0.05)
+        await client.get(f"/threads/{thread}?customer_id=alice")
+        polled = (await client.get("/interrupts")).json()["interrupts"]
+        g.graph.checkpointer.touch_interval_seconds = 60
+        check("waiting_since is the pause time", polled[0]["waiting_since"] == interrupts[0]["waiting_since"])
+
+        r = await client.post(f"/threads/{thread}/approve", json={"customer_id": "mallory"})
+        check("other customers cannot approve", r.status_code == 403)
+        r = await client.post(f"/threads/{thread}/reject", json={"customer_id": "mallory", "reason": "no"})
+        check("other customers cannot reject", r.status_code == 403)
+        check("approve needs the customer", (await client.post(f"/threads/{thread}/approve")).status_code == 400)
+
+        events = parse_sse((await client.post(f"/threads/{thread}/approve", json={"customer_id": "alice"})).text)
+        tool_results = [data for name, data in events if name == "tool_end"]
+        check("approve runs create_order", tool_results and "order_id" in tool_results[0].get("artifact", {}))
+        check("model sees the compact result", tool_results and tool_results[0]["content"].startswith("order_id: "))
+        check("no interrupts left", (await client.get("/interrupts")).json()["interrupts"] == [])
+
+        other = (await client.post("/threads", json={"customer_id": "bob"})).json()["thread_id"]
+        await client.post(f"/threads/{other}/runs?stream=0", json={"message": "buy", "customer_id": "bob"})
+        # Two reviewers answering the same interrupt: only one decision resumes it
+        stub.delay = 0.3
+        reject = asyncio.create_task(
+            client.post(f"/threads/{other}/reject?stream=0", json={"customer_id": "bob", "reason": "out of budget"})
+        )
+        await asyncio.sleep(0.1)
+        second = await client.post(f"/threads/{other}/approve?stream=0", json={"customer_id": "bob"})
+        first = await reject
+        stub.delay = 0
+        check("concurrent decision on one interrupt is refused", sorted([first.status_code, second.status_code]) == [200, 409])
+        body = first.json()
+        check("reject answers the call and resumes", "Rejected by reviewer: out of budget" in body["messages"][-1]["content"])
+        r = await client.get(f"/threads/{other}", params={"customer_id": "bob"})
+        state = r.json()
+        check("rejected thread is idle", state["next"] == [] and state["customer_id"] == "bob")
+        check("other customers cannot read the thread",
+              (await client.get(f"/threads/{other}", params={"customer_id": "alice"})).status_code == 403)
+
+        check("unknown thread is 404",
+              (await client.get("/threads/nope", params={"customer_id": "alice"})).status_code == 404)
+        r = await client.post(f"/threads/{other}/approve", json={"customer_id": "bob"})
+        check("approve without interrupt is 409", r.status_code == 409)
+
+        stub.delay = 0.5
+        slow = asyncio.create_task(client.post(f"/threads/{thread}/runs?stream=0", json={"message": "slow", "customer_id": "alice"}))
+        await asyncio.sleep(0.1)
+        busy = await client.post(f"/threads/{other}/runs?stream=0", json={"message": "hi", "customer_id": "bob"})
+        check("run over max_runs gets 503 after queue timeout", busy.status_code == 503)
+        same = await client.post(f"/threads/{thread}/runs?stream=0", json={"message": "hi", "customer_id": "alice"})
+        check("second run on a busy thread gets 409", same.status_code == 409)
+        check("slow run completes", (await slow).status_code == 200)
+        health = (await client.get("/health")).json()
+        check("limiter is released", health["active_runs"] == 0)
+
+        r = await client.get("/metrics")
+        check("Prometheus metrics", r.headers["content-type"].startswith("text/plain")
+              and 'sales_graph_node_seconds_count{node="assistant"}' in r.text)
+        snapshot = (await client.get("/metrics.json")).json()
+        check("JSON metrics snapshot", snapshot["sales_approval_wait_seconds"]["series"][0]["count"] == 2)
+
+    server.stop()
+    await server.close_all_connections()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
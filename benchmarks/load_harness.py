@@ -0,0 +1,313 @@
+"""Concurrent conversational load on the full sales graph with a scripted LLM.
+
+Runs graph.py with SCRIPTED_LLM pointing at ``--script`` (see
+scripted_llm.py), so the real prompt, history, tool, checkpoint and approval
+paths all execute while the model is a deterministic stand-in with
+``--llm-ms`` time to first token, prompt evaluation at
+``--prompt-tokens-per-second`` and ``--tokens-per-second`` output. Each of
+``--customers`` concurrent customers holds ``--turns`` turns on its own
+thread; messages are drawn from the quoted questions in ques.txt, the titles
+in requests.jsonl (when present) and, with probability ``--order-rate``,
+"buy product N" orders. Orders pause at sensitive_tools; after
+``--approval-ms`` the reviewer approves, or rejects with probability
+``--reject-rate``, and the run resumes.
+
+Reports turns/s, turn latency (reviewer wait excluded), a per-node /
+per-tool / LLM latency breakdown, checkpointer time and peak memory:
+
+    python benchmarks/load_harness.py --customers 100 --turns 5 --llm-ms 300 --output load.json
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def load_prompts(paths: List[str]) -> List[str]:
+    """Quoted questions from text files and title/message fields from JSONL files."""
+    prompts = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path) as f:
+            if path.endswith(".jsonl"):
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        text = next((entry[k] for k in ("message", "prompt", "question", "title") if entry.get(k)), None)
+                        if text:
+                            prompts.append(text)
+            else:
+                prompts.extend(re.findall(r'"([^"]+)"', f.read()))
+    return prompts
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    if len(samples_ms) < 2:
+        samples_ms = samples_ms * 2 or [0.0, 0.0]
+    cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3),
+        "p50_ms": round(cuts[49], 3),
+        "p95_ms": round(cuts[94], 3),
+        "p99_ms": round(cuts[98], 3),
+        "total_ms": round(sum(samples_ms), 3),
+    }
+
+
+class LatencyRecorder(BaseCallbackHandler):
+    """Durations of graph nodes, tool calls and LLM generations, from callbacks."""
+
+    run_inline = True
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._started: Dict[Any, tuple] = {}
+
+    def _start(self, run_id, key):
+        self._started[run_id] = (key, time.perf_counter())
+
+    def _end(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started:
+            key, at = started
+            self.samples[key].append((time.perf_counter() - at) * 1000)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, tags=None, metadata=None, **kwargs):
+        # Node runs are the ones LangGraph tags with their superstep
+        if any(tag.startswith("graph:step:") for tag in tags or []):
+            self._start(run_id, f"node:{kwargs.get('name')}")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        self._start(run_id, f"tool:{kwargs.get('name') or serialized.get('name')}")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+
+def time_checkpointer(saver, samples: Dict[str, List[float]]) -> None:
+    """Wrap the saver's sync entry points (the async ones delegate to them) with timers."""
+    for name in ("get_tuple", "put", "put_writes"):
+        method = getattr(saver, name)
+
+        @functools.wraps(method)
+        def timed(*args, _method=method, _name=name, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _method(*args, **kwargs)
+            finally:
+                samples[_name].append((time.perf_counter() - start) * 1000)
+
+        setattr(saver, name, timed)
+
+
+async def customer(graph, index, args, prompts, recorder, stats):
+    from utils import pending_tool_calls, rejection_messages
+
+    rng = random.Random(args.seed * 1_000_003 + index)
+    config = {
+        "configurable": {"thread_id": f"load-{index}", "customer_id": f"customer-{index % args.customer_pool}"},
+        "callbacks": [recorder],
+    }
+    for _ in range(args.turns):
+        if rng.random() < args.order_rate:
+            text = f"I'd like to buy product {rng.randint(1, args.products)}, please"
+        else:
+            text = rng.choice(prompts)
+        inputs = {"messages": [HumanMessage(content=text)], "user_info": config["configurable"]["customer_id"]}
+        busy_ms = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                await graph.ainvoke(inputs, config)
+                busy_ms += (time.perf_counter() - start) * 1000
+                stats["runs"] += 1
+                state = await graph.aget_state(config)
+                if not state.next:
+                    break
+                # A human reviewer takes a while to look at the order
+                await asyncio.sleep(args.approval_ms / 1000)
+                if rng.random() < args.reject_rate:
+                    _, pending = pending_tool_calls(state.values["messages"])
+                    await graph.aupdate_state(
+                        config, {"messages": rejection_messages(pending, "load test")}, as_node="sensitive_tools"
+                    )
+                    stats["rejected"] += 1
+                else:
+                    stats["approved"] += 1
+                inputs = None
+        except Exception as e:
+            stats["errors"].append(f"{type(e).__name__}: {e}")
+            continue
+        stats["turn_ms"].append(busy_ms)
+
+
+async def run_load(graph, args, prompts, recorder, stats):
+    start = time.perf_counter()
+    await asyncio.gather(*(customer(graph, i, args, prompts, recorder, stats) for i in range(args.customers)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--customers", type=int, default=50, help="concurrent conversations")
+    parser.add_argument("--turns", type=int, default=5, help="customer messages per conversation")
+    parser.add_argument("--customer-pool", type=int, default=1000, help="distinct customer ids")
+    parser.add_argument("--script", default=os.path.join(os.path.dirname(__file__), "sales_script.json"))
+    parser.add_argument("--prompts", nargs="*", default=[os.path.join(ROOT, "ques.txt"), os.path.join(ROOT, "requests.jsonl")])
+    parser.add_argument("--llm-ms", type=float, help="time to first token; default from the script")
+    parser.add_argument("--tokens-per-second", type=float, help="default from the script")
+    parser.add_argument("--prompt-tokens-per-second", type=float, help="prompt evaluation rate; default from the script")
+    parser.add_argument("--tool-format", choices=["compact", "json"], default="compact",
+                        help="tool result encoding (TOOL_RESULT_FORMAT)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="generations in flight (LLM_CONCURRENCY)")
+    parser.add_argument("--llm-cache", action="store_true", help="keep the LLM response cache in front of the model")
+    parser.add_argument("--order-rate", type=float, default=0.2)
+    parser.add_argument("--reject-rate", type=float, default=0.25)
+    parser.add_argument("--approval-ms", type=float, default=500)
+    parser.add_argument("--rows", type=int, default=30_000, help="synthetic order lines in the store")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--output", help="write the report as JSON")
+    args = parser.parse_args()
+
+    prompts = load_prompts(args.prompts)
+    if not prompts:
+        parser.error("no prompts found in " + ", ".join(args.prompts))
+
+    tmp = tempfile.mkdtemp()
+    os.environ["CHECKPOINT_DB"] = os.path.join(tmp, "checkpoints.db")
+    os.environ["LLM_CACHE_DB"] = os.path.join(tmp, "llm_cache.db")
+    os.environ["LLM_CONCURRENCY"] = str(args.llm_concurrency)
+    os.environ["SCRIPTED_LLM"] = args.script
+    os.environ["TOOL_RESULT_FORMAT"] = args.tool_format
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import tools
+    from synthetic_data import generate_sales_db, sales_counts
+
+    generate_sales_db(os.path.join(tmp, "store.db"), args.rows, args.seed)
+    args.products = sales_counts(args.rows)["products"]
+    tools.db_manager = tools.DatabaseManager(os.path.join(tmp, "store.db"))
+    conn = tools.db_manager.get_connection()
+    seeded_orders = conn.execute("SELECT MAX(id) FROM orders").fetchone()[0]
+
+    import graph as g
+
+    if args.llm_ms is not None:
+        g.llm.latency_ms = args.llm_ms
+    if args.tokens_per_second is not None:
+        g.llm.tokens_per_second = args.tokens_per_second
+    if args.prompt_tokens_per_second is not None:
+        g.llm.prompt_tokens_per_second = args.prompt_tokens_per_second
+    if not args.llm_cache:
+        # Every prompt reaches the (scripted) model, as with unique real conversations
+        g.assistant.runnable = g.assistant_prompt | g.cached_llm.bound
+
+    recorder = LatencyRecorder()
+    checkpoint_ms: Dict[str, List[float]] = defaultdict(list)
+    time_checkpointer(g.memory, checkpoint_ms)
+    stats = {"runs": 0, "approved": 0, "rejected": 0, "errors": [], "turn_ms": []}
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if args.tracemalloc:
+        tracemalloc.start()
+    seconds = asyncio.run(run_load(g.graph, args, prompts, recorder, stats))
+    heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    turns = len(stats["turn_ms"])
+    run_ms = sum(stats["turn_ms"])
+    checkpoint_total = sum(sum(v) for v in checkpoint_ms.values())
+    placed = conn.execute("SELECT COUNT(*) FROM orders WHERE id > ?", (seeded_orders,)).fetchone()[0]
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("prompts",)},
+        "prompts": len(prompts),
+        "seconds": round(seconds, 3),
+        "turns": turns,
+        "turns_per_second": round(turns / seconds, 2),
+        "graph_runs": stats["runs"],
+        "approved": stats["approved"],
+        "rejected": stats["rejected"],
+        "orders_placed": placed,
+        "errors": stats["errors"][:20],
+        "error_count": len(stats["errors"]),
+        "turn_latency": summarize(stats["turn_ms"]),
+        "breakdown": {key: summarize(samples) for key, samples in sorted(recorder.samples.items())},
+        "checkpointer": {
+            **{name: summarize(samples) for name, samples in checkpoint_ms.items()},
+            "share_of_run_time": round(checkpoint_total / run_ms, 4) if run_ms else None,
+        },
+        "memory": {
+            "peak_rss_mb": round(rss_peak / 1024, 1),
+            "rss_growth_mb": round((rss_peak - rss_before) / 1024, 1),
+            "peak_python_heap_mb": round(heap_peak / 2**20, 1) if heap_peak is not None else None,
+        },
+    }
+
+    print(f"{args.customers} customers x {args.turns} turns, {g.llm.latency_ms:.0f}ms to first token "
+          f"+ prompt at {g.llm.prompt_tokens_per_second:.0f} tokens/s, {g.llm.tokens_per_second:.0f} tokens/s, "
+          f"{args.llm_concurrency} generations in flight, {args.tool_format} tool results")
+    print(f"{turns} turns in {seconds:.2f}s: {report['turns_per_second']} turns/s, "
+          f"{stats['runs']} graph runs, {stats['approved']} approved ({placed} placed) / {stats['rejected']} rejected orders, "
+          f"{len(stats['errors'])} errors")
+    latency = report["turn_latency"]
+    print(f"turn latency p50 {latency['p50_ms']:.0f}ms  p95 {latency['p95_ms']:.0f}ms  p99 {latency['p99_ms']:.0f}ms")
+    print(f"\n{'':34} {'count':>7} {'mean ms':>9} {'p95 ms':>9} {'total s':>9}")
+    for key, row in list(report["breakdown"].items()) + [
+        (f"checkpoint:{name}", row) for name, row in report["checkpointer"].items() if isinstance(row, dict)
+    ]:
+        print(f"{key:34} {row['count']:7d} {row['mean_ms']:9.2f} {row['p95_ms']:9.2f} {row['total_ms'] / 1000:9.2f}")
+    print(f"\ncheckpointer share of run time: {report['checkpointer']['share_of_run_time']:.2%}")
+    memory = report["memory"]
+    print(f"peak RSS {memory['peak_rss_mb']} MB (+{memory['rss_growth_mb']} MB during the load)"
+          + (f", peak Python heap {memory['peak_python_heap_mb']} MB" if heap_peak is not None else ""))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if stats["errors"]:
+        print("first error:", stats["errors"][0])
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
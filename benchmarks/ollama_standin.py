@@ -0,0 +1,254 @@
+"""Local stand-in for Ollama's /api/chat that models prompt (KV) cache reuse.
+
+Prompts are rendered the way Ollama's llama3.2 template does (all system
+messages joined into one block at the top, tool schemas inside the last
+user message) and split into word and punctuation tokens. Like llama.cpp,
+the server has ``parallel`` slots; a request takes the idle slot whose
+cached tokens (previous prompt + reply) share the longest prefix with its
+prompt. It only evaluates the rest, at ``prompt_tokens_per_second``, and
+reports ``prompt_eval_count``/``prompt_eval_duration`` like Ollama does.
+
+``keep_alive`` is honoured: once it expires the model is unloaded with its
+slots, and the next request pays ``load_seconds`` and a full evaluation.
+Replies are short plain text, streamed as NDJSON:
+
+    python benchmarks/ollama_standin.py --port 11434
+"""
+import argparse
+import asyncio
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import tornado.httpserver
+import tornado.netutil
+import tornado.web
+
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+_DURATION = re.compile(r"(-?\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+DEFAULT_KEEP_ALIVE = 300.0
+
+
+def keep_alive_seconds(value: Any) -> float:
+    """Ollama's keep_alive: seconds as a number or a Go duration ("5m", "1h30m"); negative keeps the model loaded."""
+    if value is None or value == "":
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    elif re.fullmatch(r"-?\d+(\.\d+)?", value):
+        seconds = float(value)
+    else:
+        seconds = sum(float(n) * _UNITS[unit] for n, unit in _DURATION.findall(value))
+    return float("inf") if seconds < 0 else seconds
+
+
+def render(messages: List[Dict[str, Any]], tools: Optional[List[Dict[str, Any]]]) -> List[str]:
+    """Tokens of the llama3.2 chat template for ``messages``, up to the assistant header.
+
+    As in that template, tool schemas are only rendered into the user
+    message when it is the last message, so they never become part of a
+    reusable prefix.
+    """
+    system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+    parts = [f"<|system|>{system}<|eot|>"]
+    others = [m for m in messages if m["role"] != "system"]
+    for i, message in enumerate(others):
+        content = message.get("content") or ""
+        if message["role"] == "user" and tools and i == len(others) - 1:
+            content = json.dumps(tools, sort_keys=True) + "\n" + content
+        if message.get("tool_calls"):
+            content += json.dumps([call["function"] for call in message["tool_calls"]], sort_keys=True)
+        parts.append(f"<|{message['role']}|>{content}<|eot|>")
+    parts.append("<|assistant|>")
+    return _TOKEN.findall("".join(parts))
+
+
+def _last_user(messages: List[Dict[str, Any]]) -> int:
+    return max((i for i, m in enumerate(messages) if m["role"] == "user"), default=len(messages))
+
+
+def common_prefix(a: List[str], b: List[str]) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class Slot:
+    __slots__ = ("tokens", "busy")
+
+    def __init__(self):
+        self.tokens: List[str] = []
+        self.busy = False
+
+
+class StandinModel:
+    """Slots, load state and per-request statistics of the simulated server."""
+
+    def __init__(self, parallel: int = 4, prompt_tokens_per_second: float = 2000, tokens_per_second: float = 200,
+                 load_seconds: float = 0.5):
+        self.parallel = parallel
+        self.prompt_tokens_per_second = prompt_tokens_per_second
+        self.tokens_per_second = tokens_per_second
+        self.load_seconds = load_seconds
+        self.reset()
+
+    def reset(self):
+        self.slots = [Slot() for _ in range(self.parallel)]
+        self.loaded_until = 0.0
+        self.requests: List[Dict[str, Any]] = []
+        self._free: Optional[asyncio.Condition] = None
+
+    async def _acquire(self, prompt: List[str]) -> Slot:
+        if self._free is None:
+            self._free = asyncio.Condition()
+        async with self._free:
+            while True:
+                idle = [slot for slot in self.slots if not slot.busy]
+                if idle:
+                    slot = max(idle, key=lambda s: common_prefix(s.tokens, prompt))
+                    slot.busy = True
+                    return slot
+                await self._free.wait()
+
+    async def _release(self, slot: Slot):
+        async with self._free:
+            slot.busy = False
+            self._free.notify()
+
+    async def chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one request; returns the reply text and Ollama's timing fields."""
+        started = time.perf_counter()
+        load = 0.0
+        if time.monotonic() > self.loaded_until:
+            # Unloaded (first request or keep_alive expired): weights and every slot's cache are gone
+            for slot in self.slots:
+                slot.tokens = []
+            load = self.load_seconds
+            await asyncio.sleep(load)
+
+        prompt = render(body["messages"], body.get("tools"))
+        slot = await self._acquire(prompt)
+        try:
+            reused = common_prefix(slot.tokens, prompt)
+            evaluated = len(prompt) - reused
+            prompt_seconds = evaluated / self.prompt_tokens_per_second
+            await asyncio.sleep(prompt_seconds)
+            question = next((m["content"] for m in reversed(body["messages"]) if m["role"] == "user"), "")
+            words = " ".join(question.splitlines()[0].split()[:8]) if question else ""
+            content = f"Here is what I found for: {words}. Anything else?"
+            reply = _TOKEN.findall(content)
+            eval_seconds = len(reply) / self.tokens_per_second
+            await asyncio.sleep(eval_seconds)
+            slot.tokens = prompt + reply + ["<|eot|>"]
+        finally:
+            await self._release(slot)
+        self.loaded_until = time.monotonic() + keep_alive_seconds(body.get("keep_alive"))
+
+        self.requests.append({
+            "prompt_tokens": len(prompt),
+            # Everything before the latest user message: what the next call could reuse at best
+            "history_tokens": len(render(body["messages"][:_last_user(body["messages"])], None)) - 1,
+            "reused_tokens": reused,
+            "prompt_eval_count": evaluated,
+            "keep_alive": body.get("keep_alive"),
+            "loaded": bool(load),
+        })
+        return {
+            "content": content,
+            "total_duration": int((time.perf_counter() - started) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": evaluated,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": len(reply),
+            "eval_duration": int(eval_seconds * 1e9),
+        }
+
+
+class ChatHandler(tornado.web.RequestHandler):
+    def initialize(self, model: StandinModel):
+        self.model = model
+
+    async def post(self):
+        body = json.loads(self.request.body)
+        result = await self.model.chat(body)
+        base = {"model": body.get("model", ""), "created_at": datetime.now(timezone.utc).isoformat()}
+        final = {
+            **base,
+            "message": {"role": "assistant", "content": "" if body.get("stream", True) else result["content"]},
+            "done": True,
+            "done_reason": "stop",
+            **{k: v for k, v in result.items() if k != "content"},
+        }
+        if not body.get("stream", True):
+            self.set_header("Content-Type", "application/json")
+            self.write(json.dumps(final))
+            return
+        self.set_header("Content-Type", "application/x-ndjson")
+        for word in re.findall(r"\S+\s*", result["content"]):
+            self.write(json.dumps({**base, "message": {"role": "assistant", "content": word}, "done": False}) + "\n")
+        self.write(json.dumps(final) + "\n")
+
+
+class StatsHandler(tornado.web.RequestHandler):
+    def initialize(self, model: StandinModel):
+        self.model = model
+
+    def get(self):
+        self.write({"requests": self.model.requests})
+
+    def delete(self):
+        self.model.reset()
+
+
+def make_app(model: StandinModel) -> tornado.web.Application:
+    return tornado.web.Application([
+        (r"/api/chat", ChatHandler, {"model": model}),
+        (r"/stats", StatsHandler, {"model": model}),
+    ])
+
+
+def serve_in_thread(model: StandinModel, port: int = 0) -> int:
+    """Start the stand-in on a background event loop; returns the bound port."""
+    ready = threading.Event()
+    bound = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        sockets = tornado.netutil.bind_sockets(port, "127.0.0.1")
+        tornado.httpserver.HTTPServer(make_app(model)).add_sockets(sockets)
+        bound["port"] = sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="ollama-standin", daemon=True).start()
+    ready.wait()
+    return bound["port"]
+
+
+async def serve(args):
+    model = StandinModel(args.parallel, args.prompt_tokens_per_second, args.tokens_per_second, args.load_seconds)
+    make_app(model).listen(args.port, address=args.host)
+    print(f"Ollama stand-in on http://{args.host}:{args.port}")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--parallel", type=int, default=4, help="KV cache slots (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--prompt-tokens-per-second", type=float, default=2000)
+    parser.add_argument("--tokens-per-second", type=float, default=200)
+    parser.add_argument("--load-seconds", type=float, default=0.5)
+    asyncio.run(serve(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Deterministic synthetic data for the sales store and the food-ordering bot.
+
+The same ``seed`` and row count always produce the same database, so runs on
+two commits measure the same data. ``rows`` is the approximate number of
+order line items (three per order on average); catalog, customer and order
+counts are derived from it:
+
+    python benchmarks/synthetic_data.py --scale 1m --out /tmp/bench-data
+
+Scales: 10k, 1m and 10m order lines, or any integer via ``--rows``.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Tuple
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "virtual_sales_agent")))
+
+from migrations import migrate
+from recommender import create_recommendation_tables
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+CATEGORIES = ["Electronics", "Furniture", "Books", "Toys", "Garden", "Sports", "Kitchen", "Clothing"]
+ADJECTIVES = [
+    "compact", "wireless", "ergonomic", "vintage", "portable", "smart", "organic", "heavy-duty",
+    "foldable", "premium", "classic", "rechargeable", "waterproof", "handmade", "modular", "quiet",
+]
+NOUNS = {
+    "Electronics": ["laptop", "headphones", "speaker", "monitor", "keyboard", "camera", "charger"],
+    "Furniture": ["chair", "desk", "shelf", "sofa", "lamp", "cabinet", "stool"],
+    "Books": ["novel", "cookbook", "atlas", "biography", "notebook", "guide", "anthology"],
+    "Toys": ["puzzle", "robot", "blocks", "kite", "doll", "train set", "board game"],
+    "Garden": ["hose", "planter", "trowel", "sprinkler", "rake", "seed kit", "wheelbarrow"],
+    "Sports": ["racket", "yoga mat", "dumbbell", "helmet", "ball", "bike pump", "tent"],
+    "Kitchen": ["kettle", "blender", "pan", "knife set", "toaster", "grinder", "teapot"],
+    "Clothing": ["jacket", "scarf", "boots", "sweater", "cap", "raincoat", "gloves"],
+}
+FOODS = {
+    "Pizza": ["Margherita", "Pepperoni", "BBQ Chicken", "Vegetarian", "Hawaiian", "Four Cheese", "Diavola"],
+    "Sides": ["Garlic Bread", "Wings", "Fries", "Salad", "Mozzarella Sticks", "Onion Rings"],
+    "Drinks": ["Coca-Cola", "Lemonade", "Iced Tea", "Sparkling Water", "Orange Juice"],
+    "Desserts": ["Tiramisu", "Brownie", "Cheesecake", "Gelato", "Cannoli"],
+}
+STATUSES = ["pending", "pending", "shipped", "delivered", "delivered", "delivered", "cancelled"]
+STREETS = ["Main St", "Oak Ave", "Pine Rd", "Maple Dr", "Cedar Ln", "Elm St", "Lake Blvd"]
+START_DATE = datetime(2024, 1, 1)
+CHUNK = 50_000
+
+
+def sales_counts(rows: int) -> Dict[str, int]:
+    """Row counts for the sales store with ``rows`` order lines (three lines per order on average)."""
+    return {
+        "products": max(100, rows // 10),
+        "customers": max(10, rows // 30),
+        "orders": max(1, rows // 3),
+    }
+
+
+def food_counts(rows: int) -> Dict[str, int]:
+    return {
+        "food_items": max(20, min(rows // 500, 5000)),
+        "customers": max(10, rows // 30),
+        "orders": rows,
+    }
+
+
+def customer_id(i: int) -> str:
+    return f"customer-{i}"
+
+
+def customer_name(i: int) -> str:
+    return f"Customer {i}"
+
+
+def _skewed(rng: random.Random, n: int) -> int:
+    """0..n-1, with low indexes far more likely (a few best sellers, a long tail)."""
+    return min(n - 1, int(n * rng.random() ** 3))
+
+
+def _chunks(rows: Iterator[Tuple], size: int = CHUNK) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _bulk_connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    # Loading is a one-off; durability comes from the final commit
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    return conn
+
+
+def _products(rng: random.Random, n: int) -> Iterator[Tuple]:
+    for i in range(n):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS[category])
+        yield (
+            f"{adjective.title()} {noun} {i}",
+            category,
+            f"A {adjective} {noun} for everyday use, model {i}",
+            round(rng.uniform(2, 1500), 2),
+            rng.randint(1_000, 1_000_000),
+        )
+
+
+def _orders(rng: random.Random, counts: Dict[str, int]) -> Iterator[Tuple[Tuple, list]]:
+    """(order row, line items) pairs, one to six distinct products per order."""
+    for order_id in range(1, counts["orders"] + 1):
+        lines = round(rng.triangular(1, 6, 2))
+        order = (
+            customer_id(_skewed(rng, counts["customers"])),
+            (START_DATE + timedelta(minutes=order_id * 7)).isoformat(),
+            rng.choice(STATUSES),
+        )
+        items = {}
+        while len(items) < lines:
+            product_id = _skewed(rng, counts["products"]) + 1
+            items[product_id] = (order_id, product_id, rng.randint(1, 4), round(rng.uniform(2, 1500), 2))
+        yield order, list(items.values())
+
+
+def generate_sales_db(path: str, rows: int, seed: int = 0) -> Dict[str, int]:
+    """Create the sales store at ``path`` with the current schema and ``rows`` order lines."""
+    rng = random.Random(seed)
+    counts = sales_counts(rows)
+    conn = _bulk_connect(path)
+    migrate(conn)
+
+    for chunk in _chunks(_products(rng, counts["products"])):
+        conn.executemany(
+            "INSERT INTO products (name, category, description, price, quantity) VALUES (?, ?, ?, ?, ?)", chunk
+        )
+    for chunk in _chunks(_orders(rng, counts)):
+        conn.executemany("INSERT INTO orders (customer_id, order_date, status) VALUES (?, ?, ?)",
+                         [order for order, _ in chunk])
+        conn.executemany(
+            "INSERT INTO order_items (order_id, product_id, quantity, unit_price) VALUES (?, ?, ?, ?)",
+            [item for _, items in chunk for item in items],
+        )
+    conn.commit()
+
+    # The recommendation tables are maintained by create_order; rebuild them from the bulk load
+    conn.executescript(
+        "DELETE FROM product_copurchase; DELETE FROM product_popularity; DELETE FROM customer_category_affinity;"
+    )
+    create_recommendation_tables(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    return counts
+
+
+def generate_food_db(path: str, rows: int, seed: int = 0) -> Dict[str, int]:
+    """Create the food-ordering database at ``path`` with ``rows`` orders.
+
+    The schema is the union of setup_db.py and pizza_ordering.py, so both
+    order_food.py and pizza_ordering.py can query it.
+    """
+    rng = random.Random(seed)
+    counts = food_counts(rows)
+    conn = _bulk_connect(path)
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS food_items (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            price REAL NOT NULL,
+            category TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS customers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS orders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            customer_id INTEGER,
+            food_item_id INTEGER,
+            order_date TEXT,
+            delivery_address TEXT,
+            FOREIGN KEY (customer_id) REFERENCES customers(id),
+            FOREIGN KEY (food_item_id) REFERENCES food_items(id)
+        );
+    """)
+    menu = [(category, name) for category, names in FOODS.items() for name in names]
+    conn.executemany(
+        "INSERT INTO food_items (name, price, category) VALUES (?, ?, ?)",
+        [
+            (name if i < len(menu) else f"{name} #{i // len(menu)}", round(rng.uniform(1.5, 25), 2), category)
+            for i, (category, name) in ((i, menu[i % len(menu)]) for i in range(counts["food_items"]))
+        ],
+    )
+    conn.executemany("INSERT INTO customers (name) VALUES (?)",
+                     ((customer_name(i),) for i in range(counts["customers"])))
+
+    def orders():
+        for i in range(counts["orders"]):
+            customer = _skewed(rng, counts["customers"]) + 1
+            yield (
+                customer,
+                _skewed(rng, counts["food_items"]) + 1,
+                (START_DATE + timedelta(minutes=i * 3)).isoformat(),
+                f"{100 + customer % 900} {STREETS[customer % len(STREETS)]}",
+            )
+
+    for chunk in _chunks(orders()):
+        conn.executemany(
+            "INSERT INTO orders (customer_id, food_item_id, order_date, delivery_address) VALUES (?, ?, ?, ?)",
+            chunk,
+        )
+    conn.commit()
+    conn.close()
+    return counts
+
+
+def dataset(out_dir: str, rows: int, seed: int = 0) -> Tuple[str, str]:
+    """Paths of the sales and food databases for (rows, seed), generating them on first use."""
+    os.makedirs(out_dir, exist_ok=True)
+    sales_path = os.path.join(out_dir, f"sales-{rows}-{seed}.db")
+    food_path = os.path.join(out_dir, f"food-{rows}-{seed}.db")
+    for path, generate in ((sales_path, generate_sales_db), (food_path, generate_food_db)):
+        if os.path.exists(path):
+            continue
+        # Build under a temporary name so an interrupted run is never reused
+        partial = path + ".partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+        start = time.perf_counter()
+        counts = generate(partial, rows, seed)
+        os.replace(partial, path)
+        print(f"generated {os.path.basename(path)} in {time.perf_counter() - start:.1f}s: {counts}")
+    return sales_path, food_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--rows", type=int, help="order lines; overrides --scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench-data")
+    args = parser.parse_args()
+    for path in dataset(args.out, args.rows or SCALES[args.scale], args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,6 @@ from langchain.tools import Tool
 from langchain_community.llms import Ollama
 from langchain.agents import initialize_agent, AgentType
 from langchain.memory import ConversationBufferMemory
-from langgraph.graph import StateGraph, END
 
 # Load Ollama Model
 llm = Ollama(model="llama3:latest")
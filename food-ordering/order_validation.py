@@ -0,0 +1,166 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+YES, NO = "Yes", "No"
+
+# Words that describe a dish without naming a menu item: "a large pizza"
+# is food, but the rules cannot tell which one, so the LLM decides
+GENERIC_FOOD = {
+    "pizza", "pie", "slice", "calzone", "pasta", "wing", "burger", "salad", "sandwich",
+    "drink", "soda", "side", "dessert", "food", "meal",
+}
+DESCRIPTORS = {"extra", "large", "medium", "small", "xl", "regular", "family", "personal", "size", "sized", "ml"}
+ALIASES = {"veggie": "vegetarian", "veg": "vegetarian", "coke": "cola", "pepperonis": "pepperoni"}
+
+_STREET_SUFFIX = (
+    r"(?:street|st|avenue|ave|road|rd|boulevard|blvd|lane|ln|drive|dr|way|court|ct|place|pl|terrace|"
+    r"parkway|pkwy|highway|hwy|circle|cir|square|sq|alley|trail|crescent|close|row)"
+)
+# Number, one to four street name words, suffix ("123 Main St", "42 W 5th Avenue").
+# A lookahead, so a match starting at a quantity ("2 pizzas to 12 Elm St")
+# does not hide the real one.
+_STREET = re.compile(r"(?=\b(\d{1,6}[a-z]?)((?:\s+[a-z0-9'.-]+){1,4}?)\s+" + _STREET_SUFFIX + r"\b)")
+# A number after a delivery preposition but no street suffix ("to 221b Baker")
+_NUMBERED_PLACE = re.compile(r"\b(?:to|at|address(?: is)?|deliver(?:ed|y)? to)\s+(\d{1,6}[a-z]?)\s+([a-z]+)")
+# Words that never name a street (besides food words and the menu)
+_NOT_STREET = {
+    "to", "at", "for", "and", "please", "by", "of", "on", "around", "with", "a", "the",
+    "am", "pm", "min", "minute", "hour", "tonight", "today",
+}
+
+# "7:30 pm", "7pm", "730pm", "7 p.m.", "19:30"
+_TIME_12H = re.compile(r"\b(1[0-2]|0?[1-9]):?([0-5]\d)?\s*([ap])\.?\s?m\b\.?")
+_TIME_24H = re.compile(r"\b([01]?\d|2[0-3]):([0-5]\d)\b")
+_BARE_HOUR = re.compile(r"\b(?:at|around|by|for)\s+(\d{1,2})\b(?!\s*(?::|[ap]\.?\s?m\b))")
+# Spoken or relative times the rules do not convert ("seven thirty", "in 30 minutes", "noon")
+_SPOKEN_TIME = re.compile(
+    r"\b(?:noon|midnight|o'?clock|half past|quarter (?:past|to)|in (?:\d+|an?|one|two) (?:min(?:ute)?s?|hours?)|"
+    r"(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve) (?:thirty|fifteen|forty[- ]five|[ap]m))\b"
+)
+
+_WORD = re.compile(r"[a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Lower case, accents removed (jalapeños -> jalapenos), commas as spaces."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().replace(",", " ").split())
+
+
+def _singular(word: str) -> str:
+    word = ALIASES.get(word, word)
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        word = word[:-1]
+    return ALIASES.get(word, word)
+
+
+def _words(text: str) -> List[str]:
+    return [_singular(word) for word in _WORD.findall(text)]
+
+
+def parse_order_check(reply: str) -> Dict[str, str]:
+    """``food:X,address:X,time:X`` from an LLM reply; fields it garbled or left out are missing."""
+    return {
+        key.lower(): value.capitalize()
+        for key, value in re.findall(r"\b(food|address|time)\s*[:=]\s*(yes|no)\b", reply, re.IGNORECASE)
+    }
+
+
+class OrderValidator:
+    """Checks an order request for a food item, a street address and a time.
+
+    Rules answer each check with Yes, No, or None when they cannot tell.
+    ``menu`` returns the names in the food_items table (read at most every
+    ``menu_ttl`` seconds). Only when a check is None does ``check`` ask
+    ``fallback`` (the LLM order check, returning ``food:X,address:X,time:X``)
+    and take its answer for the undecided checks; anything still undecided
+    is No, so the bot asks the customer.
+    """
+
+    def __init__(
+        self,
+        menu: Callable[[], Sequence[str]],
+        fallback: Optional[Callable[[str], str]] = None,
+        menu_ttl: float = 60.0,
+    ):
+        self.menu = menu
+        self.fallback = fallback
+        self.menu_ttl = menu_ttl
+        self.counts: Counter = Counter()
+        self._known: Tuple[float, List[FrozenSet[str]], Set[str]] = (0.0, [], set())
+        self._lock = threading.Lock()
+
+    def _menu_keys(self) -> Tuple[List[FrozenSet[str]], Set[str]]:
+        """The words identifying each menu item ("Pepperoni Pizza" -> {"pepperoni"}),
+        and every word that cannot be part of a street name."""
+        loaded_at, keys, not_street = self._known
+        if time.monotonic() - loaded_at < self.menu_ttl:
+            return keys, not_street
+        with self._lock:
+            keys = []
+            for name in self.menu():
+                words = set(_words(normalize(re.sub(r"\(.*?\)", " ", name))))
+                keys.append(frozenset(words - GENERIC_FOOD - DESCRIPTORS or words))
+            not_street = _NOT_STREET | GENERIC_FOOD | DESCRIPTORS | set().union(*keys)
+            self._known = (time.monotonic(), keys, not_street)
+        return keys, not_street
+
+    def _food(self, words: List[str], keys: Sequence[FrozenSet[str]]) -> Optional[str]:
+        present = set(words)
+        if any(key <= present for key in keys):
+            return YES
+        return None if present & GENERIC_FOOD else NO
+
+    def _addresses(self, text: str, not_street: Set[str]) -> List[Tuple[int, int]]:
+        """Spans of street addresses in ``text``."""
+        spans = []
+        for match in _STREET.finditer(text):
+            if not any(_singular(word.strip(".'")) in not_street for word in match.group(2).split()):
+                spans.append((match.start(1), match.end(2)))
+        return spans
+
+    def _address(self, text: str, spans: List[Tuple[int, int]], not_street: Set[str]) -> Optional[str]:
+        if spans:
+            return YES
+        if any(_singular(match.group(2)) not in not_street for match in _NUMBERED_PLACE.finditer(text)):
+            return None
+        return NO
+
+    def _time(self, text: str, spans: List[Tuple[int, int]]) -> Optional[str]:
+        if _TIME_12H.search(text) or _TIME_24H.search(text):
+            return YES
+        if _SPOKEN_TIME.search(text):
+            return None
+        for match in _BARE_HOUR.finditer(text):
+            if not any(start <= match.start(1) < end for start, end in spans):
+                return None
+        return NO
+
+    def rule_check(self, text: str) -> Dict[str, Optional[str]]:
+        """Yes/No per check from the rules alone; None where they cannot tell."""
+        text = normalize(text)
+        words = _words(text)
+        keys, not_street = self._menu_keys()
+        spans = self._addresses(text, not_street)
+        return {
+            "food": self._food(words, keys),
+            "address": self._address(text, spans, not_street),
+            "time": self._time(text, spans),
+        }
+
+    def check(self, text: str) -> Dict[str, str]:
+        checks = self.rule_check(text)
+        if None not in checks.values():
+            self.counts["rules"] += 1
+            return checks
+        answers: Dict[str, str] = {}
+        if self.fallback is not None:
+            self.counts["llm"] += 1
+            answers = parse_order_check(self.fallback(text))
+        else:
+            self.counts["undecided"] += 1
+        return {key: value or answers.get(key, NO) for key, value in checks.items()}
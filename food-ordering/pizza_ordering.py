@@ -1,15 +1,23 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import os
 import sqlite3
+import sys
+from itertools import groupby
 from typing import TypedDict, List
 from datetime import datetime, timedelta
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage, ToolMessage
 from langchain_ollama import ChatOllama
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import tool
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "virtual_sales_agent"))
+from llm_cache import CachedChatModel, ResponseCache
+from order_validation import OrderValidator
 
 def initialize_database():
     """Initialize database with tables and sample data"""
@@ -55,11 +63,18 @@ def initialize_database():
     conn.commit()
     conn.close()
 
-llm = ChatOllama(
-    model="llama3.2:latest",
-    temperature=0.3,
-    base_url="http://localhost:11434",
-    num_gpu=1
+# Replies built on create_order/get_all_orders results (per customer, and
+# changing with every order) bypass the cache; the intent, order check and
+# follow-up prompts are keyed on the question and can be replayed
+llm = CachedChatModel(
+    ChatOllama(
+        model="llama3.2:latest",
+        temperature=0.3,
+        base_url="http://localhost:11434",
+        num_gpu=1
+    ),
+    ResponseCache(os.getenv("LLM_CACHE_DB", "llm_cache.db")),
+    bypass_tools=["create_order", "get_all_orders"],
 )
 
 class AgentState(TypedDict):
@@ -151,13 +166,15 @@ Check for:
 - Specific time in HH:MM format (Yes/No)
 Respond ONLY as: food:X,address:X,time:X"""
 
-def create_prompt_chain():
-    return (
-        ChatPromptTemplate.from_template(system_prompt)
-        .partial(current_time=datetime.now().strftime("%Y-%m-%d %H:%M"))
-        | llm
-        | StrOutputParser()
-    )
+# Chains are built once; the time is filled in on every call. The question
+# and tool results follow the system message, so they are part of the prompt
+# (and of its cache key)
+response_chain = (
+    ChatPromptTemplate.from_messages([("system", system_prompt), MessagesPlaceholder("messages")])
+    .partial(current_time=lambda: datetime.now().strftime("%Y-%m-%d %H:%M"))
+    | llm
+    | StrOutputParser()
+)
 
 order_check_chain = (
     ChatPromptTemplate.from_template(order_check_prompt)
@@ -165,9 +182,15 @@ order_check_chain = (
     | StrOutputParser()
 )
 
+tools_by_name = {"create_order": create_order, "get_all_orders": get_all_orders}
+intent_llm = llm.bind_tools(list(tools_by_name.values()))
+
+# Upper bound on tool calls of one order running at the same time
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+
 def identify_intent(state: AgentState):
     messages = [HumanMessage(content=state["question"])]
-    response = llm.bind_tools([create_order, get_all_orders]).invoke(messages)
+    response = intent_llm.invoke(messages)
 
     for tool_call in response.tool_calls:
         if tool_call["name"] == "create_order":
@@ -193,6 +216,7 @@ def identify_intent(state: AgentState):
             except ValueError:
                 return {"messages": [ToolMessage(
                     content="Invalid time format. Please use 'HH:MM AM/PM' format.",
+                    name=tool_call["name"],
                     tool_call_id=tool_call["id"]
                 )]}
             
@@ -200,27 +224,46 @@ def identify_intent(state: AgentState):
 
     return {"tool_calls": response.tool_calls}
 
+def load_menu():
+    conn = sqlite3.connect('local_orders.db')
+    try:
+        return [name for (name,) in conn.execute("SELECT name FROM food_items")]
+    finally:
+        conn.close()
+
+# Rules answer most orders in microseconds; the LLM check only runs for the
+# parts they cannot tell (an unknown dish, "seven thirty", "to 221b Baker")
+order_validator = OrderValidator(
+    load_menu,
+    fallback=lambda question: order_check_chain.invoke({"question": question}),
+)
+
 def validate_order(state: AgentState):
-    result = order_check_chain.invoke({"question": state["question"]})
-    checks = dict([item.split(":") for item in result.split(",")])
-    return {"order_check": checks}
+    return {"order_check": order_validator.check(state["question"])}
+
+def join_checks(state: AgentState):
+    # Runs once both branches have written their keys; routing reads the merged state
+    return {}
+
+def run_tool(tool_call: dict) -> ToolMessage:
+    result = tools_by_name[tool_call["name"]].invoke(tool_call["args"])
+    return ToolMessage(content=str(result), name=tool_call["name"], tool_call_id=tool_call["id"])
+
+tool_runner = RunnableLambda(run_tool, name="run_tool")
 
 def execute_tools(state: AgentState):
+    # Each tool opens its own connection. Consecutive calls of the same tool
+    # (several orders, several lookups) run side by side; the groups run in
+    # call order, so a lookup after an order still sees it.
     tool_responses = []
-    for tool_call in state["tool_calls"]:
-        tool = {"create_order": create_order, "get_all_orders": get_all_orders}[tool_call["name"]]
-        result = tool.invoke(tool_call["args"])
-        tool_responses.append(ToolMessage(
-            content=str(result),
-            tool_call_id=tool_call["id"]
-        ))
+    for _, calls in groupby(state["tool_calls"], key=lambda call: call["name"]):
+        tool_responses.extend(tool_runner.batch(list(calls), {"max_concurrency": TOOL_CONCURRENCY}))
     return {"messages": tool_responses}
 
 def generate_response(state: AgentState):
-    prompt_chain = create_prompt_chain()
-    response = prompt_chain.invoke({
+    response = response_chain.invoke({
         "customer_name": state["customer_name"],
-        "messages": state["messages"]
+        "messages": [HumanMessage(content=state["question"])] + state["messages"]
     })
     return {"generation": response}
 
@@ -228,13 +271,17 @@ workflow = StateGraph(AgentState)
 
 workflow.add_node("identify_intent", identify_intent)
 workflow.add_node("validate_order", validate_order)
+workflow.add_node("join_checks", join_checks)
 workflow.add_node("execute_tools", execute_tools)
 workflow.add_node("generate_response", generate_response)
 
-workflow.set_entry_point("identify_intent")
-workflow.add_edge("identify_intent", "validate_order")
+# identify_intent and validate_order only read the question, so they run
+# as parallel branches; join_checks waits for both before routing
+workflow.add_edge(START, "identify_intent")
+workflow.add_edge(START, "validate_order")
+workflow.add_edge(["identify_intent", "validate_order"], "join_checks")
 workflow.add_conditional_edges(
-    "validate_order",
+    "join_checks",
     lambda state: "complete" if all(v == "Yes" for v in state["order_check"].values()) else "incomplete",
     {
         "complete": "execute_tools",
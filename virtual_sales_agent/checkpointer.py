@@ -0,0 +1,504 @@
+import asyncio
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+)
+from langgraph.checkpoint.serde.types import TASKS, ChannelProtocol
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    value BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    last_access REAL NOT NULL,
+    paused INTEGER NOT NULL DEFAULT 0,
+    paused_at REAL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_threads_idle ON threads (paused, last_access);
+"""
+CHECKPOINT_COLUMNS = (
+    "thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, "
+    "type, checkpoint, metadata_type, metadata"
+)
+
+# paused_at (when the thread reached the interrupt; reads never change it)
+# was added after threads; older files get the column and an estimate
+THREADS_PAUSED_AT = """
+ALTER TABLE threads ADD COLUMN paused_at REAL;
+UPDATE threads SET paused_at = last_access WHERE paused = 1;
+"""
+
+PAUSED_AT_INDEX = "CREATE INDEX IF NOT EXISTS idx_threads_paused_at ON threads (paused, paused_at);"
+
+
+class BoundedSqliteSaver(BaseCheckpointSaver[str]):
+    """A disk-backed LangGraph checkpointer with bounded history.
+
+    Checkpoints and pending writes live in SQLite (WAL), so nothing is held in
+    process memory and threads paused at an approval interrupt survive a
+    restart. Each thread keeps at most ``max_checkpoints_per_thread``
+    checkpoints, threads idle for longer than ``thread_ttl_seconds`` are
+    evicted, and every ``compact_every`` writes the file is compacted.
+
+    Threads whose latest checkpoint is waiting to run one of
+    ``protected_nodes`` (the approval step) are evicted only after
+    ``paused_thread_ttl_seconds``; ``None`` keeps them indefinitely.
+
+    The async methods run the sqlite calls in a worker thread, and
+    compaction runs in its own thread, so the event loop never waits on the
+    file. Reads refresh a thread's ``last_access`` at most every
+    ``touch_interval_seconds``.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "checkpoints.db",
+        *,
+        max_checkpoints_per_thread: int = 20,
+        thread_ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        paused_thread_ttl_seconds: Optional[float] = None,
+        protected_nodes: Sequence[str] = ("sensitive_tools",),
+        compact_every: int = 1000,
+        touch_interval_seconds: float = 60.0,
+        serde: Optional[SerializerProtocol] = None,
+    ) -> None:
+        super().__init__(serde=serde)
+        self.db_path = db_path
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self.thread_ttl_seconds = thread_ttl_seconds
+        self.paused_thread_ttl_seconds = paused_thread_ttl_seconds
+        self.protected_nodes = tuple(protected_nodes)
+        self.compact_every = compact_every
+        self.touch_interval_seconds = touch_interval_seconds
+        self._puts_since_compact = 0
+        self._compacting = False
+        # thread_id -> when last_access was last written
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(CHECKPOINT_SCHEMA)
+        if "paused_at" not in {row[1] for row in self.conn.execute("PRAGMA table_info(threads)")}:
+            self.conn.executescript(THREADS_PAUSED_AT)
+        self.conn.execute(PAUSED_AT_INDEX)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def _is_paused(self, checkpoint: Checkpoint) -> bool:
+        """True if the checkpoint is waiting to run one of the protected nodes.
+
+        A node is pending while its trigger channel still holds a value the
+        node has not seen; the channel is cleared once the node consumes it.
+        """
+        values = checkpoint.get("channel_values", {})
+        versions = checkpoint.get("channel_versions", {})
+        seen = checkpoint.get("versions_seen", {})
+        for node in self.protected_nodes:
+            node_seen = seen.get(node, {})
+            for channel, version in versions.items():
+                if (
+                    channel.endswith(f":{node}")
+                    and channel in values
+                    and node_seen.get(channel) != version
+                ):
+                    return True
+        return False
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        return self.conn.execute(
+            """SELECT task_id, channel, type, value FROM writes
+            WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?
+            ORDER BY task_id, idx""",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def _to_tuple(self, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, blob, meta_type, meta_blob = row
+        writes = self._load_writes(thread_id, checkpoint_ns, checkpoint_id)
+        sends = []
+        if parent_id:
+            sends = [
+                self.serde.loads_typed((w[2], w[3]))
+                for w in self._load_writes(thread_id, checkpoint_ns, parent_id)
+                if w[1] == TASKS
+            ]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**self.serde.loads_typed((type_, blob)), "pending_sends": sends},
+            metadata=self.serde.loads_typed((meta_type, meta_blob)),
+            parent_config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": parent_id,
+                }
+            }
+            if parent_id
+            else None,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((t, v)))
+                for task_id, channel, t, v in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    f"""SELECT {CHECKPOINT_COLUMNS} FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?""",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    f"""SELECT {CHECKPOINT_COLUMNS} FROM checkpoints
+                    WHERE thread_id = ? AND checkpoint_ns = ?
+                    ORDER BY checkpoint_id DESC LIMIT 1""",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            self._touch(thread_id)
+            return self._to_tuple(row)
+
+    def _touch(self, thread_id: str) -> None:
+        """Refresh the thread's last_access, unless that was done within touch_interval_seconds."""
+        now = time.time()
+        if now - self._touched.get(thread_id, 0.0) < self.touch_interval_seconds:
+            return
+        if len(self._touched) > 100_000:
+            self._touched.clear()
+        self._touched[thread_id] = now
+        self.conn.execute("UPDATE threads SET last_access = ? WHERE thread_id = ?", (now, thread_id))
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        conditions, params = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        if filter:
+            # Metadata is a serialized blob, so the filter runs here; only the
+            # keys and metadata are scanned, and matches are loaded one by one
+            query = (
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, metadata_type, metadata "
+                f"FROM checkpoints {where} {order}"
+            )
+        else:
+            query = f"SELECT {CHECKPOINT_COLUMNS} FROM checkpoints {where} {order}"
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+        with self._lock:
+            cursor = self.conn.execute(query, params)
+        returned = 0
+        try:
+            while limit is None or returned < limit:
+                # The lock is held per row, not while the caller consumes the results
+                with self._lock:
+                    row = cursor.fetchone()
+                    if row is None:
+                        return
+                    if filter:
+                        metadata = self.serde.loads_typed((row[3], row[4]))
+                        if not all(metadata.get(k) == v for k, v in filter.items()):
+                            continue
+                        row = self.conn.execute(
+                            f"""SELECT {CHECKPOINT_COLUMNS} FROM checkpoints
+                            WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?""",
+                            row[:3],
+                        ).fetchone()
+                        if row is None:
+                            continue
+                    item = self._to_tuple(row)
+                returned += 1
+                yield item
+        finally:
+            cursor.close()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        c = checkpoint.copy()
+        c.pop("pending_sends", None)  # type: ignore[misc]
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(c)
+        meta_type, meta_blob = self.serde.dumps_typed(metadata)
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute(
+                    """INSERT OR REPLACE INTO checkpoints
+                    (thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,
+                     type, checkpoint, metadata_type, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (thread_id, checkpoint_ns, checkpoint["id"],
+                     config["configurable"].get("checkpoint_id"),
+                     type_, blob, meta_type, meta_blob),
+                )
+                if not checkpoint_ns:
+                    now, paused = time.time(), self._is_paused(checkpoint)
+                    row = self.conn.execute(
+                        "SELECT paused_at FROM threads WHERE thread_id = ? AND paused = 1", (thread_id,)
+                    ).fetchone()
+                    paused_since = row[0] if row else None
+                    if paused_since is not None and not paused:
+                        # Approved or rejected: the thread moves past the interrupt
+                        metrics.observe_approval_wait(now - paused_since)
+                    # paused_at is set when the thread reaches the interrupt and kept
+                    # while it stays there; reads only touch last_access
+                    paused_at = (paused_since or now) if paused else None
+                    self.conn.execute(
+                        """INSERT INTO threads (thread_id, last_access, paused, paused_at) VALUES (?, ?, ?, ?)
+                        ON CONFLICT (thread_id) DO UPDATE
+                        SET last_access = excluded.last_access, paused = excluded.paused,
+                            paused_at = excluded.paused_at""",
+                        (thread_id, now, int(paused), paused_at),
+                    )
+                    self._touched[thread_id] = now
+                self._trim_thread(thread_id, checkpoint_ns)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self._puts_since_compact += 1
+            if self.compact_every and self._puts_since_compact >= self.compact_every and not self._compacting:
+                # Vacuuming and truncating the WAL can take a while; the put does not wait for it
+                self._compacting = True
+                self._puts_since_compact = 0
+                threading.Thread(target=self.compact, name="checkpoint-compact", daemon=True).start()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        regular, special = [], []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            row = (thread_id, checkpoint_ns, checkpoint_id, task_id,
+                   WRITES_IDX_MAP.get(channel, idx), channel, type_, blob)
+            (special if channel in WRITES_IDX_MAP else regular).append(row)
+        columns = "(thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value)"
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                # Same semantics as MemorySaver: regular writes are first-wins,
+                # special channels (errors, interrupts) overwrite
+                self.conn.executemany(
+                    f"INSERT OR IGNORE INTO writes {columns} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    regular,
+                )
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO writes {columns} VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    special,
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ):
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id)
+
+    def get_next_version(self, current: Optional[str], channel: ChannelProtocol) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def _trim_thread(self, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop all but the newest checkpoints (and their writes) of one thread."""
+        if not self.max_checkpoints_per_thread:
+            return
+        cutoff = self.conn.execute(
+            """SELECT checkpoint_id FROM checkpoints
+            WHERE thread_id = ? AND checkpoint_ns = ?
+            ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?""",
+            (thread_id, checkpoint_ns, self.max_checkpoints_per_thread - 1),
+        ).fetchone()
+        if cutoff is None:
+            return
+        for table in ("checkpoints", "writes"):
+            self.conn.execute(
+                f"""DELETE FROM {table}
+                WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?""",
+                (thread_id, checkpoint_ns, cutoff[0]),
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._touched.pop(thread_id, None)
+            for table in ("checkpoints", "writes", "threads"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def paused_threads(self, limit: int = 100) -> List[Tuple[str, float]]:
+        """(thread_id, paused_at) of threads waiting at a protected node, longest waiting first."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT thread_id, paused_at FROM threads WHERE paused = 1 ORDER BY paused_at LIMIT ?",
+                (limit,),
+            ).fetchall()
+
+    def paused_count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM threads WHERE paused = 1").fetchone()[0]
+
+    def evict_idle_threads(self, now: Optional[float] = None) -> int:
+        """Delete threads idle past their TTL and return how many were removed."""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            if self.thread_ttl_seconds is not None:
+                expired += [row[0] for row in self.conn.execute(
+                    "SELECT thread_id FROM threads WHERE paused = 0 AND last_access < ?",
+                    (now - self.thread_ttl_seconds,),
+                )]
+            if self.paused_thread_ttl_seconds is not None:
+                expired += [row[0] for row in self.conn.execute(
+                    "SELECT thread_id FROM threads WHERE paused = 1 AND last_access < ?",
+                    (now - self.paused_thread_ttl_seconds,),
+                )]
+            for thread_id in expired:
+                self.delete_thread(thread_id)
+        if expired:
+            logger.info("Evicted %d idle checkpoint threads", len(expired))
+        return len(expired)
+
+    def compact(self) -> None:
+        """Evict idle threads, drop orphaned writes and return free pages to the OS."""
+        with self._lock:
+            self._puts_since_compact = 0
+            try:
+                self.evict_idle_threads()
+                self.conn.execute(
+                    """DELETE FROM writes WHERE NOT EXISTS (
+                        SELECT 1 FROM checkpoints c
+                        WHERE c.thread_id = writes.thread_id
+                        AND c.checkpoint_ns = writes.checkpoint_ns
+                        AND c.checkpoint_id = writes.checkpoint_id)"""
+                )
+                self.conn.execute("PRAGMA incremental_vacuum")
+                self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            finally:
+                self._compacting = False
@@ -1,13 +1,19 @@
+import asyncio
+import contextlib
 import os
-from datetime import datetime
-from typing import Annotated
+import threading
+import time
+import weakref
+from typing import Annotated, Optional, Sequence
 import logging
 
+from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_ollama import ChatOllama
 
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.constants import TAG_NOSTREAM
+from langgraph.utils.runnable import RunnableCallable
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import AnyMessage, add_messages
 from langgraph.prebuilt import tools_condition
@@ -21,63 +27,191 @@ from tools import (
     get_available_categories,
     search_products,
     search_products_recommendations,
+    search_products_semantic,
+    tool_cache,
 )
-from utils import create_tool_node_with_fallback
+from checkpointer import BoundedSqliteSaver
+from history import HistoryManager, extractive_summary
+from intent_router import IntentRouter, fast_reply, is_fast_path
+import metrics
+from llm_cache import CachedChatModel, ResponseCache
+from prompt_assembly import stable_prompt
+from scripted_llm import ScriptedChatModel
+from tool_format import SERIALIZERS
+from utils import create_tool_node_with_fallback, instrumented_node, order_tool_results, pending_tool_calls
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class State(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
     user_info: str
+    # Rolling summary of messages[:summarized_upto], which are no longer sent to the LLM
+    summary: str
+    summarized_upto: int
 
 # In graph.py
 
 class Assistant:
-    def __init__(self, runnable: Runnable):
+    """LLM node with a sync (``__call__``) and an async (``acall``) entry point.
+
+    ``max_concurrent_calls`` caps how many generations are in flight at once
+    (per event loop for ``acall``); further sessions wait for a free slot
+    instead of piling requests onto the model server.
+    """
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        history: Optional[HistoryManager] = None,
+        max_concurrent_calls: Optional[int] = None,
+    ):
         self.runnable = runnable
+        self.history = history
+        self.max_concurrent_calls = max_concurrent_calls
+        self._sync_slots = threading.BoundedSemaphore(max_concurrent_calls) if max_concurrent_calls else None
+        self._async_slots = weakref.WeakKeyDictionary()
+
+    def _prepare(self, state: State, config: RunnableConfig):
+        messages = order_tool_results(state.get("messages", []))
+        update = {}
+        view = None
+        prompt_state = {**state, "messages": messages, "user_info": config.get("configurable", {}).get("customer_id")}
+        if self.history:
+            view = self.history.prepare(
+                messages, state.get("summary"), state.get("summarized_upto")
+            )
+            prompt_state["messages"] = view.messages
+            update = {"summary": view.summary, "summarized_upto": view.summarized_upto}
+            logger.info(
+                "Prompt size: ~%s tokens, %s/%s messages (%s tool results collapsed, %s summarized, %s truncated)",
+                view.prompt_tokens, len(view.messages), len(messages),
+                view.collapsed_tool_results, view.dropped_messages, view.truncated_messages,
+            )
+        return messages, prompt_state, update, view
+
+    def _finish(self, result, messages, update, view):
+        # Ollama reports how much of the prompt it had to evaluate (the rest came from its KV cache)
+        metadata = result.response_metadata
+        if metadata.get("prompt_eval_count") is not None and metadata.get("cache") != "hit":
+            logger.info(
+                "Prompt eval: %s tokens in %.0f ms",
+                metadata["prompt_eval_count"],
+                (metadata.get("prompt_eval_duration") or 0) / 1e6,
+            )
+        if view is not None:
+            result.response_metadata = {**result.response_metadata, "context": view.stats}
 
-    def __call__(self, state: State, config: RunnableConfig):
-        state = {**state, "user_info": config.get("configurable", {}).get("customer_id")}
-        result = self.runnable.invoke(state)
-        
         # If empty response but tool results exist
-        if not result.content and state.get("messages"):
-            last_tool = next((msg for msg in reversed(state["messages"]) 
+        if not result.content and messages:
+            last_tool = next((msg for msg in reversed(messages) 
                             if isinstance(msg, ToolMessage)), None)
             if last_tool:
                 result.content = f"Here are the results:\n{last_tool.content}"
         
-        return {"messages": [result]}
-llm = ChatOllama(
-    model="llama3.2:latest",
-    temperature=0.3,
-    base_url="http://localhost:11434",
-    num_gpu=1,
-    format="json",
-    num_ctx=4096
+        return {"messages": [result], **update}
+
+    def _llm_slot(self):
+        if not self.max_concurrent_calls:
+            return contextlib.nullcontext()
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrent_calls)
+        return slots
+
+    def __call__(self, state: State, config: RunnableConfig):
+        messages, prompt_state, update, view = self._prepare(state, config)
+        with self._sync_slots or contextlib.nullcontext():
+            started = time.perf_counter()
+            result = self.runnable.invoke(prompt_state)
+            metrics.observe_generation(result, time.perf_counter() - started)
+        return self._finish(result, messages, update, view)
+
+    async def acall(self, state: State, config: RunnableConfig):
+        # History preparation may call the summary model synchronously
+        messages, prompt_state, update, view = await asyncio.to_thread(self._prepare, state, config)
+        async with self._llm_slot():
+            started = time.perf_counter()
+            result = await self.runnable.ainvoke(prompt_state, config)
+            metrics.observe_generation(result, time.perf_counter() - started)
+        return self._finish(result, messages, update, view)
+
+# Model server and how long it keeps the model loaded after a call. Ollama's
+# default (5m) unloads it between quiet turns, and the next call pays the
+# load plus a full prompt evaluation; -1 keeps it loaded, so the KV cache of
+# each conversation's prompt prefix survives between turns.
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "-1")
+keep_alive = int(OLLAMA_KEEP_ALIVE) if OLLAMA_KEEP_ALIVE.lstrip("-").isdigit() else OLLAMA_KEEP_ALIVE
+
+# SCRIPTED_LLM=<script.json> swaps the model server for a deterministic
+# stand-in (scripted_llm.py), e.g. for load tests without a GPU
+if os.getenv("SCRIPTED_LLM"):
+    llm = summary_llm = ScriptedChatModel.from_file(os.environ["SCRIPTED_LLM"])
+else:
+    llm = ChatOllama(
+        model="llama3.2:latest",
+        temperature=0.3,
+        base_url=OLLAMA_BASE_URL,
+        num_gpu=1,
+        format="json",
+        num_ctx=4096,
+        keep_alive=keep_alive,
+    )
+
+    # Plain-text model for conversation summaries; the assistant model is pinned to JSON output.
+    # Same num_ctx, so both share one loaded model instead of reloading it.
+    summary_llm = ChatOllama(
+        model="llama3.2:latest",
+        temperature=0,
+        base_url=OLLAMA_BASE_URL,
+        num_gpu=1,
+        num_ctx=4096,
+        num_predict=256,
+        keep_alive=keep_alive,
+    )
+
+# Tagged so summary tokens never show up in the user-facing token stream
+summary_chain = ChatPromptTemplate.from_template(
+    """Update the running summary of a sales conversation with the new messages.
+Keep product names, prices, order ids and customer preferences. Reply with the summary only.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}"""
+) | summary_llm.with_config(tags=[TAG_NOSTREAM]) | StrOutputParser()
+
+def summarize_with_llm(previous: str, messages: Sequence[AnyMessage]) -> str:
+    # Only the newly dropped turns are sent; tool payloads are left out
+    transcript = extractive_summary("", messages, max_chars=4000)
+    if not transcript:
+        return previous
+    return summary_chain.invoke({"summary": previous or "(none)", "messages": transcript})
+
+history_manager = HistoryManager(
+    max_context_tokens=4096,
+    reserved_tokens=1536,
+    summarizer=summarize_with_llm,
 )
 
-assistant_prompt = ChatPromptTemplate.from_messages([
-    (
-        "system",
-        """You are a helpful sales assistant. Follow these rules:
+# Byte-stable for the whole conversation so the model server can reuse the
+# evaluated prefix; the time is appended after the latest customer message
+# (prompt_assembly.py)
+assistant_prompt = stable_prompt(
+    """You are a helpful sales assistant. Follow these rules:
 1. Always format tool results for readability
 2. Include prices and stock quantities
 3. Use bullet points for product lists
 4. Add emojis for engagement
 
 Tools: {tool_names}
-Current user: {user_info}
-Time: {time}"""
-    ),
-    ("placeholder", "{messages}")
-]).partial(
-    time=datetime.now,
+Current user: {user_info}""",
     tool_names=", ".join([
         "get_available_categories",
         "search_products",
+        "search_products_semantic",
         "search_products_recommendations",
         "check_order_status",
         "create_order"
@@ -87,6 +221,7 @@ Time: {time}"""
 safe_tools = [
     get_available_categories,
     search_products,
+    search_products_semantic,
     search_products_recommendations,
     check_order_status,
 ]
@@ -94,30 +229,116 @@ safe_tools = [
 sensitive_tools = [create_order]
 sensitive_tool_names = {tool.name for tool in sensitive_tools}
 
-assistant_runnable = assistant_prompt | llm.bind_tools(safe_tools + sensitive_tools)
+# Upper bound on safe tool calls of one turn running at the same time
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "4"))
+# Generations in flight against the model server (match OLLAMA_NUM_PARALLEL)
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+# How tool results are written into the prompt: "compact" tables or "json"
+TOOL_RESULT_FORMAT = os.getenv("TOOL_RESULT_FORMAT", "compact")
+
+# Order status and recommendations are per customer and order placement must
+# never be replayed, so prompts containing their results skip the cache.
+response_cache = ResponseCache(os.getenv("LLM_CACHE_DB", "llm_cache.db"))
+cached_llm = CachedChatModel(
+    llm.bind_tools(safe_tools + sensitive_tools),
+    response_cache,
+    bypass_tools=[
+        check_order_status.name,
+        search_products_recommendations.name,
+        create_order.name,
+    ],
+)
+
+assistant_runnable = assistant_prompt | cached_llm
+
+# Simple, unambiguous requests (categories, order status, category browsing)
+# skip both LLM rounds: the router calls the tool and fast_reply templates
+# the answer. FAST_PATH=0 sends everything to the assistant.
+router = IntentRouter(lambda: get_available_categories.func()["categories"])
+router.enabled = os.getenv("FAST_PATH", "1") != "0"
 
 builder = StateGraph(State)
-builder.add_node("assistant", Assistant(assistant_runnable))
-builder.add_node("safe_tools", create_tool_node_with_fallback(safe_tools))
-builder.add_node("sensitive_tools", create_tool_node_with_fallback(sensitive_tools))
+builder.add_node("router", instrumented_node("router", RunnableCallable(router, router.acall, name="router")))
+builder.add_node("fast_reply", instrumented_node("fast_reply", RunnableCallable(fast_reply, name="fast_reply")))
+assistant = Assistant(assistant_runnable, history_manager, max_concurrent_calls=LLM_CONCURRENCY)
+# Explicit sync and async entry points, so graph.invoke and graph.ainvoke both run natively
+builder.add_node("assistant", instrumented_node("assistant", RunnableCallable(assistant, assistant.acall, name="assistant")))
+# Everything that is not a sensitive call goes to safe_tools (unknown tool
+# names get an error result there); safe calls of a turn run concurrently.
+builder.add_node(
+    "safe_tools",
+    instrumented_node("safe_tools", create_tool_node_with_fallback(
+        safe_tools,
+        handles=lambda name: name not in sensitive_tool_names,
+        max_concurrency=TOOL_CONCURRENCY,
+        serializer=SERIALIZERS[TOOL_RESULT_FORMAT],
+    )),
+)
+builder.add_node("sensitive_tools", instrumented_node("sensitive_tools", create_tool_node_with_fallback(
+    sensitive_tools, serializer=SERIALIZERS[TOOL_RESULT_FORMAT],
+)))
 
 def route_tools(state: State):
     next_node = tools_condition(state)
     if next_node == END:
         return END
+    # A mixed turn runs its safe calls first; only the sensitive rest waits for approval
     ai_message = state["messages"][-1]
-    if ai_message.tool_calls:
-        first_tool_call = ai_message.tool_calls[0]
-        if first_tool_call["name"] in sensitive_tool_names:
-            return "sensitive_tools"
-    return "safe_tools"
+    if any(tc["name"] not in sensitive_tool_names for tc in ai_message.tool_calls):
+        return "safe_tools"
+    return "sensitive_tools"
+
+def route_after_router(state: State):
+    return "safe_tools" if is_fast_path(state["messages"][-1]) else "assistant"
+
+def route_after_safe_tools(state: State):
+    message, pending = pending_tool_calls(state["messages"], sensitive_tool_names.__contains__)
+    if pending:
+        return "sensitive_tools"
+    return "fast_reply" if is_fast_path(message) else "assistant"
+
+def route_after_fast_reply(state: State):
+    # No template for this result (empty, error): the assistant takes the turn
+    last = state["messages"][-1]
+    return END if isinstance(last, AIMessage) and not last.tool_calls else "assistant"
 
-builder.add_edge(START, "assistant")
+builder.add_edge(START, "router")
+builder.add_conditional_edges("router", route_after_router, ["safe_tools", "assistant"])
 builder.add_conditional_edges(
     "assistant", route_tools, ["safe_tools", "sensitive_tools", END]
 )
-builder.add_edge("safe_tools", "assistant")
+builder.add_conditional_edges(
+    "safe_tools", route_after_safe_tools, ["sensitive_tools", "fast_reply", "assistant"]
+)
+builder.add_conditional_edges("fast_reply", route_after_fast_reply, ["assistant", END])
 builder.add_edge("sensitive_tools", "assistant")
 
-memory = MemorySaver()
+memory = BoundedSqliteSaver(
+    os.getenv("CHECKPOINT_DB", "checkpoints.db"),
+    protected_nodes=["sensitive_tools"],
+)
 graph = builder.compile(checkpointer=memory, interrupt_before=["sensitive_tools"])
+
+# Cache hit rates and the approval backlog are read from their owners at scrape time
+metrics.REGISTRY.collector(
+    "sales_llm_cache_requests",
+    "LLM response cache lookups by outcome",
+    lambda: [({"outcome": k}, v) for k, v in cached_llm.stats.counts.items()],
+    kind="counter",
+)
+metrics.REGISTRY.collector(
+    "sales_tool_cache_requests",
+    "Tool result cache lookups by outcome",
+    lambda: [({"outcome": k}, tool_cache.counts[k]) for k in ("hits", "misses", "stale")],
+    kind="counter",
+)
+metrics.REGISTRY.collector(
+    "sales_cache_hit_ratio",
+    "Hit ratio of the LLM response and tool result caches",
+    lambda: [({"cache": "llm"}, cached_llm.stats.snapshot()["hit_rate"]), ({"cache": "tool"}, tool_cache.stats()["hit_rate"])],
+)
+metrics.REGISTRY.collector(
+    "sales_paused_threads",
+    "Threads waiting at the approval interrupt",
+    lambda: [({}, memory.paused_count())],
+)
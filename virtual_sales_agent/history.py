@@ -0,0 +1,207 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Sequence
+
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Per-message framing overhead (role markers etc.) added to the content estimate.
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = " …[truncated]"
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English/JSON)."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: AnyMessage, counter: Callable[[str], int] = estimate_tokens) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = counter(content) + MESSAGE_OVERHEAD_TOKENS
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += counter(f"{tool_call['name']}{tool_call['args']}")
+    return tokens
+
+
+def extractive_summary(previous: str, messages: Sequence[AnyMessage], max_chars: int = 1200) -> str:
+    """Append one short line per dropped human/assistant message to the summary.
+
+    Tool outputs are skipped; they are reproducible by calling the tool again.
+    The oldest lines fall off first once max_chars is reached.
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        if isinstance(message, ToolMessage) or not message.content:
+            continue
+        role = "Customer" if isinstance(message, HumanMessage) else "Assistant"
+        text = " ".join(str(message.content).split())
+        lines.append(f"{role}: {text[:160]}")
+    while len(lines) > 1 and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+@dataclass
+class HistoryView:
+    messages: List[AnyMessage]
+    summary: str
+    summarized_upto: int
+    prompt_tokens: int
+    collapsed_tool_results: int = 0
+    truncated_messages: int = 0
+    dropped_messages: int = 0
+    stats: dict = field(default_factory=dict)
+
+
+class HistoryManager:
+    """Fits the conversation into the model's context window.
+
+    State keeps the full message list; only the view sent to the LLM shrinks:
+
+    - tool results from earlier turns are collapsed to a one-line stub,
+    - when the history exceeds the budget, whole turns are folded into a
+      rolling summary (only the newly dropped messages are summarised), and
+      the kept window shrinks to ``refill_ratio`` of the budget so the next
+      few turns need no summarising at all,
+    - if the kept turns are still too large, their oldest contents are
+      truncated, then the oldest turns are folded into the summary too,
+      and finally the current turn is cut down to the budget.
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int = 4096,
+        reserved_tokens: int = 1536,
+        refill_ratio: float = 0.6,
+        stale_tool_chars: int = 200,
+        summarizer: Callable[[str, Sequence[AnyMessage]], str] = extractive_summary,
+        token_counter: Callable[[str], int] = estimate_tokens,
+    ):
+        self.budget = max_context_tokens - reserved_tokens
+        self.refill_ratio = refill_ratio
+        self.stale_tool_chars = stale_tool_chars
+        self.summarizer = summarizer
+        self.token_counter = token_counter
+
+    def _count(self, message: AnyMessage) -> int:
+        return message_tokens(message, self.token_counter)
+
+    def _collapse_stale_tools(self, messages: List[AnyMessage]) -> int:
+        last_human = max(
+            (i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1
+        )
+        collapsed = 0
+        for i, message in enumerate(messages[:last_human]):
+            if isinstance(message, ToolMessage) and len(str(message.content)) > self.stale_tool_chars:
+                messages[i] = message.model_copy(update={
+                    "content": f"[earlier {message.name or 'tool'} result omitted, "
+                               f"{len(str(message.content))} chars; call the tool again if needed]"
+                })
+                collapsed += 1
+        return collapsed
+
+    def _summarize(self, previous: str, dropped: Sequence[AnyMessage]) -> str:
+        try:
+            return self.summarizer(previous, dropped)
+        except Exception as e:
+            logger.warning("Summarizer failed, using extractive summary: %s", e)
+            return extractive_summary(previous, dropped)
+
+    def _truncate(self, window: List[AnyMessage], sizes: List[int], i: int, excess: int, floor: int) -> bool:
+        """Shorten ``window[i]`` by about ``excess`` tokens, keeping at least ``floor`` characters."""
+        content = str(window[i].content)
+        keep_chars = max(floor, len(content) - excess * 4 - len(TRUNCATION_MARKER))
+        if keep_chars >= len(content):
+            return False
+        window[i] = window[i].model_copy(update={"content": content[:keep_chars] + TRUNCATION_MARKER})
+        sizes[i] = self._count(window[i])
+        return True
+
+    def prepare(
+        self,
+        messages: Sequence[AnyMessage],
+        summary: Optional[str] = "",
+        summarized_upto: Optional[int] = 0,
+    ) -> HistoryView:
+        summary = summary or ""
+        summarized_upto = min(summarized_upto or 0, len(messages))
+        window = list(messages[summarized_upto:])
+        collapsed = self._collapse_stale_tools(window)
+        sizes = [self._count(m) for m in window]
+
+        def summary_tokens(text: str) -> int:
+            return self.token_counter(SUMMARY_PREFIX + text) + MESSAGE_OVERHEAD_TOKENS if text else 0
+
+        dropped = 0
+        if sum(sizes) + summary_tokens(summary) > self.budget:
+            # Keep the newest turns that fit in the refill target; cut on a
+            # HumanMessage so no tool result is separated from its call.
+            target = int(self.budget * self.refill_ratio) - summary_tokens(summary)
+            human_starts = [i for i, m in enumerate(window) if isinstance(m, HumanMessage)]
+            cut = human_starts[-1] if human_starts else 0
+            for start in human_starts:
+                if sum(sizes[start:]) <= target:
+                    cut = start
+                    break
+            if cut > 0:
+                summary = self._summarize(summary, window[:cut])
+                summarized_upto += cut
+                dropped = cut
+                window, sizes = window[cut:], sizes[cut:]
+
+        def overflow() -> int:
+            return sum(sizes) + summary_tokens(summary) - self.budget
+
+        truncated = 0
+        # Last resort: shorten the oldest large messages of the kept turns
+        for i, message in enumerate(window):
+            if overflow() <= 0:
+                break
+            if i == len(window) - 1 and isinstance(message, HumanMessage):
+                continue
+            if self._truncate(window, sizes, i, overflow(), floor=200):
+                truncated += 1
+
+        # The floor and the 4-chars-per-token guess can leave it over budget:
+        # fold the oldest kept turns into the summary until the rest fits
+        while overflow() > 0:
+            human_starts = [i for i, m in enumerate(window) if isinstance(m, HumanMessage) and i > 0]
+            if not human_starts:
+                break
+            cut = human_starts[0]
+            summary = self._summarize(summary, window[:cut])
+            summarized_upto += cut
+            dropped += cut
+            window, sizes = window[cut:], sizes[cut:]
+
+        # Only the current turn is left: cut it, the customer's message included
+        for i in range(len(window)):
+            if overflow() <= 0:
+                break
+            if self._truncate(window, sizes, i, overflow(), floor=0):
+                truncated += 1
+        if overflow() > 0:
+            logger.warning("History still %d tokens over the budget after trimming", overflow())
+
+        view_messages = window
+        if summary:
+            view_messages = [
+                SystemMessage(content=SUMMARY_PREFIX + summary)
+            ] + window
+        prompt_tokens = sum(sizes) + summary_tokens(summary)
+        return HistoryView(
+            messages=view_messages,
+            summary=summary,
+            summarized_upto=summarized_upto,
+            prompt_tokens=prompt_tokens,
+            collapsed_tool_results=collapsed,
+            truncated_messages=truncated,
+            dropped_messages=dropped,
+            stats={
+                "history_messages": len(messages),
+                "sent_messages": len(view_messages),
+                "prompt_tokens_estimate": prompt_tokens,
+            },
+        )
@@ -0,0 +1,341 @@
+import asyncio
+import json
+import math
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+from metrics import ROUTER_DECISIONS
+
+# Fast-path answers are only given when the rules and the classifier agree
+# and the classifier is at least this sure.
+MIN_CONFIDENCE = 0.8
+
+_WORD = re.compile(r"[a-z0-9$]+")
+# Amounts must say they are money ("$20", "20 dollars"): "from 2020" or
+# "over 5 stars" are not price filters
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_CURRENCY = r"\s*(?:dollars?|usd|bucks)\b"
+_AMOUNT = r"(?:\$\s*" + _NUMBER + r"|" + _NUMBER + _CURRENCY + r")"
+_MAX_PRICE = re.compile(r"\b(?:under|below|less than|cheaper than|up to|at most|max(?:imum)?)\s*" + _AMOUNT)
+_MIN_PRICE = re.compile(r"\b(?:over|above|more than|at least|from)\s*" + _AMOUNT)
+_BETWEEN = re.compile(
+    r"\bbetween\s*(\$)?\s*" + _NUMBER + r"\s*(?:and|-|to)\s*(\$)?\s*" + _NUMBER + r"(" + _CURRENCY + r")?"
+)
+_ORDER_ID = re.compile(r"\border\s*(?:number|no\.?|id)?\s*#?\s*(\d+)\b|#(\d+)")
+_ORDER_STATUS = re.compile(r"\b(status|where(?:'s| is)|track|tracking|happened to|shipped|arriv)")
+_MY_ORDERS = re.compile(r"\bmy (?:orders?|purchases)\b|\border history\b")
+_CATEGORIES = re.compile(r"\bcategor(?:y|ies)\b|\bwhat (?:do|can) you (?:sell|offer)\b|\bwhat kinds? of\b")
+_BROWSE = re.compile(r"\b(show|list|see|browse|have|sell|carry|got|find|looking for|any)\b")
+# Requests the templates cannot answer well: comparisons, superlatives,
+# advice, and anything that places or changes an order
+_VETO = re.compile(
+    r"\b(buy|purchase|(?:want|like|need) to order|place an order|order (?:a|an|the|some|another)|"
+    r"cancel|change|return|refund|recommend|suggest|compare|"
+    r"versus|vs|best|cheapest|most|least|better|which one|should i|why|how)\b"
+)
+# "not under $20", "no books", "anything except toys": the rules would drop the negation
+_NEGATION = re.compile(r"\b(?:not|never|except|without|other than)\b|(?<!order )\bno\b(?!\.)|n't\b")
+# More than one clause or question ("is order 5 shipped? also show me toys")
+_CLAUSES = re.compile(r"(?:[?!;]|(?<!\bno)\.)\s*(?=[a-z0-9$])|\b(?:also|plus|and then|as well as)\b")
+# Words a fast-path request may contain besides a category name, an order
+# number and a price filter. Anything else ("chairs", "2020", "stars")
+# changes the request in a way the tool call would ignore.
+_FILLER = frozenset("""
+    a an the me my i m s ll re ve d you your we us our it is are am be do does did can could would will please
+    hi hello hey thanks thank ok okay so just now yet any some all what which whats there here available
+    show list see browse have has sell carry got find looking look for in on of to at with stock
+    product products item items stuff things range selection
+    category categories kind kinds type types offer
+    order orders purchase purchases history status where track tracking happened shipped arrive arriving
+    when check number no id
+    under below less than cheaper up max maximum over above more least from between and dollars dollar usd bucks
+""".split())
+
+# Labelled utterances for the classifier; "other" is everything the LLM should handle
+TRAINING_EXAMPLES: Dict[str, List[str]] = {
+    "categories": [
+        "what categories do you have", "which categories are available", "list your categories",
+        "what do you sell", "what kinds of products do you carry", "show me the product categories",
+        "what can you offer", "categories please", "what types of products are there",
+        "which product categories do you stock",
+    ],
+    "order_status": [
+        "what is the status of my order", "where is my order", "status of order 42", "track order 17",
+        "has my order shipped", "where is order #1234", "show my orders", "what happened to my order",
+        "check my order status", "when will my order arrive", "list my orders", "order 5 status",
+    ],
+    "search": [
+        "what electronics do you have", "show me furniture under $300", "do you have any books",
+        "list toys below 50", "show me electronics", "what furniture do you sell", "any garden products",
+        "show me sports items over $100", "books between $10 and $20", "i am looking for furniture",
+        "do you carry toys", "show me books under 20 dollars", "what furniture products do you have",
+        "show me your garden products", "which sports products do you sell", "toys under $25",
+    ],
+    "other": [
+        "hello", "thanks", "i want to buy product 12", "recommend something for my office",
+        "compare the laptop and the desktop", "which laptop is best for gaming", "cancel my order",
+        "what should i get my mom", "can you help me", "buy two chairs", "i need something to sit on",
+        "how does shipping work", "what is your return policy", "suggest a gift under $50",
+        "is the desk chair ergonomic", "tell me more about product 3", "the cheapest keyboard you have",
+        "change the quantity of my order", "why is my order late",
+    ],
+}
+
+
+def _tokens(text: str) -> List[str]:
+    words = _WORD.findall(text.lower())
+    # Numbers only matter as "a number was given"
+    words = ["<num>" if w.lstrip("$").replace(".", "", 1).isdigit() else w for w in words]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class IntentClassifier:
+    """Multinomial naive Bayes over word unigrams and bigrams; trains in microseconds."""
+
+    def __init__(self, examples: Dict[str, List[str]] = TRAINING_EXAMPLES, alpha: float = 0.5):
+        self.alpha = alpha
+        self.counts: Dict[str, Counter] = {}
+        self.totals: Dict[str, int] = {}
+        self.priors: Dict[str, float] = {}
+        vocabulary = set()
+        n = sum(len(texts) for texts in examples.values())
+        for label, texts in examples.items():
+            counts = Counter(token for text in texts for token in _tokens(text))
+            self.counts[label] = counts
+            self.totals[label] = sum(counts.values())
+            self.priors[label] = math.log(len(texts) / n)
+            vocabulary.update(counts)
+        self.vocabulary_size = len(vocabulary)
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """The most likely label and its posterior probability."""
+        tokens = _tokens(text)
+        scores = {}
+        for label, counts in self.counts.items():
+            denominator = math.log(self.totals[label] + self.alpha * self.vocabulary_size)
+            scores[label] = self.priors[label] + sum(
+                math.log(counts[token] + self.alpha) - denominator for token in tokens
+            )
+        best = max(scores, key=scores.get)
+        norm = sum(math.exp(score - scores[best]) for score in scores.values())
+        return best, 1 / norm
+
+
+@dataclass
+class Intent:
+    name: str
+    tool: str
+    args: Dict[str, Any] = field(default_factory=dict)
+    confidence: float = 0.0
+
+
+class IntentRouter:
+    """Maps a customer message to a read-only tool call without the LLM, when it is unambiguous.
+
+    Regex rules extract the intent and its arguments; the classifier must
+    agree with at least ``min_confidence``. ``categories`` returns the
+    catalog's category names (read at most every ``categories_ttl`` seconds).
+    """
+
+    def __init__(
+        self,
+        categories: Callable[[], Sequence[str]],
+        classifier: Optional[IntentClassifier] = None,
+        min_confidence: float = MIN_CONFIDENCE,
+        categories_ttl: float = 60.0,
+    ):
+        self.categories = categories
+        self.classifier = classifier or IntentClassifier()
+        self.min_confidence = min_confidence
+        self.categories_ttl = categories_ttl
+        self.enabled = True
+        self._known: Tuple[float, Dict[str, str]] = (0.0, {})
+        self._lock = threading.Lock()
+
+    def _category_names(self) -> Dict[str, str]:
+        """Lower-case singular and plural spellings -> category name."""
+        loaded_at, known = self._known
+        if time.monotonic() - loaded_at < self.categories_ttl:
+            return known
+        with self._lock:
+            known = {}
+            for name in self.categories():
+                lowered = name.lower()
+                singular = lowered[:-1] if lowered.endswith("s") else lowered
+                known.update({lowered: name, singular: name, singular + "s": name})
+            self._known = (time.monotonic(), known)
+        return known
+
+    def _rule(self, text: str) -> Optional[Intent]:
+        if _VETO.search(text) or _NEGATION.search(text) or _CLAUSES.search(text.rstrip("?!. ")):
+            return None
+        intent, consumed = self._match(text)
+        if intent is None:
+            return None
+        # Whatever the intent did not use must be filler, or the LLM answers
+        rest = text
+        for start, end in reversed(consumed):
+            rest = rest[:start] + " " + rest[end:]
+        known = self._category_names()
+        if any(word not in _FILLER and word not in known for word in _WORD.findall(rest)):
+            return None
+        return intent
+
+    def _match(self, text: str) -> Tuple[Optional[Intent], List[Tuple[int, int]]]:
+        """The intent the rules see in ``text`` and the spans of its order number or price filters."""
+        order_id = _ORDER_ID.search(text)
+        if _ORDER_STATUS.search(text) or _MY_ORDERS.search(text):
+            if order_id:
+                args = {"order_id": order_id.group(1) or order_id.group(2)}
+                return Intent("order_status", "check_order_status", args), [order_id.span()]
+            if _MY_ORDERS.search(text) or re.search(r"\bmy order\b", text):
+                return Intent("order_status", "check_order_status", {"order_id": None}), []
+            return None, []
+        if _CATEGORIES.search(text):
+            return Intent("categories", "get_available_categories"), []
+
+        known = self._category_names()
+        mentioned = {known[w] for w in _WORD.findall(text) if w in known}
+        if len(mentioned) != 1:
+            return None, []
+        args: Dict[str, Any] = {"category": mentioned.pop()}
+        consumed = []
+        between = _BETWEEN.search(text)
+        if between and (between.group(1) or between.group(3) or between.group(5)):
+            args["min_price"], args["max_price"] = sorted(float(v) for v in between.group(2, 4))
+            consumed.append(between.span())
+        elif not between:
+            for key, pattern in (("max_price", _MAX_PRICE), ("min_price", _MIN_PRICE)):
+                if (match := pattern.search(text)):
+                    args[key] = float(match.group(1) or match.group(2))
+                    consumed.append(match.span())
+        # A bare category name is not a request; a browsing verb or a price filter makes it one
+        if len(args) == 1 and not _BROWSE.search(text):
+            return None, []
+        return Intent("search", "search_products", args), sorted(consumed)
+
+    def route(self, text: str) -> Optional[Intent]:
+        """The fast-path intent for ``text``, or None to let the LLM handle it."""
+        text = " ".join(text.lower().split())
+        intent = self._rule(text)
+        if intent is None:
+            return None
+        label, confidence = self.classifier.predict(text)
+        if label != intent.name or confidence < self.min_confidence:
+            return None
+        intent.confidence = confidence
+        return intent
+
+    def __call__(self, state, config=None) -> Dict[str, Any]:
+        """Graph node: answer the new human message with a direct tool call when possible."""
+        messages = state.get("messages", [])
+        last = messages[-1] if messages else None
+        if not self.enabled or not isinstance(last, HumanMessage):
+            return {}
+        intent = self.route(str(last.content))
+        if intent is None:
+            ROUTER_DECISIONS.labels("none", "llm").inc()
+            return {}
+        ROUTER_DECISIONS.labels(intent.name, "fast_path").inc()
+        return {"messages": [AIMessage(
+            content="",
+            tool_calls=[{"name": intent.tool, "args": intent.args, "id": f"call_fast_{uuid.uuid4().hex[:16]}"}],
+            response_metadata={"fast_path": intent.name, "confidence": round(intent.confidence, 3)},
+        )]}
+
+    async def acall(self, state, config=None) -> Dict[str, Any]:
+        # The category list may come from SQLite
+        return await asyncio.to_thread(self, state, config)
+
+
+def is_fast_path(message: Optional[AnyMessage]) -> bool:
+    return isinstance(message, AIMessage) and "fast_path" in (message.response_metadata or {})
+
+
+def _price(value: Any) -> str:
+    return f"${float(value):,.2f}"
+
+
+def _filters(args: Dict[str, Any]) -> str:
+    parts = []
+    if args.get("min_price") is not None and args.get("max_price") is not None:
+        parts.append(f"between {_price(args['min_price'])} and {_price(args['max_price'])}")
+    elif args.get("max_price") is not None:
+        parts.append(f"under {_price(args['max_price'])}")
+    elif args.get("min_price") is not None:
+        parts.append(f"over {_price(args['min_price'])}")
+    return (" " + " ".join(parts)) if parts else ""
+
+
+def format_reply(intent: str, args: Dict[str, Any], result: Any) -> Optional[str]:
+    """Template answer for a fast-path tool result; None hands the turn to the LLM."""
+    if not isinstance(result, dict) or "error" in result:
+        return None
+    if intent == "categories":
+        categories = result.get("categories") or []
+        if not categories:
+            return None
+        lines = "\n".join(f"- {name}" for name in categories)
+        return f"🛍️ Here are the categories we currently carry:\n{lines}\n\nWhich one would you like to browse?"
+    if intent == "search":
+        products = result.get("products") or []
+        if not products:
+            return None
+        lines = "\n".join(
+            f"- **{p.get('name')}** — {_price(p['price'])} ({p.get('quantity')} in stock)" for p in products
+        )
+        more = "\n\nThere are more results; just ask to see more. ✨" if result.get("has_more") else ""
+        return f"🔎 Here's what we have in {args['category']}{_filters(args)}:\n{lines}{more}"
+    if intent == "order_status":
+        if args.get("order_id") is not None:
+            if "status" not in result:
+                return None
+            total = f", total {_price(result['total'])}" if result.get("total") is not None else ""
+            return f"📦 Order #{result.get('id')} is **{result['status']}**{total}."
+        orders = result.get("orders")
+        if orders is None:
+            return None
+        if not orders:
+            return "📦 You don't have any orders yet. Want me to help you find something?"
+        lines = "\n".join(
+            f"- Order #{o['id']} from {str(o.get('order_date', ''))[:10]}: **{o.get('status')}**" for o in orders
+        )
+        more = "\n\nThese are your most recent orders; ask to see older ones." if result.get("has_more") else ""
+        return f"📦 Here are your orders:\n{lines}{more}"
+    return None
+
+
+def _structured(message: Optional[ToolMessage]) -> Any:
+    if message is None or message.status == "error":
+        return None
+    if message.artifact is not None:
+        return message.artifact
+    try:
+        return json.loads(message.content)
+    except (TypeError, ValueError):
+        return None
+
+
+def fast_reply(state, config=None) -> Dict[str, Any]:
+    """Graph node after a fast-path tool call: template the answer, or leave it to the assistant."""
+    messages = state.get("messages", [])
+    call_message = next((m for m in reversed(messages) if isinstance(m, AIMessage)), None)
+    if not is_fast_path(call_message):
+        return {}
+    call = call_message.tool_calls[0]
+    result = next(
+        (m for m in reversed(messages) if isinstance(m, ToolMessage) and m.tool_call_id == call["id"]), None
+    )
+    intent = call_message.response_metadata["fast_path"]
+    content = format_reply(intent, call["args"], _structured(result))
+    if content is None:
+        ROUTER_DECISIONS.labels(intent, "fallback").inc()
+        return {}
+    return {"messages": [AIMessage(content=content, response_metadata={"fast_path": intent})]}
@@ -0,0 +1,306 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import (
+    AIMessage,
+    AnyMessage,
+    BaseMessage,
+    HumanMessage,
+    ToolMessage,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableBinding, RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_llm_responses_lru ON llm_responses (last_access);
+"""
+
+# Model fields that do not change what the model generates
+NON_SEMANTIC_FIELDS = {
+    "callbacks", "callback_manager", "cache", "verbose", "tags", "metadata",
+    "rate_limiter", "disable_streaming", "base_url", "client_kwargs", "custom_get_token_ids",
+}
+
+# Values that change on every call but not the answer: rendered timestamps in
+# system prompts ("Time: 2024-05-01 12:03:44.123"), replaced before hashing.
+VOLATILE_PATTERNS = [
+    re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?([+-]\d{2}:?\d{2}|Z)?"),
+]
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str, volatile_patterns: Sequence[re.Pattern] = VOLATILE_PATTERNS) -> str:
+    for pattern in volatile_patterns:
+        text = pattern.sub("<time>", text)
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def _to_messages(value: Any) -> List[BaseMessage]:
+    if isinstance(value, PromptValue):
+        return value.to_messages()
+    if isinstance(value, str):
+        return [HumanMessage(content=value)]
+    return list(value)
+
+
+def model_fingerprint(runnable: Runnable) -> str:
+    """Model parameters plus bound kwargs (tool schemas, stop words, format).
+
+    Unwraps ``llm.bind_tools(...)``/``llm.bind(...)`` layers so two bindings
+    of the same model with different tools never share entries.
+    """
+    kwargs: Dict[str, Any] = {}
+    while isinstance(runnable, RunnableBinding):
+        kwargs = {**runnable.kwargs, **kwargs}
+        runnable = runnable.bound
+    params: Dict[str, Any] = {"class": type(runnable).__name__}
+    if hasattr(runnable, "model_dump"):
+        params.update(runnable.model_dump(exclude=NON_SEMANTIC_FIELDS, exclude_none=True))
+    return json.dumps({"model": params, "bound": kwargs}, sort_keys=True, default=str)
+
+
+class ResponseCache:
+    """LLM responses stored in SQLite, bounded by entry count (LRU) and age (TTL).
+
+    Entries are stored as message dicts, so tool calls and metadata
+    round-trip. Reads bump ``last_access``; every ``evict_every`` writes the
+    least recently used rows beyond ``max_entries`` are deleted.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "llm_cache.db",
+        *,
+        max_entries: int = 5000,
+        ttl_seconds: Optional[float] = 24 * 3600,
+        evict_every: int = 100,
+    ):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.evict_every = evict_every
+        self._writes_since_evict = 0
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(RESPONSE_CACHE_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    def get(self, key: str) -> Optional[BaseMessage]:
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self.conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+        return messages_from_dict([json.loads(row[0])])[0]
+
+    def put(self, key: str, message: BaseMessage) -> None:
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(message_to_dict(message)), now, now),
+            )
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.evict_every:
+                self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used ones over ``max_entries``."""
+        with self._lock:
+            self._writes_since_evict = 0
+            removed = 0
+            if self.ttl_seconds is not None:
+                removed += self.conn.execute(
+                    "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+                ).rowcount
+            removed += self.conn.execute(
+                """DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )""",
+                (self.max_entries,),
+            ).rowcount
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM llm_responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+
+class CacheStats:
+    """Hit/miss/bypass counters and cumulative latency per outcome."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hit": 0, "miss": 0, "bypass": 0}
+        self.seconds = {"hit": 0.0, "miss": 0.0, "bypass": 0.0}
+
+    def record(self, outcome: str, seconds: float) -> None:
+        with self._lock:
+            self.counts[outcome] += 1
+            self.seconds[outcome] += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.counts["hit"] + self.counts["miss"]
+            stats: Dict[str, float] = {
+                "hits": self.counts["hit"],
+                "misses": self.counts["miss"],
+                "bypassed": self.counts["bypass"],
+                "hit_rate": self.counts["hit"] / lookups if lookups else 0.0,
+            }
+            for outcome, count in self.counts.items():
+                stats[f"avg_{outcome}_seconds"] = self.seconds[outcome] / count if count else 0.0
+            return stats
+
+
+class CachedChatModel(Runnable[Any, BaseMessage]):
+    """Serves repeated prompts from a ResponseCache instead of the wrapped model.
+
+    Wraps a chat model or a ``bind_tools`` binding and is used in its place
+    (``prompt | CachedChatModel(llm.bind_tools(tools), cache)``). The key is
+    a hash of the model fingerprint and the normalised messages. Prompts that
+    contain a result of one of ``bypass_tools`` (per-customer or time-sensitive
+    data such as order status) always go to the model and are never stored.
+    """
+
+    def __init__(
+        self,
+        bound: Runnable,
+        cache: ResponseCache,
+        *,
+        bypass_tools: Iterable[str] = (),
+        volatile_patterns: Sequence[re.Pattern] = VOLATILE_PATTERNS,
+        stats: Optional[CacheStats] = None,
+    ):
+        self.bound = bound
+        self.cache = cache
+        self.bypass_tools = frozenset(bypass_tools)
+        self.volatile_patterns = volatile_patterns
+        self.stats = stats or CacheStats()
+        self.fingerprint = model_fingerprint(bound)
+
+    def _should_bypass(self, messages: Sequence[AnyMessage]) -> bool:
+        return any(
+            isinstance(message, ToolMessage) and message.name in self.bypass_tools
+            for message in messages
+        )
+
+    def cache_key(self, messages: Sequence[AnyMessage]) -> str:
+        parts: List[Tuple[Any, ...]] = []
+        for message in messages:
+            content = message.content if isinstance(message.content, str) else json.dumps(message.content, sort_keys=True)
+            content = normalize_text(content, self.volatile_patterns)
+            if isinstance(message, HumanMessage):
+                content = content.lower()
+            tool_calls = [
+                (call["name"], json.dumps(call["args"], sort_keys=True))
+                for call in getattr(message, "tool_calls", None) or []
+            ]
+            parts.append((message.type, getattr(message, "name", None), content, tool_calls))
+        payload = json.dumps([self.fingerprint, parts], default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _fresh_copy(message: BaseMessage) -> BaseMessage:
+        """A cached message with new ids, so it never replaces a message already in state."""
+        if not isinstance(message, AIMessage):
+            return message.model_copy(update={"id": None})
+        tool_calls = [{**call, "id": f"call_{uuid.uuid4().hex[:24]}"} for call in message.tool_calls]
+        return message.model_copy(update={
+            "id": None,
+            "tool_calls": tool_calls,
+            "response_metadata": {**message.response_metadata, "cache": "hit"},
+        })
+
+    def _lookup(self, messages: Sequence[AnyMessage]) -> Tuple[Optional[str], Optional[BaseMessage]]:
+        """(key, cached reply); key is None when the prompt must bypass the cache."""
+        if self._should_bypass(messages):
+            return None, None
+        key = self.cache_key(messages)
+        try:
+            return key, self.cache.get(key)
+        except Exception as e:
+            logger.warning("LLM cache read failed: %s", e)
+            return key, None
+
+    def _store(self, key: str, result: BaseMessage) -> None:
+        # Empty replies and failed generations are not worth replaying
+        if result.content or getattr(result, "tool_calls", None):
+            try:
+                self.cache.put(key, result)
+            except Exception as e:
+                logger.warning("LLM cache write failed: %s", e)
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        started = time.perf_counter()
+        key, cached = self._lookup(_to_messages(input))
+        if cached is not None:
+            self.stats.record("hit", time.perf_counter() - started)
+            return self._fresh_copy(cached)
+        result = self.bound.invoke(input, config, **kwargs)
+        if key is None:
+            self.stats.record("bypass", time.perf_counter() - started)
+            return result
+        self._store(key, result)
+        self.stats.record("miss", time.perf_counter() - started)
+        return result
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> BaseMessage:
+        # Cache reads and writes go through SQLite (and may wait for the
+        # cache lock), so they run in a worker thread, off the event loop
+        started = time.perf_counter()
+        key, cached = await asyncio.to_thread(self._lookup, _to_messages(input))
+        if cached is not None:
+            self.stats.record("hit", time.perf_counter() - started)
+            return self._fresh_copy(cached)
+        result = await self.bound.ainvoke(input, config, **kwargs)
+        if key is None:
+            self.stats.record("bypass", time.perf_counter() - started)
+            return result
+        await asyncio.to_thread(self._store, key, result)
+        self.stats.record("miss", time.perf_counter() - started)
+        return result
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "CachedChatModel":
+        return CachedChatModel(
+            self.bound.bind_tools(tools, **kwargs),
+            self.cache,
+            bypass_tools=self.bypass_tools,
+            volatile_patterns=self.volatile_patterns,
+            stats=self.stats,
+        )
@@ -0,0 +1,137 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# Levels at or below this are "verbose" and go through SamplingFilter
+VERBOSE_LEVEL = logging.DEBUG
+MAX_IDS = 5
+MAX_SCALAR_CHARS = 80
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    sample_every: Optional[int] = None,
+    sampled_loggers: Sequence[str] = ("tools",),
+) -> None:
+    """Route all logging through a queue drained by one background thread.
+
+    Call from entry points; only the first call does anything. Handlers
+    already on the root logger (or a stderr handler, as with basicConfig)
+    move behind the queue, so the request thread only builds the record and
+    enqueues it; the message (``%`` arguments, ``summarize``) is formatted
+    on the listener thread. Log arguments are therefore read after the call
+    returns and should not be mutated afterwards. ``LOG_LEVEL`` (default INFO) and ``LOG_SAMPLE_EVERY``
+    (default 10) override the arguments; verbose records of
+    ``sampled_loggers`` pass 1 in ``sample_every`` times per call site.
+    """
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger()
+        handlers = list(root.handlers)
+        if not handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+            handlers = [handler]
+        for handler in handlers:
+            root.removeHandler(handler)
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root.addHandler(DeferredQueueHandler(log_queue))
+        root.setLevel(os.getenv("LOG_LEVEL", level or "INFO").upper())
+
+        every = int(os.getenv("LOG_SAMPLE_EVERY", sample_every or 10))
+        if every > 1:
+            for name in sampled_loggers:
+                logging.getLogger(name).addFilter(SamplingFilter(every))
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        # Flush what is still queued before the interpreter tears down
+        atexit.register(_listener.stop)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records as they are; QueueHandler.prepare would format them on the calling thread.
+
+    The queue never leaves the process, so records need not be made picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """Pass 1 in ``every`` verbose records per call site; higher levels always pass."""
+
+    def __init__(self, every: int, level: int = VERBOSE_LEVEL):
+        super().__init__()
+        self.every = every
+        self.level = level
+        self._seen: Dict[Tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.level:
+            return True
+        key = (record.pathname, record.lineno)
+        # A lost update under contention only shifts which record is sampled
+        seen = self._seen.get(key, 0)
+        self._seen[key] = seen + 1
+        return seen % self.every == 0
+
+
+class summarize:
+    """Lazy one-line summary of a tool result for ``%s`` log arguments.
+
+    Nothing is computed unless the record is emitted. Lists are reported as
+    item counts plus the first few ids, never as full payloads:
+
+        logger.info("Search results: %s", summarize(result))
+        # Search results: products=120 items (ids 4, 9, 17, 23, 31, ...), count=120
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __str__(self) -> str:
+        return describe(self.value)
+
+
+def describe(value: Any) -> str:
+    if isinstance(value, dict):
+        return ", ".join(f"{key}={_describe_field(item)}" for key, item in value.items())
+    return _describe_field(value)
+
+
+def _describe_field(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        ids = [_item_id(item) for item in value[:MAX_IDS]]
+        if value and all(i is not None for i in ids):
+            more = ", ..." if len(value) > MAX_IDS else ""
+            return f"{len(value)} items (ids {', '.join(map(str, ids))}{more})"
+        return f"{len(value)} items"
+    if isinstance(value, dict):
+        return f"{{{len(value)} keys}}"
+    text = str(value)
+    return text if len(text) <= MAX_SCALAR_CHARS else text[:MAX_SCALAR_CHARS] + "..."
+
+
+def _item_id(item: Any) -> Any:
+    if isinstance(item, dict):
+        for key in ("id", "product_id", "order_id"):
+            if key in item:
+                return item[key]
+        return None
+    if isinstance(item, (str, int, float)):
+        return item if len(str(item)) <= 40 else None
+    return None
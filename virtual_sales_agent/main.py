@@ -3,18 +3,31 @@ import uuid
 import logging
 import streamlit as st
 from langchain_core.messages import AIMessage, HumanMessage
-from langchain_core.messages.tool import ToolMessage
 
-from graph import graph
+from log_setup import configure_logging
+from streaming import StreamingHandler
+from utils import pending_tool_calls, rejection_messages
 
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@st.cache_resource
+def get_graph():
+    """Compiled graph, LLM clients and checkpointer, built once per server process.
+
+    Streamlit re-runs this script on every interaction; everything heavy
+    lives behind this cache and is shared by all browser sessions.
+    """
+    from graph import graph
+    from tools import start_semantic_index_warmup
+    start_semantic_index_warmup()
+    return graph
+
 def set_page_config():
     st.set_page_config(
         page_title="Local Sales Agent",
@@ -24,12 +37,10 @@ def set_page_config():
     )
 
 def initialize_session_state():
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
     if "thread_id" not in st.session_state:
         st.session_state.thread_id = str(uuid.uuid4())
-    if "pending_approval" not in st.session_state:
-        st.session_state.pending_approval = None
+    if "turn_metrics" not in st.session_state:
+        st.session_state.turn_metrics = []
     if "config" not in st.session_state:
         st.session_state.config = {
             "configurable": {
@@ -38,45 +49,105 @@ def initialize_session_state():
             }
         }
 
-def display_chat():
+def conversation_state():
+    # The checkpoint is the only copy of the conversation
+    return get_graph().get_state(st.session_state.config)
+
+def display_chat(messages):
     st.markdown("## 💬 Virtual Sales Assistant")
 
-    for msg in st.session_state.messages:
+    for msg in messages:
         if isinstance(msg, HumanMessage):
             with st.chat_message("user"):
                 st.write(msg.content)
-        elif isinstance(msg, AIMessage):
+        elif isinstance(msg, AIMessage) and msg.content:
             with st.chat_message("assistant"):
                 st.write(msg.content)
 
 # In main.py
 
-def process_input():
-    if prompt := st.chat_input("How can I help?"):
-        st.session_state.messages.append(HumanMessage(content=prompt))
-        logger.info(f"User Input: {prompt}")
-
-        with st.spinner("Thinking..."):
-            try:
-                events = graph.stream(
-                    {"messages": st.session_state.messages},
-                    st.session_state.config
-                )
-
-                    for event in events:
-                       if "messages" in event:
-                          for msg in event["messages"]:
-                             if isinstance(msg, AIMessage):
-                               content = msg.content or parse_tool_results(msg.tool_calls)
-                               st.session_state.messages.append(AIMessage(content=content))
-                               display_message(content)
-                             elif isinstance(msg, ToolMessage):
-                    st.session_state.messages.append(msg)
-                    display_message(f"🔧 System: {format_tool_result(msg.content)}")
-
-            except Exception as e:
-                logger.error(f"Error processing input: {str(e)}")
-                st.error(f"Error: {str(e)}")
+def format_tool_result(message, limit: int = 300) -> str:
+    # The structured result rides along as the artifact; content is what the model saw
+    if message.artifact is not None:
+        content = json.dumps(message.artifact, indent=1)
+    else:
+        content = str(message.content)
+    return content if len(content) <= limit else content[:limit] + " …"
+
+def run_turn(inputs):
+    """Stream one graph run into an assistant bubble; ``inputs=None`` resumes."""
+    with st.chat_message("assistant"):
+        activity = st.container()
+        placeholder = st.empty()
+        placeholder.markdown("_Thinking..._")
+        streamed = []
+
+        def on_token(text):
+            streamed.append(text)
+            placeholder.markdown("".join(streamed) + "▌")
+
+        def on_tool_start(tool_call):
+            activity.caption(f"🔧 Calling `{tool_call['name']}` {json.dumps(tool_call['args'])}")
+
+        def on_tool_end(message):
+            activity.caption(f"✅ `{message.name}`: {format_tool_result(message)}")
+
+        def on_message(message):
+            if isinstance(message, AIMessage) and message.content:
+                placeholder.markdown(message.content)
+                streamed.clear()
+
+        handler = StreamingHandler(on_token, on_tool_start, on_tool_end, on_message)
+        try:
+            result = handler.run(get_graph(), inputs, st.session_state.config)
+            if result.interrupted:
+                placeholder.warning("This action needs approval before it runs.")
+            metrics = result.metrics
+            st.session_state.turn_metrics.append({
+                "ttft": metrics.time_to_first_token,
+                "total": metrics.total_latency,
+            })
+            ttft = metrics.time_to_first_token
+            st.caption(
+                f"⏱ first token {ttft:.2f}s · total {metrics.total_latency:.2f}s"
+                if ttft is not None else f"⏱ total {metrics.total_latency:.2f}s"
+            )
+        except Exception as e:
+            logger.error("Error processing input: %s", e)
+            st.error(f"Error: {str(e)}")
+
+def process_approval(state):
+    _, pending = pending_tool_calls(state.values.get("messages", []))
+    with st.chat_message("assistant"):
+        st.warning("Approval needed for: " + ", ".join(
+            f"`{call['name']}` {json.dumps(call['args'])}" for call in pending
+        ))
+        approve, reject = st.columns(2)
+        approved = approve.button("✅ Approve", use_container_width=True)
+        rejected = reject.button("❌ Reject", use_container_width=True)
+    if rejected:
+        get_graph().update_state(
+            st.session_state.config,
+            {"messages": rejection_messages(pending, "declined by the customer")},
+            as_node="sensitive_tools",
+        )
+    if approved or rejected:
+        run_turn(None)
+        st.rerun()
+
+def process_input(waiting_for_approval):
+    if prompt := st.chat_input("How can I help?", disabled=waiting_for_approval):
+        logger.info("User Input: %s", prompt)
+        with st.chat_message("user"):
+            st.write(prompt)
+        # Only the new message is sent; earlier turns are already in the checkpoint
+        run_turn({
+            "messages": [HumanMessage(content=prompt)],
+            "user_info": st.session_state.config["configurable"]["customer_id"],
+        })
+        if conversation_state().next:
+            st.rerun()
+
 def main():
     set_page_config()
     initialize_session_state()
@@ -88,8 +159,11 @@ def main():
     </style>
     """, unsafe_allow_html=True)
 
-    display_chat()
-    process_input()
+    state = conversation_state()
+    display_chat(state.values.get("messages", []))
+    if state.next:
+        process_approval(state)
+    process_input(waiting_for_approval=bool(state.next))
 
 if __name__ == "__main__":
     main()
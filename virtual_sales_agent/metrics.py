@@ -0,0 +1,341 @@
+import functools
+import math
+import re
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Bucket upper bounds, in seconds unless the metric says otherwise. Every
+# histogram is a fixed array of counters: observing a value is a bisect and
+# two in-place updates under a lock, with nothing allocated per event.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SQL_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+APPROVAL_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 900, 1800, 3600, 14400, 86400)
+TOKENS_PER_SECOND_BUCKETS = (1, 2.5, 5, 10, 20, 40, 80, 160, 320)
+PROMPT_TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        """Decorator recording the wall time of each call."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def state(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> Optional[float]:
+        """Estimate from the buckets, interpolating linearly inside the bucket."""
+        counts = counts if counts is not None else self.state()[0]
+        total = sum(counts)
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class Counter:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Family:
+    """A metric name with one child (Histogram or Counter) per label combination.
+
+    Look children up once with ``labels(...)`` and keep them; the lookup is
+    the only part that touches a dict.
+    """
+
+    def __init__(self, kind: str, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.kind = kind
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = Histogram(self.buckets) if self.kind == "histogram" else Counter()
+                    self._children[key] = child
+        return child
+
+    def children(self) -> List[Tuple[Dict[str, str], Any]]:
+        with self._lock:
+            items = list(self._children.items())
+        return [(dict(zip(self.labelnames, key)), child) for key, child in items]
+
+
+class Registry:
+    def __init__(self):
+        self._families: Dict[str, Family] = {}
+        # name -> (help, type, callable returning [(labels, value)]), read at scrape time
+        self._collectors: Dict[str, Tuple[str, str, Callable[[], Iterable[Tuple[Dict[str, str], float]]]]] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, kind, name, help, labelnames, buckets=LATENCY_BUCKETS) -> Family:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = Family(kind, name, help, labelnames, buckets)
+            return family
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Family:
+        return self._family("histogram", name, help, labelnames, buckets)
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Family:
+        return self._family("counter", name, help, labelnames)
+
+    def collector(self, name: str, help: str, collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]],
+                  kind: str = "gauge") -> None:
+        """Register values computed on demand, e.g. from existing cache statistics."""
+        with self._lock:
+            self._collectors[name] = (help, kind, collect)
+
+    def _collected(self):
+        with self._lock:
+            collectors = list(self._collectors.items())
+        for name, (help, kind, collect) in collectors:
+            try:
+                samples = list(collect())
+            except Exception:
+                samples = []
+            yield name, help, kind, samples
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            lines.append(f"# HELP {family.name} {family.help}")
+            lines.append(f"# TYPE {family.name} {family.kind}")
+            for labels, child in family.children():
+                if family.kind == "counter":
+                    lines.append(f"{family.name}{_labels(labels)} {_number(child.value)}")
+                    continue
+                counts, total = child.state()
+                cumulative = 0
+                for bound, count in zip(child.bounds + (math.inf,), counts):
+                    cumulative += count
+                    lines.append(f"{family.name}_bucket{_labels({**labels, 'le': _number(bound)})} {cumulative}")
+                lines.append(f"{family.name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{family.name}_count{_labels(labels)} {cumulative}")
+        for name, help, kind, samples in self._collected():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly view: counts, sums and estimated p50/p95/p99 per series."""
+        result: Dict[str, Any] = {}
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            series = []
+            for labels, child in family.children():
+                if family.kind == "counter":
+                    series.append({"labels": labels, "value": child.value})
+                    continue
+                counts, total = child.state()
+                count = sum(counts)
+                series.append({
+                    "labels": labels,
+                    "count": count,
+                    "sum": total,
+                    "mean": total / count if count else None,
+                    **{f"p{int(q * 100)}": child.quantile(q, counts) for q in (0.5, 0.95, 0.99)},
+                })
+            result[family.name] = {"type": family.kind, "help": family.help, "series": series}
+        for name, help, kind, samples in self._collected():
+            result[name] = {
+                "type": kind, "help": help,
+                "series": [{"labels": labels, "value": value} for labels, value in samples],
+            }
+        return result
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+REGISTRY = Registry()
+
+NODE_SECONDS = REGISTRY.histogram("sales_graph_node_seconds", "Graph node run time", ["node"])
+TOOL_SECONDS = REGISTRY.histogram("sales_tool_seconds", "Tool call time, cache hits included", ["tool"])
+SQL_SECONDS = REGISTRY.histogram(
+    "sales_sql_statement_seconds", "SQLite statement time by normalised statement", ["statement"], SQL_BUCKETS
+)
+LLM_SECONDS = REGISTRY.histogram("sales_llm_generation_seconds", "Assistant LLM call time", ["cache"])
+LLM_TOKENS_PER_SECOND = REGISTRY.histogram(
+    "sales_llm_tokens_per_second", "Completion tokens per second of uncached generations", (),
+    TOKENS_PER_SECOND_BUCKETS,
+)
+LLM_TOKENS = REGISTRY.counter("sales_llm_tokens_total", "Tokens of uncached generations", ["kind"])
+# Reported by Ollama per call: tokens it had to evaluate, i.e. the prompt
+# minus the prefix still in its KV cache, and the time that took
+LLM_PROMPT_EVAL_TOKENS = REGISTRY.histogram(
+    "sales_llm_prompt_eval_tokens", "Prompt tokens evaluated by the model server per generation", (),
+    PROMPT_TOKEN_BUCKETS,
+)
+LLM_PROMPT_EVAL_SECONDS = REGISTRY.histogram(
+    "sales_llm_prompt_eval_seconds", "Prompt evaluation time reported by the model server", ()
+)
+LLM_LOAD_SECONDS = REGISTRY.histogram(
+    "sales_llm_load_seconds", "Model load time reported by the model server (cold starts)", ()
+)
+ROUTER_DECISIONS = REGISTRY.counter(
+    "sales_router_decisions_total", "Turns by fast-path intent and route (fast_path, fallback, llm)", ["intent", "route"]
+)
+APPROVAL_WAIT_SECONDS = REGISTRY.histogram(
+    "sales_approval_wait_seconds", "Time threads spent paused at the approval interrupt", (), APPROVAL_BUCKETS
+)
+
+_prompt_tokens = LLM_TOKENS.labels("prompt")
+_completion_tokens = LLM_TOKENS.labels("completion")
+_llm_cached = LLM_SECONDS.labels("hit")
+_llm_generated = LLM_SECONDS.labels("miss")
+_tokens_per_second = LLM_TOKENS_PER_SECOND.labels()
+_prompt_eval_tokens = LLM_PROMPT_EVAL_TOKENS.labels()
+_prompt_eval_seconds = LLM_PROMPT_EVAL_SECONDS.labels()
+_load_seconds = LLM_LOAD_SECONDS.labels()
+_approval_wait = APPROVAL_WAIT_SECONDS.labels()
+
+
+def observe_generation(message: Any, seconds: float) -> None:
+    """Record one assistant LLM call.
+
+    Token counts come from ``usage_metadata``; prompt evaluation and load
+    times from the Ollama fields in ``response_metadata`` (nanoseconds).
+    """
+    response_metadata = getattr(message, "response_metadata", None) or {}
+    if response_metadata.get("cache") == "hit":
+        _llm_cached.observe(seconds)
+        return
+    _llm_generated.observe(seconds)
+    if response_metadata.get("prompt_eval_count") is not None:
+        _prompt_eval_tokens.observe(response_metadata["prompt_eval_count"])
+        _prompt_eval_seconds.observe((response_metadata.get("prompt_eval_duration") or 0) / 1e9)
+    if response_metadata.get("load_duration") is not None:
+        _load_seconds.observe(response_metadata["load_duration"] / 1e9)
+    usage = getattr(message, "usage_metadata", None)
+    if usage:
+        _prompt_tokens.inc(usage.get("input_tokens", 0))
+        _completion_tokens.inc(usage.get("output_tokens", 0))
+        if seconds > 0 and usage.get("output_tokens"):
+            _tokens_per_second.observe(usage["output_tokens"] / seconds)
+
+
+def observe_approval_wait(seconds: float) -> None:
+    _approval_wait.observe(seconds)
+
+
+# --- SQL statements -------------------------------------------------------
+
+MAX_STATEMENT_LABELS = 256
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+_statement_children: Dict[str, Histogram] = {}
+
+
+def _statement_histogram(sql: str) -> Histogram:
+    """Histogram for a statement; IN (?, ?, ...) lists of any length share one label."""
+    child = _statement_children.get(sql)
+    if child is None:
+        if len(_statement_children) >= MAX_STATEMENT_LABELS:
+            return SQL_SECONDS.labels("other")
+        label = _IN_LIST.sub("(?...)", _SPACE.sub(" ", sql).strip())[:160]
+        child = _statement_children[sql] = SQL_SECONDS.labels(label)
+    return child
+
+
+class TimedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _statement_histogram(sql).observe(time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _statement_histogram(sql).observe(time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection factory that times every statement (``sqlite3.connect(..., factory=TimedConnection)``)."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
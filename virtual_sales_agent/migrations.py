@@ -0,0 +1,169 @@
+import logging
+import sqlite3
+from typing import Callable, List, Tuple
+
+from recommender import create_recommendation_tables
+from search_index import PRODUCT_SEARCH_SCHEMA
+from tool_cache import DATA_VERSION_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+BASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS orders (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    customer_id TEXT NOT NULL,
+    order_date TEXT NOT NULL,
+    status TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS order_items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    order_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price REAL NOT NULL,
+    FOREIGN KEY (order_id) REFERENCES orders(id),
+    FOREIGN KEY (product_id) REFERENCES products(id)
+);
+"""
+
+# Each index is shaped after a query in tools.py; the trailing columns make
+# the index covering so SQLite never has to visit the table rows.
+INDEXES = """
+-- search_products: LOWER(category) = ? with an optional price range
+CREATE INDEX IF NOT EXISTS idx_products_category_lower_price
+    ON products (LOWER(category), price);
+-- search_products: price range without a category
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+-- get_available_categories and category IN (...) recommendations
+CREATE INDEX IF NOT EXISTS idx_products_category_quantity
+    ON products (category COLLATE NOCASE, quantity);
+-- check_order_status without an order id (superseded in migration 8)
+CREATE INDEX IF NOT EXISTS idx_orders_customer_date
+    ON orders (customer_id, order_date, status);
+-- order totals and the customer's category history
+CREATE INDEX IF NOT EXISTS idx_order_items_order
+    ON order_items (order_id, product_id, quantity, unit_price);
+-- popular products for customers without history
+CREATE INDEX IF NOT EXISTS idx_order_items_product
+    ON order_items (product_id, quantity);
+"""
+
+
+# Catalog edits are appended here so in-process indexes (semantic_index.py)
+# can catch up incrementally instead of re-reading the whole catalog.
+PRODUCT_CHANGE_LOG = """
+CREATE TABLE IF NOT EXISTS product_change_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS product_change_log_ai AFTER INSERT ON products BEGIN
+    INSERT INTO product_change_log (product_id) VALUES (new.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_change_log_ad AFTER DELETE ON products BEGIN
+    INSERT INTO product_change_log (product_id) VALUES (old.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS product_change_log_au AFTER UPDATE OF name, description ON products BEGIN
+    INSERT INTO product_change_log (product_id) VALUES (new.id);
+END;
+"""
+
+
+def _run_script(script: str) -> Callable[[sqlite3.Connection], None]:
+    def step(conn: sqlite3.Connection) -> None:
+        conn.executescript(script)
+    return step
+
+
+def _rebuild_search_index(conn: sqlite3.Connection) -> None:
+    conn.executescript(PRODUCT_SEARCH_SCHEMA)
+    conn.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+
+
+def _create_product_change_log(conn: sqlite3.Connection) -> None:
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_change_log'"
+    ).fetchone()
+    conn.executescript(PRODUCT_CHANGE_LOG)
+    if not exists:
+        conn.execute("INSERT INTO product_change_log (product_id) SELECT id FROM products")
+
+
+# Keyset pages of a customer's orders, newest first: (order_date, id) is the
+# page key, so id moves in front of status and the old index goes.
+ORDER_PAGE_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_orders_customer_date_id
+    ON orders (customer_id, order_date, id, status);
+DROP INDEX IF EXISTS idx_orders_customer_date;
+"""
+
+
+# recommend(): in-stock products of a category in id order. Partial, so the
+# range read skips sold-out rows and needs no sort.
+IN_STOCK_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_products_in_stock_category
+    ON products (category COLLATE NOCASE, id) WHERE quantity > 0;
+"""
+
+
+def _analyze(conn: sqlite3.Connection) -> None:
+    conn.execute("ANALYZE")
+
+
+# (version, description, step). Steps must be idempotent: a step may be
+# re-run if the process dies between applying it and recording the version.
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, "base tables", _run_script(BASE_SCHEMA)),
+    (2, "products full-text index", _rebuild_search_index),
+    (3, "secondary indexes for tool queries", _run_script(INDEXES)),
+    (4, "planner statistics", _analyze),
+    (5, "product change log", _create_product_change_log),
+    (6, "co-purchase recommendation tables", create_recommendation_tables),
+    (7, "data version counters for tool result caching", _run_script(DATA_VERSION_SCHEMA)),
+    (8, "order index for keyset pagination", _run_script(ORDER_PAGE_INDEX)),
+    (9, "in-stock products index for recommendations", _run_script(IN_STOCK_INDEX)),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )"""
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply every pending migration and return the resulting schema version."""
+    current = get_schema_version(conn)
+    conn.commit()
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        logger.info("Applying migration %d: %s", version, description)
+        step(conn)
+        conn.execute(
+            "INSERT OR IGNORE INTO schema_version (version, description) VALUES (?, ?)",
+            (version, description),
+        )
+        conn.commit()
+        current = version
+    return current
@@ -0,0 +1,50 @@
+import base64
+import json
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Tool results go into the prompt, so every list a tool returns is paged
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+
+class CursorError(ValueError):
+    pass
+
+
+def clamp_limit(limit: Optional[int]) -> int:
+    return max(1, min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort: str, key: Sequence[Any]) -> str:
+    """Opaque keyset cursor: the sort order and the sort key of the last row sent."""
+    raw = json.dumps([sort, *key], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, size: int) -> List[Any]:
+    """The sort key stored in ``cursor``; it must come from a page with the same sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value = json.loads(raw)
+    except (ValueError, TypeError) as e:
+        raise CursorError("Invalid cursor") from e
+    if not isinstance(value, list) or len(value) != size + 1 or value[0] != sort:
+        raise CursorError(f"Cursor does not belong to a '{sort}' listing")
+    return value[1:]
+
+
+def paginate(rows: Iterable[Tuple[Sequence[Any], Dict[str, Any]]], limit: int, sort: str) -> Dict[str, Any]:
+    """First ``limit`` of ``(sort_key, item)`` pairs plus the cursor for the rest.
+
+    ``rows`` should be lazy (e.g. a generator over an open sqlite cursor
+    with ``LIMIT limit + 1``); at most one row past the page is read.
+    """
+    page = list(islice(rows, limit + 1))
+    has_more = len(page) > limit
+    page = page[:limit]
+    return {
+        "items": [item for _, item in page],
+        "has_more": has_more,
+        "next_cursor": encode_cursor(sort, page[-1][0]) if has_more else None,
+    }
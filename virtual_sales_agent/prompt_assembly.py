@@ -0,0 +1,56 @@
+import re
+from datetime import datetime
+from typing import Any, Callable
+
+from langchain_core.messages import HumanMessage
+from langchain_core.prompt_values import ChatPromptValue, PromptValue
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import Runnable, RunnableLambda
+
+# Model servers reuse the KV cache of the longest prompt prefix they have
+# already evaluated, so everything that changes between calls goes after
+# the conversation instead of into the system message. Ollama joins every
+# system message into one block at the top of the prompt, so the volatile
+# values ride on the latest human message instead (only in the prompt;
+# the message stored in the thread is untouched).
+VOLATILE_CONTEXT = "\n\n[Current time: {time}]"
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+_VOLATILE_CONTEXT_RE = re.compile(r"\n\n\[Current time: [^\]\n]*\]$")
+
+
+class VolatileContext:
+    """Appends the current time to the latest human message of a rendered prompt."""
+
+    def __init__(self, clock: Callable[[], datetime] = datetime.now, time_format: str = TIME_FORMAT):
+        self.clock = clock
+        self.time_format = time_format
+
+    def __call__(self, prompt: PromptValue) -> ChatPromptValue:
+        messages = prompt.to_messages()
+        for i in range(len(messages) - 1, -1, -1):
+            message = messages[i]
+            if isinstance(message, HumanMessage) and isinstance(message.content, str):
+                suffix = VOLATILE_CONTEXT.format(time=self.clock().strftime(self.time_format))
+                messages[i] = message.model_copy(update={"content": message.content + suffix})
+                break
+        return ChatPromptValue(messages=messages)
+
+
+def stable_prompt(system: str, clock: Callable[[], datetime] = datetime.now, **partials: Any) -> Runnable:
+    """System message + ``{messages}`` placeholder, with volatile values moved to the end.
+
+    ``system`` and ``partials`` must not change between calls of one
+    conversation (rules, tool names, the customer); the time is added by
+    VolatileContext after the conversation.
+    """
+    template = ChatPromptTemplate.from_messages([
+        ("system", system),
+        ("placeholder", "{messages}"),
+    ]).partial(**partials)
+    return template | RunnableLambda(VolatileContext(clock), name="volatile_context")
+
+
+def strip_volatile_context(text: str) -> str:
+    """The human message text without the suffix added by VolatileContext."""
+    return _VOLATILE_CONTEXT_RE.sub("", text)
@@ -0,0 +1,193 @@
+import sqlite3
+from typing import Any, Dict, Iterable, List
+
+# The co-purchase matrix is stored sparsely as (product_id, other_id, weight)
+# rows; the (product_id, weight DESC, other_id) index makes each product's
+# neighbour list an ordered range read. Popularity and per-customer category
+# affinity are kept as running totals. All three are updated inside the
+# create_order transaction, so they persist and are never ahead of the orders.
+RECOMMENDATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS product_copurchase (
+    product_id INTEGER NOT NULL,
+    other_id INTEGER NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (product_id, other_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_copurchase_rank
+    ON product_copurchase (product_id, weight DESC, other_id);
+
+CREATE TABLE IF NOT EXISTS product_popularity (
+    product_id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    sold INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_popularity_rank
+    ON product_popularity (sold DESC, product_id);
+CREATE INDEX IF NOT EXISTS idx_popularity_category_rank
+    ON product_popularity (category, sold DESC, product_id);
+
+CREATE TABLE IF NOT EXISTS customer_category_affinity (
+    customer_id TEXT NOT NULL,
+    category TEXT NOT NULL,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (customer_id, category)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_affinity_rank
+    ON customer_category_affinity (customer_id, weight DESC, category);
+"""
+
+BACKFILL = """
+INSERT OR REPLACE INTO product_copurchase (product_id, other_id, weight)
+SELECT a.product_id, b.product_id, COUNT(DISTINCT a.order_id)
+FROM order_items a
+JOIN order_items b ON a.order_id = b.order_id AND a.product_id != b.product_id
+GROUP BY a.product_id, b.product_id;
+
+INSERT OR REPLACE INTO product_popularity (product_id, category, sold)
+SELECT oi.product_id, p.category, SUM(oi.quantity)
+FROM order_items oi
+JOIN products p ON p.id = oi.product_id
+GROUP BY oi.product_id;
+
+INSERT OR REPLACE INTO customer_category_affinity (customer_id, category, weight)
+SELECT o.customer_id, p.category, COUNT(*)
+FROM order_items oi
+JOIN orders o ON o.id = oi.order_id
+JOIN products p ON p.id = oi.product_id
+GROUP BY o.customer_id, p.category;
+"""
+
+# How many of the customer's latest purchased products seed the neighbour
+# lookup; they are taken from at most as many of the latest orders.
+RECENT_PRODUCTS = 10
+
+
+def create_recommendation_tables(conn: sqlite3.Connection) -> None:
+    conn.executescript(RECOMMENDATION_SCHEMA)
+    conn.executescript(BACKFILL)
+
+
+def record_order(cursor: sqlite3.Cursor, customer_id: str, items: Iterable[Dict[str, Any]]) -> None:
+    """Fold one committed-to-be order into the co-purchase, popularity and affinity tables.
+
+    Must run on the cursor of the create_order transaction.
+    """
+    quantities: Dict[int, int] = {}
+    for item in items:
+        quantities[item["product_id"]] = quantities.get(item["product_id"], 0) + item["quantity"]
+    if not quantities:
+        return
+
+    ids = list(quantities)
+    cursor.execute(
+        f"SELECT id, category FROM products WHERE id IN ({','.join('?' * len(ids))})", ids
+    )
+    categories = {row[0]: row[1] for row in cursor.fetchall()}
+
+    cursor.executemany(
+        """INSERT INTO product_copurchase (product_id, other_id, weight) VALUES (?, ?, 1)
+        ON CONFLICT (product_id, other_id) DO UPDATE SET weight = weight + 1""",
+        [(a, b) for a in ids for b in ids if a != b],
+    )
+    cursor.executemany(
+        """INSERT INTO product_popularity (product_id, category, sold) VALUES (?, ?, ?)
+        ON CONFLICT (product_id) DO UPDATE SET sold = sold + excluded.sold, category = excluded.category""",
+        [(pid, categories[pid], qty) for pid, qty in quantities.items()],
+    )
+    per_category: Dict[str, int] = {}
+    for pid in ids:
+        per_category[categories[pid]] = per_category.get(categories[pid], 0) + 1
+    cursor.executemany(
+        """INSERT INTO customer_category_affinity (customer_id, category, weight) VALUES (?, ?, ?)
+        ON CONFLICT (customer_id, category) DO UPDATE SET weight = weight + excluded.weight""",
+        [(customer_id, category, count) for category, count in per_category.items()],
+    )
+
+
+def _fetch_in_stock(cursor: sqlite3.Cursor, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    if not ids:
+        return {}
+    cursor.execute(
+        f"SELECT * FROM products WHERE id IN ({','.join('?' * len(ids))}) AND quantity > 0", ids
+    )
+    return {row["id"]: dict(row) for row in cursor.fetchall()}
+
+
+def recommend(cursor: sqlite3.Cursor, customer_id: str, k: int = 5) -> List[Dict[str, Any]]:
+    """Top-k products for a customer, ranked deterministically.
+
+    Products bought together with the customer's recent purchases come
+    first, then best sellers and other in-stock products in the customer's
+    favourite categories, then best sellers overall. Every step is a bounded index range read.
+    """
+    # Only the latest orders are read (a backwards range of
+    # idx_orders_customer_date_id), not the customer's whole history
+    cursor.execute(
+        """SELECT DISTINCT oi.product_id
+        FROM (
+            SELECT id, order_date FROM orders
+            WHERE customer_id = ?
+            ORDER BY order_date DESC, id DESC
+            LIMIT ?
+        ) latest
+        JOIN order_items oi ON oi.order_id = latest.id
+        ORDER BY latest.order_date DESC, latest.id DESC, oi.product_id
+        LIMIT ?""",
+        (customer_id, RECENT_PRODUCTS, RECENT_PRODUCTS),
+    )
+    owned = [row[0] for row in cursor.fetchall()]
+
+    ranked: List[int] = []
+    if owned:
+        scores: Dict[int, int] = {}
+        for product_id in owned:
+            cursor.execute(
+                """SELECT other_id, weight FROM product_copurchase
+                WHERE product_id = ? ORDER BY weight DESC, other_id LIMIT ?""",
+                (product_id, k * 2),
+            )
+            for other_id, weight in cursor.fetchall():
+                if other_id not in owned:
+                    scores[other_id] = scores.get(other_id, 0) + weight
+        ranked = sorted(scores, key=lambda pid: (-scores[pid], pid))
+
+        cursor.execute(
+            """SELECT category FROM customer_category_affinity
+            WHERE customer_id = ? ORDER BY weight DESC, category LIMIT 3""",
+            (customer_id,),
+        )
+        categories = [row[0] for row in cursor.fetchall()]
+        for category in categories:
+            cursor.execute(
+                """SELECT product_id FROM product_popularity
+                WHERE category = ? ORDER BY sold DESC, product_id LIMIT ?""",
+                (category, k * 2),
+            )
+            ranked.extend(row[0] for row in cursor.fetchall())
+        # Never-sold products in those categories, so new stock still surfaces.
+        # The planner prefers the (category, quantity) range and sorts it; the
+        # partial index is already in id order, so the read stops after k rows.
+        for category in categories:
+            cursor.execute(
+                """SELECT id FROM products INDEXED BY idx_products_in_stock_category
+                WHERE category = ? COLLATE NOCASE AND quantity > 0 ORDER BY id LIMIT ?""",
+                (category, k),
+            )
+            ranked.extend(row[0] for row in cursor.fetchall())
+
+    cursor.execute(
+        "SELECT product_id FROM product_popularity ORDER BY sold DESC, product_id LIMIT ?",
+        (k * 2,),
+    )
+    ranked.extend(row[0] for row in cursor.fetchall())
+
+    # Already-bought products are only used to fill an otherwise short list
+    owned_set = set(owned)
+    candidates = list(dict.fromkeys(
+        [pid for pid in ranked if pid not in owned_set] + [pid for pid in ranked if pid in owned_set]
+    ))
+    in_stock = _fetch_in_stock(cursor, candidates)
+    return [in_stock[pid] for pid in candidates if pid in in_stock][:k]
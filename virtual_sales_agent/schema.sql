@@ -24,6 +24,15 @@ CREATE TABLE IF NOT EXISTS order_items (
     FOREIGN KEY (product_id) REFERENCES products(id)
 );
 
+CREATE INDEX IF NOT EXISTS idx_products_category_lower_price ON products (LOWER(category), price);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+CREATE INDEX IF NOT EXISTS idx_products_category_quantity ON products (category COLLATE NOCASE, quantity);
+CREATE INDEX IF NOT EXISTS idx_orders_customer_date_id ON orders (customer_id, order_date, id, status);
+CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items (order_id, product_id, quantity, unit_price);
+CREATE INDEX IF NOT EXISTS idx_order_items_product ON order_items (product_id, quantity);
+
+-- The authoritative, versioned schema lives in migrations.py; this file is a reference copy.
+
 -- Sample Data
 INSERT INTO products (name, category, description, price, quantity)
 VALUES 
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import logging
+import re
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, AnyMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from history import message_tokens
+from prompt_assembly import strip_volatile_context
+
+logger = logging.getLogger(__name__)
+
+# Reply for turns the script has run out of steps for, and for tool steps
+# when the model has no tools bound (e.g. as the summary model).
+FALLBACK_REPLY = "Is there anything else I can help you with?"
+
+_NUMBER = re.compile(r"\d+")
+
+
+def _fill(value: Any, message: str, tool_result: str) -> Any:
+    """Substitute {message}, {number} and {tool_result} in a scripted value.
+
+    A value that is exactly "{number}" becomes the first integer in the
+    customer's message (1 if there is none), so scripts can pass ids along.
+    """
+    if isinstance(value, dict):
+        return {k: _fill(v, message, tool_result) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, message, tool_result) for v in value]
+    if not isinstance(value, str):
+        return value
+    number = _NUMBER.search(message)
+    if value == "{number}":
+        return int(number.group()) if number else 1
+    return (
+        value.replace("{message}", message)
+        .replace("{number}", number.group() if number else "1")
+        .replace("{tool_result}", tool_result)
+    )
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic, tool-calling stand-in for the chat model (load tests, no GPU).
+
+    A script is a list of ``{"match": [...], "steps": [...]}`` entries. The
+    last human message picks the first entry with a matching keyword (case
+    insensitive substring), else ``default``. The number of AI messages since
+    that human message picks the step, so the model keeps no per-thread state
+    and any number of conversations can share it. A step is either
+    ``{"tool_calls": [{"name", "args"}]}`` or ``{"content": "..."}``.
+
+    Each generation waits ``latency_ms`` plus the prompt's tokens at
+    ``prompt_tokens_per_second`` (prompt evaluation) before the first token,
+    then emits content at ``tokens_per_second`` (whitespace-separated tokens).
+    """
+
+    scripts: List[Dict[str, Any]] = []
+    default: List[Dict[str, Any]] = [{"content": FALLBACK_REPLY}]
+    latency_ms: float = 0.0
+    tokens_per_second: float = 0.0
+    prompt_tokens_per_second: float = 0.0
+
+    @classmethod
+    def from_file(cls, path: str, **overrides: Any) -> "ScriptedChatModel":
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(**{**spec, **overrides})
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _steps(self, text: str) -> List[Dict[str, Any]]:
+        lowered = text.lower()
+        for script in self.scripts:
+            if any(keyword.lower() in lowered for keyword in script.get("match", [])):
+                return script["steps"]
+        return self.default
+
+    def reply(self, messages: Sequence[AnyMessage], tools: Optional[List[Dict[str, Any]]] = None) -> AIMessage:
+        """The scripted reply to ``messages``, without any delay."""
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        text = strip_volatile_context(str(messages[last_human].content)) if last_human >= 0 else ""
+        answered = sum(isinstance(m, AIMessage) for m in messages[last_human + 1:])
+        tool_result = next(
+            (str(m.content)[:200] for m in reversed(messages[last_human + 1:]) if isinstance(m, ToolMessage)), ""
+        )
+        usage = {"input_tokens": sum(message_tokens(m) for m in messages)}
+        steps = self._steps(text)
+        step = steps[answered] if answered < len(steps) else {"content": FALLBACK_REPLY}
+
+        if "tool_calls" in step:
+            available = {tool["function"]["name"] for tool in tools or []}
+            calls = [call for call in step["tool_calls"] if call["name"] in available]
+            if len(calls) < len(step["tool_calls"]):
+                missing = sorted({c["name"] for c in step["tool_calls"]} - available)
+                logger.debug("Scripted tool calls skipped, tools not bound: %s", missing)
+            if calls:
+                message = AIMessage(content="", tool_calls=[
+                    {"name": call["name"], "args": _fill(call.get("args", {}), text, tool_result),
+                     "id": f"call_{uuid.uuid4().hex[:24]}"}
+                    for call in calls
+                ])
+                return self._with_usage(message, usage)
+            step = {"content": FALLBACK_REPLY}
+        return self._with_usage(AIMessage(content=_fill(step.get("content", ""), text, tool_result)), usage)
+
+    def _with_usage(self, message: AIMessage, usage: Dict[str, int]) -> AIMessage:
+        # Same estimate the context budget uses, so metrics have realistic token counts.
+        # Prompt evaluation is reported like Ollama does, without any prefix reuse.
+        output = message_tokens(message)
+        message.usage_metadata = {**usage, "output_tokens": output, "total_tokens": usage["input_tokens"] + output}
+        prompt_seconds = usage["input_tokens"] / self.prompt_tokens_per_second if self.prompt_tokens_per_second else 0
+        message.response_metadata = {
+            "prompt_eval_count": usage["input_tokens"],
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+        }
+        return message
+
+    def _first_token_delay(self, message: AIMessage) -> float:
+        seconds = self.latency_ms / 1000
+        if self.prompt_tokens_per_second:
+            seconds += message.usage_metadata["input_tokens"] / self.prompt_tokens_per_second
+        return seconds
+
+    def _delay(self, message: AIMessage) -> float:
+        seconds = self._first_token_delay(message)
+        if self.tokens_per_second:
+            seconds += len(str(message.content).split()) / self.tokens_per_second
+        return seconds
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self.reply(messages, kwargs.get("tools"))
+        time.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self.reply(messages, kwargs.get("tools"))
+        await asyncio.sleep(self._delay(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _chunks(self, message: AIMessage) -> Iterator[ChatGenerationChunk]:
+        # Usage and prompt evaluation ride on the first chunk; chunk addition sums usage
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                usage_metadata=message.usage_metadata,
+                response_metadata=message.response_metadata,
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+            ))
+            return
+        words = str(message.content).split(" ")
+        for i, word in enumerate(words):
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content=word if i == len(words) - 1 else word + " ",
+                usage_metadata=message.usage_metadata if i == 0 else None,
+                response_metadata=message.response_metadata if i == 0 else {},
+            ))
+
+    def _token_gap(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second else 0.0
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self.reply(messages, kwargs.get("tools"))
+        time.sleep(self._first_token_delay(message))
+        for i, chunk in enumerate(self._chunks(message)):
+            if i:
+                time.sleep(self._token_gap())
+            if run_manager and chunk.message.content:
+                run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        message = self.reply(messages, kwargs.get("tools"))
+        await asyncio.sleep(self._first_token_delay(message))
+        for i, chunk in enumerate(self._chunks(message)):
+            if i:
+                await asyncio.sleep(self._token_gap())
+            if run_manager and chunk.message.content:
+                await run_manager.on_llm_new_token(chunk.message.content, chunk=chunk)
+            yield chunk
+
+
+def record_script(messages: Sequence[AnyMessage]) -> List[Dict[str, Any]]:
+    """Turn a recorded conversation (e.g. ``graph.get_state(...).values["messages"]``) into script entries.
+
+    Each human turn becomes an entry matching its full text whose steps
+    replay the assistant's tool calls and replies in order.
+    """
+    scripts: List[Dict[str, Any]] = []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            scripts.append({"match": [str(message.content)], "steps": []})
+        elif isinstance(message, AIMessage) and scripts:
+            if message.tool_calls:
+                step = {"tool_calls": [{"name": c["name"], "args": c["args"]} for c in message.tool_calls]}
+            else:
+                step = {"content": message.content}
+            scripts[-1]["steps"].append(step)
+    return scripts
@@ -0,0 +1,48 @@
+import re
+from typing import Optional
+
+# External-content FTS5 index over products. Prefix indexes on 2 and 3
+# characters keep "lap" -> "laptop" style lookups off the full-token scan.
+PRODUCT_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    name,
+    description,
+    content='products',
+    content_rowid='id',
+    prefix='2 3',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, name, description)
+    VALUES ('delete', old.id, old.name, old.description);
+    INSERT INTO products_fts (rowid, name, description)
+    VALUES (new.id, new.name, new.description);
+END;
+"""
+
+# bm25 column weights: a hit in the name counts for more than one in the description.
+BM25_WEIGHTS = (10.0, 1.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query that ANDs a prefix match per word.
+
+    Returns None when the text has no searchable tokens.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
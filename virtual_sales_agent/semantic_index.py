@@ -0,0 +1,284 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+# Weight of query-side expansion terms (see load_expansions), so literal
+# matches still rank first
+EXPANSION_WEIGHT = 0.5
+
+
+def load_expansions(path: str) -> Dict[str, List[str]]:
+    """Query word -> catalog words, from a JSON object kept with the catalog.
+
+    The index only matches words and word pieces that occur in product text,
+    so everyday phrasing a catalog never uses ("something to sit on" for
+    chairs) needs an entry here. A missing file means no expansions; a word
+    is never expanded to itself.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    if not isinstance(raw, dict) or not all(
+        isinstance(terms, list) and all(isinstance(t, str) for t in terms) for terms in raw.values()
+    ):
+        raise ValueError(f"{path} must map each word to a list of words")
+    expansions = {}
+    for word, terms in raw.items():
+        word = word.lower()
+        terms = [t.lower() for t in terms if t.lower() != word]
+        if terms:
+            expansions[word] = terms
+    return expansions
+
+
+def _features(text: str) -> Dict[str, float]:
+    """Word unigrams plus boundary-marked character trigrams and 4-grams."""
+    counts: Dict[str, float] = {}
+    for word in _WORD_RE.findall(text.lower()):
+        counts["w:" + word] = counts.get("w:" + word, 0.0) + 1.0
+        padded = f"<{word}>"
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                gram = "c:" + padded[i:i + n]
+                counts[gram] = counts.get(gram, 0.0) + 0.5
+    return counts
+
+
+class SemanticProductIndex:
+    """Hashed TF-IDF vectors for product text, searched by cosine similarity.
+
+    Documents are stored as L2-normalised log-TF rows of one contiguous
+    float32 matrix; IDF is applied on the query side only (SMART lnc.ltc), so
+    adding or updating a product never requires re-weighting existing rows.
+    Everything runs in-process on the CPU.
+
+    Similarity is lexical: a query reaches products that share words or
+    character n-grams with it, and hashing into ``dim`` buckets adds some
+    collisions. Synonyms and paraphrases score nothing unless ``expansions``
+    (see ``load_expansions``) maps the query word to words in the catalog.
+
+    ``save``/``restore`` persist the matrix with the last applied
+    product_change_log sequence, so a restart only replays newer changes.
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        initial_capacity: int = 1024,
+        expansions: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.dim = dim
+        self.expansions = expansions or {}
+        self.matrix = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self.ids = np.full(initial_capacity, -1, dtype=np.int64)
+        self.size = 0
+        self._row_of: Dict[int, int] = {}
+        self._df = np.zeros(dim, dtype=np.float64)
+        self._doc_buckets: Dict[int, np.ndarray] = {}
+        self._bucket_cache: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.RLock()
+        self.last_change_seq = 0
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        cached = self._bucket_cache.get(feature)
+        if cached is None:
+            h = zlib.crc32(feature.encode("utf-8"))
+            cached = (h % self.dim, 1.0 if (h >> 31) & 1 else -1.0)
+            if len(self._bucket_cache) < 1_000_000:
+                self._bucket_cache[feature] = cached
+        return cached
+
+    def _vectorize(self, features: Dict[str, float]) -> np.ndarray:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in features.items():
+            bucket, sign = self._bucket(feature)
+            weight = 1.0 + np.log(count) if count >= 1 else count
+            vec[bucket] += sign * weight
+        return vec
+
+    def _reset(self, ids: np.ndarray, matrix: np.ndarray, last_change_seq: int):
+        """Replace the contents with ``matrix`` rows for ``ids``."""
+        size = len(ids)
+        self.matrix = np.zeros((max(size, len(self.ids), 1), self.dim), dtype=np.float32)
+        self.matrix[:size] = matrix
+        self.ids = np.full(len(self.matrix), -1, dtype=np.int64)
+        self.ids[:size] = ids
+        self.size = size
+        self._row_of = {int(product_id): row for row, product_id in enumerate(ids)}
+        self._doc_buckets = {int(product_id): np.flatnonzero(matrix[row]) for row, product_id in enumerate(ids)}
+        self._df = np.count_nonzero(matrix, axis=0).astype(np.float64)
+        self.last_change_seq = last_change_seq
+
+    def _grow(self, needed: int):
+        capacity = len(self.ids)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:self.size] = self.matrix[:self.size]
+        ids = np.full(capacity, -1, dtype=np.int64)
+        ids[:self.size] = self.ids[:self.size]
+        self.matrix, self.ids = matrix, ids
+
+    def add_or_update(self, products: Iterable[Tuple[int, str, Optional[str]]]):
+        """Insert new products or replace the vectors of existing ones."""
+        with self._lock:
+            for product_id, name, description in products:
+                vec = self._vectorize(_features(f"{name} {name} {description or ''}"))
+                norm = np.linalg.norm(vec)
+                if norm:
+                    vec /= norm
+                buckets = np.flatnonzero(vec)
+                row = self._row_of.get(product_id)
+                if row is None:
+                    self._grow(self.size + 1)
+                    row = self.size
+                    self.size += 1
+                    self._row_of[product_id] = row
+                    self.ids[row] = product_id
+                else:
+                    self._df[self._doc_buckets[product_id]] -= 1
+                self.matrix[row] = vec
+                self._df[buckets] += 1
+                self._doc_buckets[product_id] = buckets
+
+    def remove(self, product_ids: Iterable[int]):
+        """Drop products, moving the last row into each freed slot."""
+        with self._lock:
+            for product_id in product_ids:
+                row = self._row_of.pop(product_id, None)
+                if row is None:
+                    continue
+                self._df[self._doc_buckets.pop(product_id)] -= 1
+                last = self.size - 1
+                if row != last:
+                    moved_id = int(self.ids[last])
+                    self.matrix[row] = self.matrix[last]
+                    self.ids[row] = moved_id
+                    self._row_of[moved_id] = row
+                self.matrix[last] = 0
+                self.ids[last] = -1
+                self.size = last
+
+    def _query_matrix(self, queries: Sequence[str]) -> np.ndarray:
+        idf = np.log((1.0 + self.size) / (1.0 + self._df)) + 1.0
+        rows = np.zeros((len(queries), self.dim), dtype=np.float32)
+        for i, query in enumerate(queries):
+            features = _features(query)
+            for word in _WORD_RE.findall(query.lower()):
+                for extra in self.expansions.get(word, []):
+                    for feature, count in _features(extra).items():
+                        features[feature] = features.get(feature, 0.0) + EXPANSION_WEIGHT * count
+            vec = self._vectorize(features) * idf
+            norm = np.linalg.norm(vec)
+            rows[i] = vec / norm if norm else vec
+        return rows
+
+    def search_batch(self, queries: Sequence[str], k: int = 5) -> List[List[Tuple[int, float]]]:
+        """Top-k (product_id, cosine score) for each query, best first."""
+        with self._lock:
+            if not self.size or not queries:
+                return [[] for _ in queries]
+            scores = self._query_matrix(queries) @ self.matrix[:self.size].T
+            k = min(k, self.size)
+            top = np.argpartition(scores, -k, axis=1)[:, -k:]
+            results = []
+            for i in range(len(queries)):
+                row = top[i][np.argsort(-scores[i, top[i]], kind="stable")]
+                results.append([
+                    (int(self.ids[j]), float(scores[i, j])) for j in row if scores[i, j] > 0
+                ])
+            return results
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[int, float]]:
+        return self.search_batch([query], k)[0]
+
+    def save(self, path: str):
+        """Write the vectors and the last applied change sequence to ``path`` (atomically)."""
+        with self._lock:
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                np.savez(
+                    f, ids=self.ids[:self.size], matrix=self.matrix[:self.size],
+                    dim=self.dim, last_change_seq=self.last_change_seq,
+                )
+            os.replace(tmp, path)
+
+    def restore(self, path: str):
+        """Load what ``save`` wrote; raises ValueError if it was built with another ``dim``."""
+        with np.load(path) as data:
+            if int(data["dim"]) != self.dim:
+                raise ValueError(f"{path} has dim {int(data['dim'])}, expected {self.dim}")
+            with self._lock:
+                self._reset(data["ids"], data["matrix"], int(data["last_change_seq"]))
+
+    def rebuild(self, conn: sqlite3.Connection):
+        """Vectorize the whole catalog, replacing the current contents."""
+        with self._lock:
+            # Read before the products, so changes made meanwhile are replayed by the next sync
+            seq = logged_through(conn)
+            rows = conn.execute("SELECT id, name, description FROM products").fetchall()
+            self._reset(np.zeros(0, dtype=np.int64), np.zeros((0, self.dim), dtype=np.float32), seq)
+            self._grow(len(rows))
+            self.add_or_update(tuple(row) for row in rows)
+
+    def sync(self, conn: sqlite3.Connection):
+        """Apply catalog changes recorded in product_change_log since the last sync.
+
+        Builds the index from the catalog instead when it is empty, or when
+        the log was pruned past the changes it has applied.
+        """
+        with self._lock:
+            if not self.last_change_seq or self.last_change_seq < _pruned_through(conn):
+                self.rebuild(conn)
+                return
+            changes = conn.execute(
+                "SELECT MAX(seq), product_id FROM product_change_log WHERE seq > ? GROUP BY product_id",
+                (self.last_change_seq,),
+            ).fetchall()
+            if not changes:
+                return
+            changed_ids = [row[1] for row in changes]
+            rows = {}
+            for start in range(0, len(changed_ids), 500):
+                chunk = changed_ids[start:start + 500]
+                rows.update(
+                    (row[0], row) for row in conn.execute(
+                        f"SELECT id, name, description FROM products WHERE id IN ({','.join('?' * len(chunk))})",
+                        chunk,
+                    )
+                )
+            self.add_or_update(tuple(rows[i]) for i in changed_ids if i in rows)
+            self.remove(i for i in changed_ids if i not in rows)
+            self.last_change_seq = max(row[0] for row in changes)
+
+
+def logged_through(conn: sqlite3.Connection) -> int:
+    """The highest change sequence ever assigned (AUTOINCREMENT survives pruning)."""
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'product_change_log'").fetchone()
+    return row[0] if row else 0
+
+
+def _pruned_through(conn: sqlite3.Connection) -> int:
+    """Change log rows up to this sequence have been deleted."""
+    oldest = conn.execute("SELECT MIN(seq) FROM product_change_log").fetchone()[0]
+    return oldest - 1 if oldest is not None else logged_through(conn)
+
+
+def prune_change_log(conn: sqlite3.Connection, through_seq: int) -> int:
+    """Delete change log rows an index persisted at ``through_seq`` no longer needs.
+
+    Other processes whose in-memory index is older rebuild on their next sync.
+    """
+    with conn:
+        return conn.execute("DELETE FROM product_change_log WHERE seq <= ?", (through_seq,)).rowcount
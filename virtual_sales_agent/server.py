@@ -0,0 +1,349 @@
+"""Headless HTTP/SSE server for the compiled sales graph.
+
+    python server.py --port 8000 --max-runs 64
+
+Endpoints (JSON bodies; runs stream Server-Sent Events unless ``?stream=0``):
+
+    POST /threads                          {"customer_id"} -> {"thread_id"}
+    GET  /threads/{thread_id}              ?customer_id=; messages and pending approvals
+    POST /threads/{thread_id}/runs         {"message", "customer_id"}
+    POST /threads/{thread_id}/approve      {"customer_id"}; run the pending sensitive tool calls
+    POST /threads/{thread_id}/reject       {"customer_id", "reason"}; answer them with a rejection
+    GET  /interrupts                       threads waiting for approval
+    GET  /metrics                          Prometheus text format
+    GET  /metrics.json                     the same metrics as JSON, with estimated percentiles
+    GET  /health
+
+Thread endpoints answer 403 when ``customer_id`` is not the thread's owner.
+
+SSE events: ``token``, ``tool_start``, ``tool_end``, ``message``, then one
+``done`` (with ``interrupted`` and ``pending_tool_calls``) or ``error``.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from tornado.iostream import StreamClosedError
+from tornado.web import Application, HTTPError, RequestHandler
+
+import metrics
+from log_setup import configure_logging
+from streaming import StreamingHandler
+from utils import pending_tool_calls, rejection_messages
+
+logger = logging.getLogger(__name__)
+
+
+def message_to_json(message: BaseMessage) -> Dict[str, Any]:
+    data = {"type": message.type, "content": message.content}
+    if isinstance(message, AIMessage) and message.tool_calls:
+        data["tool_calls"] = message.tool_calls
+    if isinstance(message, ToolMessage):
+        data["name"] = message.name
+        data["tool_call_id"] = message.tool_call_id
+        if message.artifact is not None:
+            data["artifact"] = message.artifact
+    return data
+
+
+class RunLimiter:
+    """Caps concurrent graph runs server-wide and allows one run per thread.
+
+    A run waits up to ``queue_timeout`` seconds for a free slot before the
+    request is refused with 503; a second run on a busy thread gets 409.
+    """
+
+    def __init__(self, max_runs: int, queue_timeout: float):
+        self.max_runs = max_runs
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_runs)
+        self._busy_threads = set()
+        self.active = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def acquire(self, thread_id: str) -> None:
+        if thread_id in self._busy_threads:
+            raise HTTPError(409, reason="A run is already in progress on this thread")
+        self._busy_threads.add(thread_id)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._busy_threads.discard(thread_id)
+            raise HTTPError(503, reason="Server busy, retry later")
+        self.active += 1
+        self._idle.clear()
+
+    @asynccontextmanager
+    async def hold(self, thread_id: str):
+        """The thread's run slot for the body of an ``async with``."""
+        await self.acquire(thread_id)
+        try:
+            yield
+        finally:
+            self.release(thread_id)
+
+    def release(self, thread_id: str) -> None:
+        self._busy_threads.discard(thread_id)
+        self._slots.release()
+        self.active -= 1
+        if not self.active:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class BaseHandler(RequestHandler):
+    def initialize(self, graph, limiter: RunLimiter):
+        self.graph = graph
+        self.limiter = limiter
+
+    def json_body(self) -> Dict[str, Any]:
+        if not self.request.body:
+            return {}
+        try:
+            body = json.loads(self.request.body)
+        except json.JSONDecodeError:
+            raise HTTPError(400, reason="Body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPError(400, reason="Body must be a JSON object")
+        return body
+
+    def write_error(self, status_code: int, **kwargs):
+        self.finish({"error": self._reason, "status": status_code})
+
+    def thread_config(self, thread_id: str, customer_id: Optional[str]) -> Dict[str, Any]:
+        return {"configurable": {"thread_id": thread_id, "customer_id": customer_id}}
+
+    def customer_id(self) -> str:
+        """The requesting customer, from the JSON body or the query string."""
+        customer_id = self.json_body().get("customer_id") or self.get_query_argument("customer_id", None)
+        if not customer_id:
+            raise HTTPError(400, reason="'customer_id' is required")
+        return customer_id
+
+    async def thread_state(self, thread_id: str, customer_id: str):
+        """The thread's state; 404 if it does not exist, 403 if it is someone else's."""
+        state = await self.graph.aget_state(self.thread_config(thread_id, None))
+        if not state.values:
+            raise HTTPError(404, reason="Unknown thread")
+        if state.values.get("user_info") not in (None, customer_id):
+            raise HTTPError(403, reason="Thread belongs to another customer")
+        return state
+
+    async def run_turn(self, inputs: Optional[Dict[str, Any]], config: Dict[str, Any]):
+        """Run one turn as SSE events or as one JSON reply; the caller holds the thread's limiter."""
+        if self.get_query_argument("stream", "1") == "0":
+            result = await StreamingHandler().arun(self.graph, inputs, config)
+            self.finish(self.run_summary(result))
+            return
+        await self.stream_events(inputs, config)
+
+    def run_summary(self, result) -> Dict[str, Any]:
+        metrics = result.metrics
+        return {
+            "messages": [message_to_json(m) for m in result.messages],
+            "interrupted": result.interrupted,
+            "pending_tool_calls": result.pending_tool_calls,
+            "time_to_first_token": metrics.time_to_first_token,
+            "total_latency": metrics.total_latency,
+        }
+
+    async def stream_events(self, inputs: Optional[Dict[str, Any]], config: Dict[str, Any]):
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.set_header("X-Accel-Buffering", "no")
+        events: asyncio.Queue = asyncio.Queue()
+        handler = StreamingHandler(
+            on_token=lambda text: events.put_nowait(("token", {"text": text})),
+            on_tool_start=lambda call: events.put_nowait(("tool_start", call)),
+            on_tool_end=lambda m: events.put_nowait(("tool_end", message_to_json(m))),
+            on_message=lambda m: events.put_nowait(("message", message_to_json(m))),
+        )
+
+        async def run():
+            try:
+                result = await handler.arun(self.graph, inputs, config)
+                events.put_nowait(("done", self.run_summary(result)))
+            except Exception as e:
+                logger.exception("Run failed")
+                events.put_nowait(("error", {"error": str(e)}))
+            events.put_nowait(None)
+
+        # The run finishes even if the client goes away, so the checkpoint
+        # never stops half way through a turn.
+        task = asyncio.create_task(run())
+        connected = True
+        while (event := await events.get()) is not None:
+            if not connected:
+                continue
+            name, data = event
+            if name == "done":
+                data = {k: v for k, v in data.items() if k != "messages"}
+            try:
+                self.write(f"event: {name}\ndata: {json.dumps(data, default=str)}\n\n")
+                await self.flush()
+            except StreamClosedError:
+                connected = False
+        await task
+        if connected:
+            self.finish()
+
+
+class HealthHandler(BaseHandler):
+    def get(self):
+        self.finish({"status": "ok", "active_runs": self.limiter.active, "max_runs": self.limiter.max_runs})
+
+
+class MetricsHandler(BaseHandler):
+    def get(self, fmt: str):
+        if fmt == ".json":
+            self.finish(metrics.REGISTRY.snapshot())
+            return
+        self.set_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.finish(metrics.REGISTRY.render_prometheus())
+
+
+class ThreadsHandler(BaseHandler):
+    def post(self):
+        body = self.json_body()
+        self.finish({"thread_id": str(uuid.uuid4()), "customer_id": body.get("customer_id")})
+
+
+class ThreadHandler(BaseHandler):
+    async def get(self, thread_id: str):
+        state = await self.thread_state(thread_id, self.customer_id())
+        _, pending = pending_tool_calls(state.values.get("messages", []))
+        self.finish({
+            "thread_id": thread_id,
+            "customer_id": state.values.get("user_info"),
+            "messages": [message_to_json(m) for m in state.values.get("messages", [])],
+            "next": list(state.next),
+            "pending_tool_calls": pending if state.next else [],
+        })
+
+
+class RunsHandler(BaseHandler):
+    async def post(self, thread_id: str):
+        message = self.json_body().get("message")
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, reason="'message' is required")
+        customer_id = self.customer_id()
+        config = self.thread_config(thread_id, customer_id)
+        # The state is checked while holding the thread, so no approval or
+        # other run can change it in between
+        async with self.limiter.hold(thread_id):
+            state = await self.graph.aget_state(config)
+            if state.values:
+                if state.values.get("user_info") not in (None, customer_id):
+                    raise HTTPError(403, reason="Thread belongs to another customer")
+                if state.next:
+                    raise HTTPError(409, reason="Thread is waiting for approval")
+            # user_info keeps the owner in the checkpoint so approvals can resume the thread
+            inputs = {"messages": [HumanMessage(content=message)], "user_info": customer_id}
+            await self.run_turn(inputs, config)
+
+
+class ApprovalHandler(BaseHandler):
+    async def post(self, thread_id: str, decision: str):
+        customer_id = self.customer_id()
+        # Holding the thread before reading its state: two decisions on one
+        # interrupt (or a decision racing a run) cannot both resume it
+        async with self.limiter.hold(thread_id):
+            state = await self.thread_state(thread_id, customer_id)
+            if state.next != ("sensitive_tools",):
+                raise HTTPError(409, reason="Thread has no pending approval")
+            config = self.thread_config(thread_id, state.values.get("user_info"))
+            if decision == "reject":
+                reason = self.json_body().get("reason") or "No reason given"
+                _, pending = pending_tool_calls(state.values["messages"])
+                # Answering the calls as sensitive_tools moves the thread on to the assistant
+                await self.graph.aupdate_state(
+                    config, {"messages": rejection_messages(pending, reason)}, as_node="sensitive_tools"
+                )
+            await self.run_turn(None, config)
+
+
+class InterruptsHandler(BaseHandler):
+    async def get(self):
+        checkpointer = self.graph.checkpointer
+        interrupts = []
+        limit = int(self.get_query_argument("limit", "100"))
+        for thread_id, paused_at in await asyncio.to_thread(checkpointer.paused_threads, limit):
+            state = await self.graph.aget_state(self.thread_config(thread_id, None))
+            if not state.next:
+                continue
+            _, pending = pending_tool_calls(state.values.get("messages", []))
+            interrupts.append({
+                "thread_id": thread_id,
+                "customer_id": state.values.get("user_info"),
+                "waiting_since": paused_at,
+                "pending_tool_calls": pending,
+            })
+        self.finish({"interrupts": interrupts})
+
+
+def make_app(graph, max_runs: int = 64, queue_timeout: float = 30.0) -> Application:
+    limiter = RunLimiter(max_runs, queue_timeout)
+    args = {"graph": graph, "limiter": limiter}
+    app = Application([
+        (r"/health", HealthHandler, args),
+        (r"/metrics(\.json)?", MetricsHandler, args),
+        (r"/threads", ThreadsHandler, args),
+        (r"/threads/([^/]+)", ThreadHandler, args),
+        (r"/threads/([^/]+)/runs", RunsHandler, args),
+        (r"/threads/([^/]+)/(approve|reject)", ApprovalHandler, args),
+        (r"/interrupts", InterruptsHandler, args),
+    ])
+    app.limiter = limiter
+    return app
+
+
+async def serve(graph, port: int, max_runs: int, queue_timeout: float, grace_seconds: float):
+    app = make_app(graph, max_runs, queue_timeout)
+    server = app.listen(port)
+    logger.info("Serving the sales graph on :%d (max %d concurrent runs)", port, max_runs)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    # Graceful shutdown: refuse new connections, let running turns reach a checkpoint
+    logger.info("Shutting down, waiting up to %ss for %d runs", grace_seconds, app.limiter.active)
+    server.stop()
+    if not await app.limiter.wait_idle(grace_seconds):
+        logger.warning("%d runs still active at shutdown", app.limiter.active)
+    await server.close_all_connections()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the sales graph over HTTP/SSE")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-runs", type=int, default=64, help="concurrent graph runs")
+    parser.add_argument("--queue-timeout", type=float, default=30.0, help="seconds to wait for a run slot")
+    parser.add_argument("--grace-seconds", type=float, default=30.0, help="shutdown drain time")
+    args = parser.parse_args()
+    configure_logging()
+
+    from graph import graph
+    from tools import start_semantic_index_warmup
+
+    start_semantic_index_warmup()
+    asyncio.run(serve(graph, args.port, args.max_runs, args.queue_timeout, args.grace_seconds))
+
+
+if __name__ == "__main__":
+    main()
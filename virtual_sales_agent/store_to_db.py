@@ -1,51 +1,35 @@
+import os
 import sqlite3
 
-# Define the SQL schema and sample data
-sql_schema = """
-CREATE TABLE IF NOT EXISTS products (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    name TEXT NOT NULL,
-    category TEXT NOT NULL,
-    description TEXT,
-    price REAL NOT NULL,
-    quantity INTEGER NOT NULL
-);
+from migrations import migrate
 
-CREATE TABLE IF NOT EXISTS orders (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    customer_id TEXT NOT NULL,
-    order_date TEXT NOT NULL,
-    status TEXT NOT NULL
-);
-
-CREATE TABLE IF NOT EXISTS order_items (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    order_id INTEGER NOT NULL,
-    product_id INTEGER NOT NULL,
-    quantity INTEGER NOT NULL,
-    unit_price REAL NOT NULL,
-    FOREIGN KEY (order_id) REFERENCES orders(id),
-    FOREIGN KEY (product_id) REFERENCES products(id)
-);
-
--- Sample Data
-INSERT INTO products (name, category, description, price, quantity)
-VALUES
+# Sample data, inserted only into an empty catalog so re-running is harmless
+sample_products = [
     ('Laptop', 'Electronics', 'High-performance laptop', 999.99, 10),
     ('Smartphone', 'Electronics', 'Latest model smartphone', 699.99, 15),
-    ('Desk Chair', 'Furniture', 'Ergonomic office chair', 249.99, 5);
+    ('Desk Chair', 'Furniture', 'Ergonomic office chair', 249.99, 5),
     ('Wireless Headphones', 'Electronics', 'Noise-cancelling headphones', 199.99, 8),
     ('Office Desk', 'Furniture', 'Large wooden desk', 399.99, 3),
-    ('Mechanical Keyboard', 'Electronics', 'RGB gaming keyboard', 129.99, 12);
-"""
+    ('Mechanical Keyboard', 'Electronics', 'RGB gaming keyboard', 129.99, 12),
+]
 
-# Connect to the SQLite database (or create it if it doesn't exist)
-conn = sqlite3.connect('local_store.db')
+# Connect to the SQLite database (or create it if it doesn't exist); the
+# same file tools.DatabaseManager opens by default
+db_path = os.getenv("STORE_DB") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "local_store.db")
+conn = sqlite3.connect(db_path)
 cursor = conn.cursor()
 
-# Execute the SQL schema and sample data
-cursor.executescript(sql_schema)
-conn.commit()
+# Bring the schema up to date
+version = migrate(conn)
+print(f"Schema version: {version}")
+
+cursor.execute("SELECT COUNT(*) FROM products")
+if cursor.fetchone()[0] == 0:
+    cursor.executemany(
+        "INSERT INTO products (name, category, description, price, quantity) VALUES (?, ?, ?, ?, ?)",
+        sample_products,
+    )
+    conn.commit()
 
 # Verify the tables and data
 def verify_tables_and_data():
@@ -0,0 +1,166 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from utils import pending_tool_calls
+
+logger = logging.getLogger(__name__)
+
+# Nodes whose LLM tokens are shown to the user
+ASSISTANT_NODES = ("assistant",)
+STREAM_MODES = ["messages", "updates"]
+
+
+@dataclass
+class TurnMetrics:
+    started_at: float
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    tokens: int = 0
+    tool_calls: int = 0
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def total_latency(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class TurnResult:
+    messages: List[Any] = field(default_factory=list)
+    interrupted: bool = False
+    pending_tool_calls: List[Dict[str, Any]] = field(default_factory=list)
+    metrics: Optional[TurnMetrics] = None
+
+
+class StreamingHandler:
+    """Drives one graph turn and reports tokens and tool activity as they happen.
+
+    Works with any compiled graph (``run`` for sync, ``arun`` for async) and
+    has no UI dependency: pass callbacks for the events you want to render.
+
+    - ``on_token(text)``: each assistant token (AIMessageChunk content)
+    - ``on_tool_start(tool_call)``: the assistant asked for a tool
+    - ``on_tool_end(tool_message)``: a tool returned
+    - ``on_message(message)``: a complete AIMessage/ToolMessage was produced
+    """
+
+    def __init__(
+        self,
+        on_token: Callable[[str], None] = lambda text: None,
+        on_tool_start: Callable[[Dict[str, Any]], None] = lambda tool_call: None,
+        on_tool_end: Callable[[ToolMessage], None] = lambda message: None,
+        on_message: Callable[[Any], None] = lambda message: None,
+    ):
+        self.on_token = on_token
+        self.on_tool_start = on_tool_start
+        self.on_tool_end = on_tool_end
+        self.on_message = on_message
+
+    def _start(self) -> TurnResult:
+        return TurnResult(metrics=TurnMetrics(started_at=time.perf_counter()))
+
+    def _handle(self, result: TurnResult, mode: str, payload: Any) -> None:
+        metrics = result.metrics
+        if mode == "messages":
+            chunk, meta = payload
+            if (
+                isinstance(chunk, AIMessageChunk)
+                and meta.get("langgraph_node") in ASSISTANT_NODES
+                and isinstance(chunk.content, str)
+                and chunk.content
+            ):
+                if metrics.first_token_at is None:
+                    metrics.first_token_at = time.perf_counter()
+                metrics.tokens += 1
+                self.on_token(chunk.content)
+            return
+
+        for node, update in payload.items():
+            if not isinstance(update, dict):
+                continue
+            for message in update.get("messages", []):
+                if isinstance(message, AIMessage):
+                    for tool_call in message.tool_calls:
+                        metrics.tool_calls += 1
+                        self.on_tool_start(tool_call)
+                elif isinstance(message, ToolMessage):
+                    self.on_tool_end(message)
+                result.messages.append(message)
+                self.on_message(message)
+
+    def _finish(self, result: TurnResult, state) -> TurnResult:
+        metrics = result.metrics
+        if state.next:
+            result.interrupted = True
+            _, result.pending_tool_calls = pending_tool_calls(state.values.get("messages", []))
+        metrics.finished_at = time.perf_counter()
+        ttft = metrics.time_to_first_token
+        logger.info(
+            "Turn finished in %.2fs, time to first token: %s, %s tokens, %s tool calls",
+            metrics.total_latency, f"{ttft:.2f}s" if ttft is not None else "n/a",
+            metrics.tokens, metrics.tool_calls,
+        )
+        return result
+
+    def run(self, graph, inputs: Optional[Dict[str, Any]], config: Dict[str, Any]) -> TurnResult:
+        """Stream one turn. ``inputs=None`` resumes a thread paused at an interrupt."""
+        result = self._start()
+        for mode, payload in graph.stream(inputs, config, stream_mode=STREAM_MODES):
+            self._handle(result, mode, payload)
+        return self._finish(result, graph.get_state(config))
+
+    async def arun(self, graph, inputs: Optional[Dict[str, Any]], config: Dict[str, Any]) -> TurnResult:
+        """Async ``run``: drives ``graph.astream`` on the running event loop."""
+        result = self._start()
+        async for mode, payload in graph.astream(inputs, config, stream_mode=STREAM_MODES):
+            self._handle(result, mode, payload)
+        return self._finish(result, await graph.aget_state(config))
+
+def main():
+    """Terminal chat that streams tokens, e.g. ``python streaming.py``."""
+    import uuid
+
+    from langchain_core.messages import HumanMessage
+
+    from graph import graph
+    from log_setup import configure_logging
+    from tools import start_semantic_index_warmup
+
+    configure_logging()
+    start_semantic_index_warmup()
+    config = {"configurable": {"customer_id": "local_user_123", "thread_id": str(uuid.uuid4())}}
+    handler = StreamingHandler(
+        on_token=lambda text: print(text, end="", flush=True),
+        on_tool_start=lambda tool_call: print(f"\n[tool] {tool_call['name']} {tool_call['args']}"),
+        on_tool_end=lambda message: print(f"[tool] {message.name} done"),
+    )
+    inputs = None
+    while True:
+        if inputs is None:
+            prompt = input("\nYou: ").strip()
+            if not prompt:
+                break
+            inputs = {"messages": [HumanMessage(content=prompt)]}
+        result = handler.run(graph, inputs, config)
+        inputs = None
+        metrics = result.metrics
+        print(f"\n(first token {metrics.time_to_first_token or 0:.2f}s, total {metrics.total_latency:.2f}s)")
+        if result.interrupted:
+            names = ", ".join(call["name"] for call in result.pending_tool_calls)
+            if input(f"Approve {names}? [y/N] ").strip().lower() == "y":
+                result = handler.run(graph, None, config)
+
+
+if __name__ == "__main__":
+    main()
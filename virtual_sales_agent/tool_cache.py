@@ -0,0 +1,191 @@
+import functools
+import inspect
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# One counter per data scope, bumped by triggers in the same transaction as
+# the write, so any writer (create_order, catalog scripts, another process)
+# invalidates exactly the cached results that read that data:
+#   catalog           - any change to products (stock, price, text)
+#   orders            - any order or order item (popularity)
+#   orders:<customer> - that customer's orders
+DATA_VERSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_versions (
+    scope TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_products_ai AFTER INSERT ON products BEGIN
+    INSERT INTO data_versions (scope, version) VALUES ('catalog', 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_products_au AFTER UPDATE ON products BEGIN
+    INSERT INTO data_versions (scope, version) VALUES ('catalog', 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_products_ad AFTER DELETE ON products BEGIN
+    INSERT INTO data_versions (scope, version) VALUES ('catalog', 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_orders_ai AFTER INSERT ON orders BEGIN
+    INSERT INTO data_versions (scope, version) VALUES ('orders', 1), ('orders:' || new.customer_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_orders_au AFTER UPDATE ON orders BEGIN
+    INSERT INTO data_versions (scope, version)
+    VALUES ('orders', 1), ('orders:' || old.customer_id, 1), ('orders:' || new.customer_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_orders_ad AFTER DELETE ON orders BEGIN
+    INSERT INTO data_versions (scope, version) VALUES ('orders', 1), ('orders:' || old.customer_id, 1)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_order_items_ai AFTER INSERT ON order_items BEGIN
+    INSERT INTO data_versions (scope, version)
+    SELECT 'orders', 1 UNION ALL
+    SELECT 'orders:' || customer_id, 1 FROM orders WHERE id = new.order_id
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_order_items_au AFTER UPDATE ON order_items BEGIN
+    INSERT INTO data_versions (scope, version)
+    SELECT 'orders', 1 UNION ALL
+    SELECT 'orders:' || customer_id, 1 FROM orders WHERE id IN (old.order_id, new.order_id)
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS data_versions_order_items_ad AFTER DELETE ON order_items BEGIN
+    INSERT INTO data_versions (scope, version)
+    SELECT 'orders', 1 UNION ALL
+    SELECT 'orders:' || customer_id, 1 FROM orders WHERE id = old.order_id
+    ON CONFLICT (scope) DO UPDATE SET version = version + 1;
+END;
+"""
+
+
+def _normalize(value: Any) -> Any:
+    """Argument value as it affects the query: text is case- and space-insensitive."""
+    if isinstance(value, str):
+        return " ".join(value.lower().split())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class ToolResultCache:
+    """Bounded LRU cache for read-only tool results, invalidated by data version.
+
+    Each entry remembers the versions of the scopes it read, taken *before*
+    the tool ran; an entry is served only while all of them are unchanged,
+    so a write that lands during or after the read always forces a miss.
+    ``read_versions(scopes)`` returns the current versions as a tuple.
+    Set ``enabled = False`` to call the tools directly.
+    """
+
+    def __init__(self, read_versions: Callable[[Sequence[str]], Tuple[Any, ...]], max_entries: int = 1024):
+        self.read_versions = read_versions
+        self.max_entries = max_entries
+        self.enabled = True
+        self._entries: "OrderedDict[str, Tuple[Tuple[Any, ...], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+    def cached(self, scopes: Sequence[str], per_customer: bool = False):
+        """Decorate a tool function; apply below ``@tool``.
+
+        ``scopes`` may contain ``{customer_id}``, filled from the injected
+        ``config``; ``per_customer`` adds the customer id to the key.
+        """
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                arguments = dict(bound.arguments)
+                config = arguments.pop("config", None) or {}
+                customer_id = config.get("configurable", {}).get("customer_id")
+                key = json.dumps(
+                    [func.__name__, _normalize(arguments), customer_id if per_customer else None],
+                    sort_keys=True,
+                    default=str,
+                )
+                entry_scopes = [scope.format(customer_id=customer_id) for scope in scopes]
+                return self._get_or_call(key, entry_scopes, lambda: func(*args, **kwargs))
+
+            wrapper.cache = self
+            return wrapper
+
+        return decorator
+
+    def _get_or_call(self, key: str, scopes: Sequence[str], call: Callable[[], Any]) -> Any:
+        versions = self.read_versions(scopes)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == versions:
+                    self._entries.move_to_end(key)
+                    self.counts["hits"] += 1
+                    return json.loads(entry[1])
+                del self._entries[key]
+                self.counts["stale"] += 1
+            self.counts["misses"] += 1
+
+        result = call()
+        # Error results are not cached; the next call retries the query
+        if isinstance(result, dict) and "error" in result:
+            return result
+        # Stored as JSON so callers can never mutate a cached value
+        try:
+            payload = json.dumps(result)
+        except (TypeError, ValueError):
+            return result
+        with self._lock:
+            self._entries[key] = (versions, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counts["evictions"] += 1
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.counts["hits"] + self.counts["misses"]
+            return {
+                **self.counts,
+                "entries": len(self._entries),
+                "hit_rate": self.counts["hits"] / lookups if lookups else 0.0,
+            }
+
+
+def read_data_versions(conn, scopes: Sequence[str]) -> Tuple[int, ...]:
+    """Current version of each scope; scopes never written yet are 0."""
+    rows = {
+        row[0]: row[1] for row in conn.execute(
+            f"SELECT scope, version FROM data_versions WHERE scope IN ({','.join('?' * len(scopes))})",
+            list(scopes),
+        )
+    }
+    return tuple(rows.get(scope, 0) for scope in scopes)
@@ -0,0 +1,97 @@
+import json
+from typing import Any, Callable, Dict, List
+
+# Serializers turn a tool's structured result into ToolMessage content
+ToolResultSerializer = Callable[[Any], str]
+
+FLOAT_DIGITS = 2
+
+
+def json_tool_result(result: Any) -> str:
+    """One-line JSON, the encoding ToolNode uses (minus the whitespace)."""
+    return json.dumps(result, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def compact_tool_result(result: Any) -> str:
+    """Line-oriented encoding that names each column once instead of once per row.
+
+    Scalars become ``key: value`` lines and nested dicts ``parent.key: value``.
+    Lists of dicts become a header and one ``|``-separated row per item.
+    Columns that are empty in every row are dropped, and columns with the
+    same value in every row are stated once above the table. Floats keep
+    FLOAT_DIGITS decimals and None fields are left out:
+
+        products: 2 rows, all with category=Books
+        id|name|price|quantity
+        12|Product 11|80.41|7
+        18|Product 17|124.27|3
+        count: 2
+        has_more: false
+    """
+    lines: List[str] = []
+    if isinstance(result, dict):
+        _dict_lines(result, "", lines)
+    elif isinstance(result, list):
+        _list_lines("rows", result, lines)
+    else:
+        lines.append(_cell(result))
+    return "\n".join(lines)
+
+
+SERIALIZERS: Dict[str, ToolResultSerializer] = {
+    "compact": compact_tool_result,
+    "json": json_tool_result,
+}
+
+
+def _dict_lines(value: Dict[str, Any], prefix: str, lines: List[str]) -> None:
+    for key, item in value.items():
+        name = f"{prefix}{key}"
+        if item is None:
+            continue
+        if isinstance(item, dict):
+            _dict_lines(item, f"{name}.", lines)
+        elif isinstance(item, (list, tuple)):
+            _list_lines(name, item, lines)
+        else:
+            lines.append(f"{name}: {_cell(item)}")
+
+
+def _list_lines(name: str, items: List[Any], lines: List[str]) -> None:
+    if not items:
+        lines.append(f"{name}: none")
+        return
+    if not all(isinstance(item, dict) for item in items):
+        lines.append(f"{name}: {', '.join(_cell(item) for item in items)}")
+        return
+
+    columns = list(dict.fromkeys(key for item in items for key in item))
+    cells = [[_cell(item.get(column)) for column in columns] for item in items]
+    keep, shared = [], []
+    for i, column in enumerate(columns):
+        values = {row[i] for row in cells}
+        if values == {""}:
+            continue
+        if len(items) > 1 and len(values) == 1:
+            shared.append(f"{column}={cells[0][i]}")
+        else:
+            keep.append(i)
+
+    header = f"{name}: {len(items)} row{'s' if len(items) != 1 else ''}"
+    lines.append(header + (f", all with {', '.join(shared)}" if shared else ""))
+    if keep:
+        lines.append("|".join(columns[i] for i in keep))
+        lines.extend("|".join(row[i] for i in keep) for row in cells)
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        text = f"{value:.{FLOAT_DIGITS}f}".rstrip("0").rstrip(".")
+        return text if text not in ("", "-0") else "0"
+    if isinstance(value, (dict, list)):
+        return json_tool_result(value)
+    return " ".join(str(value).split()).replace("|", "/")
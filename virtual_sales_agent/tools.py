@@ -1,76 +1,430 @@
+import asyncio
+import atexit
+import contextvars
+import functools
+import os
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
 import logging
 
 from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool, tool
+
+from log_setup import summarize
+from metrics import TOOL_SECONDS, TimedConnection
+from migrations import migrate
+from pagination import PAGE_SIZE, CursorError, clamp_limit, decode_cursor, paginate
+from recommender import record_order, recommend
+from search_index import BM25_WEIGHTS, build_match_query
+from semantic_index import SemanticProductIndex, load_expansions, logged_through, prune_change_log
+from tool_cache import ToolResultCache, read_data_versions
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# The sample store at the repository root, wherever the app is started from;
+# STORE_DB points the tools at another database
+DEFAULT_DB_PATH = os.getenv("STORE_DB") or os.path.normpath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "local_store.db")
+)
+
 class DatabaseManager:
-    def get_connection(self):
-        return sqlite3.connect("local_store.db")
+    """Hands out one long-lived SQLite connection per thread.
+
+    Connections are opened lazily, tuned with WAL and cache pragmas, and keep
+    sqlite3's prepared-statement cache warm across tool calls. Connections
+    owned by threads that have exited are closed the next time a thread
+    connects, and everything is closed on interpreter shutdown.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB_PATH,
+        cached_statements: int = 256,
+        cache_size_kb: int = 20000,
+        mmap_size: int = 256 * 1024 * 1024,
+        busy_timeout_ms: int = 5000,
+    ):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[tuple] = []
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=TimedConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if not self._schema_ready:
+            with self._lock:
+                if not self._schema_ready:
+                    migrate(conn)
+                    self._schema_ready = True
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._close_dead_threads()
+                self._connections.append((threading.current_thread(), conn))
+            logger.info("Opened SQLite connection to %s", self.db_path)
+        return conn
+
+    def _close_dead_threads(self):
+        alive = []
+        for thread, conn in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn))
+            else:
+                conn.close()
+        self._connections = alive
+
+    def close(self):
+        """Close every connection opened by this manager."""
+        with self._lock:
+            for _, conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
 
 db_manager = DatabaseManager()
+atexit.register(db_manager.close)
+semantic_index = SemanticProductIndex()
+
+
+def _current_data_versions(scopes):
+    # The path is part of the version so swapping databases never serves old entries
+    return (db_manager.db_path,) + read_data_versions(db_manager.get_connection(), scopes)
+
+
+tool_cache = ToolResultCache(_current_data_versions, max_entries=1024)
+
+
+def timed_tool(func):
+    """Record each call in the per-tool latency histogram; apply right below ``@tool``."""
+    return TOOL_SECONDS.labels(func.__name__).time()(func)
+
+# Async callers (graph.ainvoke/astream) run the blocking sqlite tools on this
+# pool: the event loop never waits on a query, and at most DB_WORKERS
+# connections are busy at once however many sessions are active.
+db_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DB_WORKERS", "8")), thread_name_prefix="sqlite"
+)
+atexit.register(db_executor.shutdown, wait=False)
+
+
+def semantic_index_path() -> str:
+    return os.getenv("SEMANTIC_INDEX_PATH") or f"{db_manager.db_path}.semantic.npz"
+
 
+def semantic_expansions_path() -> str:
+    """Query expansions for this catalog (see semantic_index.load_expansions)."""
+    return os.getenv("SEMANTIC_EXPANSIONS_PATH") or f"{os.path.splitext(db_manager.db_path)[0]}.expansions.json"
+
+
+def warm_semantic_index() -> None:
+    """Load the persisted semantic index, catch up with the catalog, persist it and prune the change log."""
+    path = semantic_index_path()
+    started = time.perf_counter()
+    try:
+        semantic_index.expansions = load_expansions(semantic_expansions_path())
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring query expansions %s: %s", semantic_expansions_path(), e)
+    try:
+        if os.path.exists(path):
+            try:
+                semantic_index.restore(path)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning("Ignoring semantic index %s: %s", path, e)
+        conn = db_manager.get_connection()
+        semantic_index.sync(conn)
+        # A file saved against another database: its rows do not match this catalog
+        if semantic_index.size != conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]:
+            semantic_index.rebuild(conn)
+        semantic_index.save(path)
+        pruned = prune_change_log(conn, semantic_index.last_change_seq)
+        logger.info(
+            "Semantic index ready: %d products in %.0f ms, %d change log rows pruned",
+            semantic_index.size, (time.perf_counter() - started) * 1000, pruned,
+        )
+    except Exception:
+        logger.exception("Semantic index warm-up failed; it is built on first search")
+
+
+def start_semantic_index_warmup():
+    """Warm the semantic index on db_executor so the first semantic search does not build it."""
+    return db_executor.submit(warm_semantic_index)
+
+
+def offload_to_db_executor(sql_tool: StructuredTool) -> StructuredTool:
+    """Give a sync tool a coroutine that runs it on db_executor."""
+    func = sql_tool.func
+
+    @functools.wraps(func)
+    async def coroutine(*args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            db_executor, functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    sql_tool.coroutine = coroutine
+    return sql_tool
+
+
+@offload_to_db_executor
 @tool
+@timed_tool
+@tool_cache.cached(scopes=["catalog"])
 def get_available_categories() -> Dict[str, List[str]]:
     """Returns available product categories."""
-    logger.info("Fetching available product categories.")
+    logger.debug("Fetching available product categories.")
     with db_manager.get_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT DISTINCT category FROM products WHERE quantity > 0")
         categories = {"categories": [row[0] for row in cursor.fetchall()]}
-        logger.info(f"Available categories: {categories}")
+        logger.info("Available categories: %s", summarize(categories))
         return categories
 
 # In tools.py
 
+# Columns search_products can return; id is always included
+PRODUCT_FIELDS = ("id", "name", "category", "description", "price", "quantity")
+DEFAULT_PRODUCT_FIELDS = ("id", "name", "category", "price", "quantity")
+# sort -> (ORDER BY columns, direction); every order ends with id so keys are unique
+PRODUCT_SORTS = {
+    "relevance": (("score", "id"), "ASC"),
+    "price_asc": (("price", "id"), "ASC"),
+    "price_desc": (("price", "id"), "DESC"),
+}
+# bm25 scores depend on the whole indexed text (term and document counts), so
+# a relevance cursor is only valid against the text it was ranked on. It also
+# carries the product_change_log sequence, which moves exactly when the FTS
+# index does (new, deleted or renamed products; stock and price changes leave
+# scores alone); a cursor from before such a change is refused rather than
+# resumed at a score that no longer sits at the same place in the ranking.
+STALE_RELEVANCE_CURSOR = "Search results changed since this cursor was issued; repeat the search without a cursor"
+
+
+def _product_rows(cursor: sqlite3.Cursor, fields: Sequence[str], key_columns: Sequence[str]) -> Iterator[Any]:
+    """(sort key, projected product) pairs, read lazily from the open cursor."""
+    for row in cursor:
+        yield tuple(row[c] for c in key_columns), {f: row[f] for f in fields}
+
+
+@offload_to_db_executor
 @tool
+@timed_tool
+@tool_cache.cached(scopes=["catalog"])
 def search_products(
     query: Optional[str] = None,
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
+    sort: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    limit: int = PAGE_SIZE,
+    cursor: Optional[str] = None,
 ) -> Dict[str, Any]:
-    """Search products with filters."""
-    logger.info(f"Searching products with query: {query}, category: {category}, min_price: {min_price}, max_price: {max_price}")
-    conditions = ["quantity > 0"]
-    params = []
+    """Search products with filters, one page at a time.
+
+    Text queries are ranked by relevance; sort can also be "price_asc" or
+    "price_desc". Returns at most `limit` products (up to 50) with the
+    fields id, name, category, price and quantity, or the ones listed in
+    `fields` (add "description" for details). When `has_more` is true, pass
+    `next_cursor` back as `cursor` with the same filters for the next page.
+    """
+    logger.debug(
+        "Searching products with query: %s, category: %s, min_price: %s, max_price: %s, sort: %s, cursor: %s",
+        query, category, min_price, max_price, sort, cursor,
+    )
+    match = build_match_query(query) if query else None
+    sort = sort or ("relevance" if match else "price_asc")
+    if sort not in PRODUCT_SORTS:
+        return {"error": f"Unknown sort '{sort}', use one of {', '.join(PRODUCT_SORTS)}"}
+    if sort == "relevance" and not match:
+        sort = "price_asc"
+    unknown = sorted(set(fields or ()) - set(PRODUCT_FIELDS))
+    if unknown:
+        return {"error": f"Unknown fields {unknown}, use any of {', '.join(PRODUCT_FIELDS)}"}
+    selected = ["id"] + [f for f in fields or DEFAULT_PRODUCT_FIELDS if f != "id"]
+    limit = clamp_limit(limit)
+    key_columns, direction = PRODUCT_SORTS[sort]
 
-    if query:
-        conditions.append("(LOWER(name) LIKE ? OR LOWER(description) LIKE ?)")
+    conditions = ["p.quantity > 0"]
+    params: List[Any] = []
+    if match:
+        conditions.append("products_fts MATCH ?")
+        params.append(match)
+    elif query:
+        conditions.append("(LOWER(p.name) LIKE ? OR LOWER(p.description) LIKE ?)")
         params.extend([f"%{query.lower()}%", f"%{query.lower()}%"])
     if category:
-        conditions.append("LOWER(category) = ?")
+        conditions.append("LOWER(p.category) = ?")
         params.append(category.lower())
     if min_price is not None:
-        conditions.append("price >= ?")
+        conditions.append("p.price >= ?")
         params.append(float(min_price))
     if max_price is not None:
-        conditions.append("price <= ?")
+        conditions.append("p.price <= ?")
         params.append(float(max_price))
 
-    query_str = f"SELECT * FROM products WHERE {' AND '.join(conditions)}"
+    columns = ", ".join(f"p.{c}" for c in dict.fromkeys(selected + ["price"]))
+    if match:
+        source = (
+            f"SELECT {columns}, bm25(products_fts, {BM25_WEIGHTS[0]}, {BM25_WEIGHTS[1]}) AS score "
+            "FROM products_fts JOIN products p ON p.id = products_fts.rowid "
+            f"WHERE {' AND '.join(conditions)}"
+        )
+    else:
+        source = f"SELECT {columns} FROM products p WHERE {' AND '.join(conditions)}"
+
+    # Keyset: continue strictly after the last row sent, in sort order
+    ranked = sort == "relevance"
+    page_conditions = []
+    if cursor:
+        try:
+            after = decode_cursor(cursor, sort, len(key_columns) + ranked)
+        except CursorError as e:
+            return {"error": str(e)}
+        if ranked:
+            *after, text_seq = after
+        page_conditions.append(f"({', '.join(key_columns)}) {'>' if direction == 'ASC' else '<'} (?, ?)")
+        params.extend(after)
+    query_str = (
+        f"SELECT * FROM ({source}) "
+        f"{'WHERE ' + ' AND '.join(page_conditions) if page_conditions else ''} "
+        f"ORDER BY {', '.join(f'{c} {direction}' for c in key_columns)} LIMIT ?"
+    )
+    params.append(limit + 1)
 
     with db_manager.get_connection() as conn:
-        conn.row_factory = sqlite3.Row  # Add this line
-        cursor = conn.cursor()
-        logger.info(f"Executing query: {query_str} with params: {params}")
-        cursor.execute(query_str, params)
-        products = cursor.fetchall()
+        if ranked:
+            ranked_seq = logged_through(conn)
+            if cursor and text_seq != ranked_seq:
+                return {"error": STALE_RELEVANCE_CURSOR}
+        db_cursor = conn.cursor()
+        logger.debug("Executing query: %s with params: %s", query_str, params)
+        db_cursor.execute(query_str, params)
+        rows = _product_rows(db_cursor, selected, key_columns)
+        if ranked:
+            rows = ((key + (ranked_seq,), item) for key, item in rows)
+        page = paginate(rows, limit, sort)
         result = {
-            "products": [dict(row) for row in products],
-            "count": len(products)
+            "products": page["items"],
+            "count": len(page["items"]),
+            "has_more": page["has_more"],
+            "next_cursor": page["next_cursor"],
         }
-        logger.info(f"Search results: {result}")
+        logger.info("Search results: %s", summarize(result))
         return result
 
+@offload_to_db_executor
 @tool
+@timed_tool
+@tool_cache.cached(scopes=["catalog"])
+def search_products_semantic(query: str, limit: int = 5) -> Dict[str, Any]:
+    """Find products matching a description of what the customer needs, even without exact product words."""
+    logger.debug("Semantic product search with query: %s, limit: %s", query, limit)
+    limit = max(1, min(int(limit), 20))
+
+    with db_manager.get_connection() as conn:
+        semantic_index.sync(conn)
+        hits = semantic_index.search(query, k=limit * 2)
+        if not hits:
+            return {"products": [], "count": 0}
+        scores = dict(hits)
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT * FROM products WHERE id IN ({','.join('?' * len(scores))}) AND quantity > 0",
+            list(scores),
+        )
+        products = sorted(
+            ({**dict(row), "score": round(scores[row["id"]], 3)} for row in cursor.fetchall()),
+            key=lambda p: -p["score"],
+        )[:limit]
+        result = {"products": products, "count": len(products)}
+        logger.info("Semantic search results: %s", summarize(result))
+        return result
+
+# Attempts for an order transaction that keeps hitting "database is locked"
+# after the connection's busy timeout has already been waited out.
+ORDER_RETRIES = 3
+ORDER_RETRY_BACKOFF = 0.05
+
+
+def _place_order(cursor: sqlite3.Cursor, customer_id: str, quantities: Dict[int, int]) -> Dict[str, Any]:
+    """Write one order set-based; the caller owns the transaction."""
+    ids = list(quantities)
+    cursor.execute(
+        f"SELECT id, price, quantity FROM products WHERE id IN ({','.join('?' * len(ids))})",
+        ids,
+    )
+    stock = {row[0]: row for row in cursor.fetchall()}
+    for product_id in ids:
+        if product_id not in stock:
+            raise ValueError(f"Product {product_id} not found")
+        if stock[product_id][2] < quantities[product_id]:
+            raise ValueError(f"Insufficient stock for product {product_id}")
+
+    # Conditional decrement: a row only changes if the stock still covers it
+    cursor.executemany(
+        "UPDATE products SET quantity = quantity - ? WHERE id = ? AND quantity >= ?",
+        [(qty, product_id, qty) for product_id, qty in quantities.items()],
+    )
+    if cursor.rowcount != len(ids):
+        raise ValueError("Insufficient stock for one or more products")
+
+    cursor.execute(
+        "INSERT INTO orders (customer_id, order_date, status) VALUES (?, ?, ?)",
+        (customer_id, datetime.now().isoformat(), "pending")
+    )
+    order_id = cursor.lastrowid
+
+    ordered_items = [
+        {"product_id": product_id, "quantity": qty, "unit_price": stock[product_id][1]}
+        for product_id, qty in quantities.items()
+    ]
+    cursor.executemany(
+        """INSERT INTO order_items
+        (order_id, product_id, quantity, unit_price)
+        VALUES (?, ?, ?, ?)""",
+        [(order_id, i["product_id"], i["quantity"], i["unit_price"]) for i in ordered_items]
+    )
+    record_order(cursor, customer_id, ordered_items)
+
+    total = sum(i["unit_price"] * i["quantity"] for i in ordered_items)
+    return {
+        "order_id": order_id,
+        "total": round(total, 2),
+        "items": ordered_items,
+        "status": "success"
+    }
+
+@offload_to_db_executor
+@tool
+@timed_tool
 def create_order(
     products: List[Dict[str, Any]], *, config: RunnableConfig
 ) -> Dict[str, str]:
@@ -80,80 +434,68 @@ def create_order(
         logger.error("Customer ID missing")
         return {"error": "Customer ID missing"}
 
-    with db_manager.get_connection() as conn:
-        try:
-            cursor = conn.cursor()
-            cursor.execute("BEGIN TRANSACTION")
-
-            # Create order
-            cursor.execute(
-                "INSERT INTO orders (customer_id, order_date, status) VALUES (?, ?, ?)",
-                (customer_id, datetime.now().isoformat(), "pending")
-            )
-            order_id = cursor.lastrowid
-
-            total = 0.0
-            ordered_items = []
-
-            for item in products:
-                cursor.execute(
-                    "SELECT id, price, quantity FROM products WHERE id = ?",
-                    (item["product_id"],)
-                )
-                product = cursor.fetchone()
-
-                if not product:
-                    raise ValueError(f"Product {item['product_id']} not found")
-                if product[2] < item["quantity"]:
-                    raise ValueError(f"Insufficient stock for product {product[0]}")
-
-                # Update inventory
-                cursor.execute(
-                    "UPDATE products SET quantity = quantity - ? WHERE id = ?",
-                    (item["quantity"], product[0])
-                )
-
-                # Add order item
-                cursor.execute(
-                    """INSERT INTO order_items
-                    (order_id, product_id, quantity, unit_price)
-                    VALUES (?, ?, ?, ?)""",
-                    (order_id, product[0], item["quantity"], product[1])
-                )
-
-                total += product[1] * item["quantity"]
-                ordered_items.append({
-                    "product_id": product[0],
-                    "quantity": item["quantity"],
-                    "unit_price": product[1]
-                })
+    quantities: Dict[int, int] = {}
+    try:
+        for item in products:
+            product_id, qty = int(item["product_id"]), int(item["quantity"])
+            if qty <= 0:
+                raise ValueError(f"Invalid quantity for product {product_id}")
+            quantities[product_id] = quantities.get(product_id, 0) + qty
+        if not quantities:
+            raise ValueError("No products in order")
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error("Error creating order: %s", e)
+        return {"error": str(e), "status": "failed"}
 
+    conn = db_manager.get_connection()
+    cursor = conn.cursor()
+    for attempt in range(1, ORDER_RETRIES + 1):
+        try:
+            # IMMEDIATE takes the write lock up front, so the stock read and
+            # the decrement can't interleave with another writer
+            cursor.execute("BEGIN IMMEDIATE")
+            result = _place_order(cursor, customer_id, quantities)
             conn.commit()
-            logger.info(f"Order created successfully: {order_id}")
-            return {
-                "order_id": order_id,
-                "total": round(total, 2),
-                "items": ordered_items,
-                "status": "success"
-            }
+            logger.info("Order created successfully: %s", result["order_id"])
+            return result
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            retryable = "locked" in str(e) or "busy" in str(e)
+            if not retryable or attempt == ORDER_RETRIES:
+                logger.error("Error creating order: %s", e)
+                return {"error": str(e), "status": "failed"}
+            logger.warning("Database busy creating order, retry %d/%d", attempt, ORDER_RETRIES)
+            time.sleep(ORDER_RETRY_BACKOFF * attempt)
         except Exception as e:
             conn.rollback()
-            logger.error(f"Error creating order: {str(e)}")
+            logger.error("Error creating order: %s", e)
             return {"error": str(e), "status": "failed"}
 
+@offload_to_db_executor
 @tool
+@timed_tool
+@tool_cache.cached(scopes=["orders:{customer_id}"], per_customer=True)
 def check_order_status(
-    order_id: Union[str, None], *, config: RunnableConfig
-) -> Dict[str, Union[str, None]]:
-    """Check order status."""
+    order_id: Union[str, None],
+    limit: int = PAGE_SIZE,
+    cursor: Optional[str] = None,
+    *,
+    config: RunnableConfig,
+) -> Dict[str, Any]:
+    """Check order status.
+
+    Without an order_id, lists the customer's orders newest first, at most
+    `limit` (up to 50) per page. When `has_more` is true, pass `next_cursor`
+    back as `cursor` for older orders.
+    """
     customer_id = config.get("configurable", {}).get("customer_id")
-    logger.info(f"Checking order status for order_id: {order_id}, customer_id: {customer_id}")
+    logger.debug("Checking order status for order_id: %s, customer_id: %s, cursor: %s", order_id, customer_id, cursor)
 
     with db_manager.get_connection() as conn:
-        cursor = conn.cursor()
+        db_cursor = conn.cursor()
 
         if order_id:
-            cursor.execute(
+            db_cursor.execute(
                 """SELECT o.id, o.status, SUM(oi.quantity * oi.unit_price) as total
                 FROM orders o
                 JOIN order_items oi ON o.id = oi.order_id
@@ -161,66 +503,52 @@ def check_order_status(
                 GROUP BY o.id""",
                 (order_id, customer_id)
             )
-            order = cursor.fetchone()
+            order = db_cursor.fetchone()
             if not order:
                 logger.error("Order not found")
                 return {"error": "Order not found"}
-            logger.info(f"Order status: {dict(order)}")
-            return dict(order)
-        else:
-            cursor.execute(
-                """SELECT id, order_date, status
-                FROM orders
-                WHERE customer_id = ?""",
-                (customer_id,)
-            )
-            orders = {"orders": [dict(row) for row in cursor.fetchall()]}
-            logger.info(f"Orders for customer: {orders}")
-            return orders
+            status = dict(order)
+            logger.info("Order status: %s", summarize(status))
+            return status
+
+        limit = clamp_limit(limit)
+        params: List[Any] = [customer_id]
+        after = ""
+        if cursor:
+            try:
+                params.extend(decode_cursor(cursor, "newest", 2))
+            except CursorError as e:
+                return {"error": str(e)}
+            after = "AND (order_date, id) < (?, ?)"
+        db_cursor.execute(
+            f"""SELECT id, order_date, status
+            FROM orders
+            WHERE customer_id = ? {after}
+            ORDER BY order_date DESC, id DESC
+            LIMIT ?""",
+            params + [limit + 1],
+        )
+        rows = (((row["order_date"], row["id"]), dict(row)) for row in db_cursor)
+        page = paginate(rows, limit, "newest")
+        orders = {
+            "orders": page["items"],
+            "count": len(page["items"]),
+            "has_more": page["has_more"],
+            "next_cursor": page["next_cursor"],
+        }
+        logger.info("Orders for customer: %s", summarize(orders))
+        return orders
 
+@offload_to_db_executor
 @tool
+@timed_tool
+@tool_cache.cached(scopes=["catalog", "orders"], per_customer=True)
 def search_products_recommendations(config: RunnableConfig) -> Dict[str, Any]:
     """Get personalized recommendations."""
     customer_id = config.get("configurable", {}).get("customer_id")
-    logger.info(f"Fetching recommendations for customer_id: {customer_id}")
+    logger.debug("Fetching recommendations for customer_id: %s", customer_id)
 
     with db_manager.get_connection() as conn:
-        cursor = conn.cursor()
-
-        # Get customer's frequent categories
-        cursor.execute(
-            """SELECT category, COUNT(*) as count
-            FROM order_items oi
-            JOIN products p ON oi.product_id = p.id
-            JOIN orders o ON oi.order_id = o.id
-            WHERE o.customer_id = ?
-            GROUP BY category
-            ORDER BY count DESC
-            LIMIT 3""",
-            (customer_id,)
-        )
-        categories = [row[0] for row in cursor.fetchall()]
-
-        if not categories:
-            # Get popular products
-            cursor.execute(
-                """SELECT p.*
-                FROM products p
-                JOIN order_items oi ON p.id = oi.product_id
-                GROUP BY p.id
-                ORDER BY SUM(oi.quantity) DESC
-                LIMIT 5"""
-            )
-        else:
-            cursor.execute(
-                f"""SELECT * FROM products
-                WHERE category IN ({','.join(['?']*len(categories))})
-                AND quantity > 0
-                ORDER BY RANDOM()
-                LIMIT 5""",
-                categories
-            )
-
-        recommendations = {"recommendations": [dict(row) for row in cursor.fetchall()]}
-        logger.info(f"Recommendations: {recommendations}")
+        recommendations = {"recommendations": recommend(conn.cursor(), customer_id)}
+        logger.info("Recommendations: %s", summarize(recommendations))
         return recommendations
@@ -1,10 +1,67 @@
-from langchain_core.messages import ToolMessage
-from langchain_core.runnables import RunnableLambda
+import json
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolCall, ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
 from langgraph.prebuilt import ToolNode
+from langgraph.utils.runnable import RunnableCallable
+
+from metrics import NODE_SECONDS
+from tool_format import ToolResultSerializer
+
+
+def pending_tool_calls(
+    messages: Sequence[AnyMessage], handles: Callable[[str], bool] = lambda name: True
+) -> Tuple[Optional[AIMessage], List[ToolCall]]:
+    """The latest AIMessage and those of its tool calls that have no result yet."""
+    answered = set()
+    for message in reversed(messages):
+        if isinstance(message, ToolMessage):
+            answered.add(message.tool_call_id)
+        elif isinstance(message, AIMessage):
+            return message, [
+                tc for tc in message.tool_calls if tc["id"] not in answered and handles(tc["name"])
+            ]
+    return None, []
+
+
+def order_tool_results(messages: Sequence[AnyMessage]) -> List[AnyMessage]:
+    """Put each turn's tool results back in the order the calls were made.
 
-def handle_tool_error(state) -> dict:
+    Safe and sensitive calls of one turn run in separate nodes, so their
+    results land in state in execution order; models that match results to
+    calls by position need them in call order.
+    """
+    ordered = list(messages)
+    i = 0
+    while i < len(ordered):
+        message = ordered[i]
+        i += 1
+        if not (isinstance(message, AIMessage) and len(message.tool_calls) > 1):
+            continue
+        end = i
+        while end < len(ordered) and isinstance(ordered[end], ToolMessage):
+            end += 1
+        position = {tc["id"]: n for n, tc in enumerate(message.tool_calls)}
+        ordered[i:end] = sorted(
+            ordered[i:end], key=lambda m: position.get(m.tool_call_id, len(position))
+        )
+        i = end
+    return ordered
+
+
+def rejection_messages(tool_calls: Sequence[ToolCall], reason: str) -> List[ToolMessage]:
+    """Tool results telling the assistant that a reviewer declined these calls."""
+    return [
+        ToolMessage(content=f"Rejected by reviewer: {reason}", name=tc["name"], tool_call_id=tc["id"])
+        for tc in tool_calls
+    ]
+
+
+def handle_tool_error(state, handles: Callable[[str], bool] = lambda name: True) -> dict:
     error = state.get("error")
-    tool_calls = state["messages"][-1].tool_calls
+    _, tool_calls = pending_tool_calls(state["messages"], handles)
     return {
         "messages": [
             ToolMessage(
@@ -15,7 +72,79 @@ def handle_tool_error(state) -> dict:
         ]
     }
 
-def create_tool_node_with_fallback(tools: list) -> dict:
-    return ToolNode(tools).with_fallbacks(
-        [RunnableLambda(handle_tool_error)], exception_key="error"
-    )
\ No newline at end of file
+
+def serialize_tool_messages(output: dict, serializer: ToolResultSerializer) -> dict:
+    """Re-encode JSON tool results with ``serializer``; the parsed result becomes the artifact.
+
+    The model only sees ``content``; the UI and API can show ``artifact``.
+    Errors and results that are not JSON objects or arrays pass through.
+    """
+    messages = []
+    for message in output.get("messages", []):
+        if isinstance(message, ToolMessage) and message.status != "error" and isinstance(message.content, str):
+            try:
+                result = json.loads(message.content)
+            except ValueError:
+                result = None
+            if isinstance(result, (dict, list)):
+                message = message.model_copy(update={"content": serializer(result), "artifact": result})
+        messages.append(message)
+    return {**output, "messages": messages}
+
+
+def create_tool_node_with_fallback(
+    tools: list,
+    handles: Optional[Callable[[str], bool]] = None,
+    max_concurrency: Optional[int] = None,
+    serializer: Optional[ToolResultSerializer] = None,
+) -> dict:
+    """A ToolNode that runs only the pending tool calls it ``handles``.
+
+    By default a node handles the calls to its own tools, so one assistant
+    turn can be split across several nodes. The selected calls run
+    concurrently on a thread pool of at most ``max_concurrency`` workers and
+    their results are returned in call order. With a ``serializer`` (see
+    tool_format.py) results reach the model in that encoding instead of
+    ToolNode's JSON.
+    """
+    if handles is None:
+        names = {t.name for t in tools}
+        handles = names.__contains__
+
+    def select_calls(state) -> dict:
+        message, tool_calls = pending_tool_calls(state["messages"], handles)
+        return {"messages": [message.model_copy(update={"tool_calls": tool_calls})]}
+
+    node = RunnableLambda(select_calls) | ToolNode(tools)
+    if serializer:
+        node = node | RunnableLambda(lambda output: serialize_tool_messages(output, serializer))
+    if max_concurrency:
+        node = node.with_config(max_concurrency=max_concurrency)
+    return node.with_fallbacks(
+        [RunnableLambda(lambda state: handle_tool_error(state, handles))], exception_key="error"
+    )
+
+
+def instrumented_node(name: str, node: Runnable) -> Runnable:
+    """``node`` with every run recorded in the per-node latency histogram.
+
+    The wrapper is not traced, so callbacks and streaming see the same runs
+    as with the bare node.
+    """
+    histogram = NODE_SECONDS.labels(name)
+
+    def run(state, config: RunnableConfig):
+        started = time.perf_counter()
+        try:
+            return node.invoke(state, config)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    async def arun(state, config: RunnableConfig):
+        started = time.perf_counter()
+        try:
+            return await node.ainvoke(state, config)
+        finally:
+            histogram.observe(time.perf_counter() - started)
+
+    return RunnableCallable(run, arun, name=name, trace=False)